@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# scripts/benchmark_coleta.py
+"""Compara o custo por ciclo do backend procfs com o caminho via psutil"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import psutil
+
+from src.monitor.cpu import AmostradorCPU
+from src.monitor.procfs import criar_leitor_procfs
+
+
+def ciclo_psutil(amostrador: AmostradorCPU):
+    """Mesmos contadores que o SistemaMonitor lê pelo psutil"""
+    amostrador.amostrar()
+    psutil.virtual_memory()
+    psutil.swap_memory()
+    psutil.disk_io_counters()
+    psutil.net_io_counters()
+    psutil.getloadavg()
+    psutil.cpu_stats()
+    psutil.boot_time()
+
+
+def ciclo_procfs(leitor, amostrador: AmostradorCPU):
+    """Uma leitura de /proc compartilhada por todos os coletores"""
+    dados = leitor.atualizar()
+    amostrador.atualizar(dados["cpu"])
+    leitor.memoria()
+    leitor.rede_total()
+
+
+def medir(nome: str, func, iteracoes: int):
+    """Executa a função e imprime tempo de parede e CPU por ciclo"""
+    func()  # aquecimento
+
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+    for _ in range(iteracoes):
+        func()
+    parede = (time.perf_counter() - inicio_parede) / iteracoes
+    cpu = (time.process_time() - inicio_cpu) / iteracoes
+
+    print(f"{nome:<8} {parede * 1e6:10.1f} µs/ciclo (parede) "
+          f"{cpu * 1e6:10.1f} µs/ciclo (CPU)")
+    return parede
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iteracoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    leitor = criar_leitor_procfs()
+    if leitor is None:
+        print("Backend procfs indisponível neste host")
+        return 1
+
+    print(f"CPUs: {psutil.cpu_count()} | iterações: {args.iteracoes}")
+
+    amostrador_psutil = AmostradorCPU(janela_minima=0)
+    amostrador_procfs = AmostradorCPU(janela_minima=0)
+
+    t_psutil = medir("psutil", lambda: ciclo_psutil(amostrador_psutil), args.iteracoes)
+    t_procfs = medir("procfs", lambda: ciclo_procfs(leitor, amostrador_procfs), args.iteracoes)
+
+    print(f"Ganho: {t_psutil / t_procfs:.1f}x")
+    leitor.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
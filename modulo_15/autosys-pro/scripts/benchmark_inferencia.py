@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# scripts/benchmark_inferencia.py
+"""Compara a predição do artefato numpy com DataFrame + sklearn, por amostra"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.monitor.features import FEATURES
+from src.monitor.inferencia import ModeloCompacto
+
+
+def treinar(amostras: int, semente: int = 42):
+    """Modelo com a mesma configuração do preditor sobre dados sintéticos"""
+    rng = np.random.default_rng(semente)
+    X = rng.normal(50, 20, (amostras, len(FEATURES)))
+    y = (X[:, 0] + X[:, 1] / 2 + rng.normal(0, 10, amostras) > 90).astype(int)
+
+    scaler = StandardScaler().fit(X)
+    modelo = GradientBoostingClassifier(
+        n_estimators=200, max_depth=8, learning_rate=0.1, subsample=0.8, random_state=42
+    ).fit(scaler.transform(X), y)
+    return modelo, scaler, rng.normal(50, 20, (1000, len(FEATURES)))
+
+
+def medir(nome: str, func, repeticoes: int):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    duracao = (time.perf_counter() - inicio) / repeticoes
+    print(f"{nome:<18} {duracao * 1e6:10.1f} µs/predição")
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--amostras", type=int, default=20000,
+                        help="amostras de treino")
+    parser.add_argument("-r", "--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    modelo, scaler, teste = treinar(args.amostras)
+    compacto = ModeloCompacto.de_sklearn(modelo, scaler, FEATURES)
+    print(f"{compacto.raizes.size} árvores, {compacto.valor.size} nós, "
+          f"profundidade {compacto.profundidade}")
+
+    referencia = modelo.predict_proba(scaler.transform(teste))[:, 1]
+    obtido = np.array([compacto.predict(v) for v in teste])
+    diferenca = float(np.abs(obtido - referencia).max())
+    print(f"Diferença máxima para o sklearn: {diferenca:.2e}")
+
+    vetor = teste[0].tolist()
+
+    def antigo():
+        df = pd.DataFrame([vetor], columns=FEATURES)
+        df = df.fillna(df.mean())
+        modelo.predict_proba(scaler.transform(df[FEATURES].to_numpy()))[0, 1]
+
+    t_antigo = medir("DataFrame+sklearn", antigo, args.repeticoes // 10 or 1)
+    t_novo = medir("artefato numpy", lambda: compacto.predict(vetor), args.repeticoes)
+    print(f"Ganho: {t_antigo / t_novo:.0f}x")
+    return 0 if diferenca < 1e-9 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
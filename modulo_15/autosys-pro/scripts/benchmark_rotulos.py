@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# scripts/benchmark_rotulos.py
+"""Compara a rotulagem vetorizada do preditor com o laço por amostra antigo"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.monitor.preditor import rotular_falhas
+
+
+def gerar_amostras(total: int, intervalo: float, semente: int = 42):
+    """Série de CPU com intervalos irregulares e alguns picos sustentados"""
+    rng = np.random.default_rng(semente)
+    passos = rng.choice([intervalo / 12, intervalo, intervalo * 5], size=total, p=[0.2, 0.7, 0.1])
+    timestamps = (1_700_000_000 + np.cumsum(passos)).astype(np.int64)
+
+    cpu = np.clip(rng.normal(40, 15, total), 0, 100)
+    for inicio in rng.integers(0, total, size=max(total // 2000, 1)):
+        cpu[inicio:inicio + rng.integers(5, 60)] = 99.0
+    return timestamps, cpu
+
+
+def rotular_laco_antigo(cpu: np.ndarray) -> np.ndarray:
+    """O laço original: janela fixa de 288 amostras, df.loc por linha"""
+    df = pd.DataFrame({"cpu_percent": cpu})
+    df["falha_futura"] = 0
+    for i in range(len(df) - 288):
+        janela = df["cpu_percent"].iloc[i:i + 288]
+        if (janela > 95).sum() >= 5:
+            df.loc[df.index[i], "falha_futura"] = 1
+    return df["falha_futura"].to_numpy()
+
+
+def rotular_referencia(timestamps: np.ndarray, cpu: np.ndarray) -> np.ndarray:
+    """Mesma regra de rotular_falhas em Python puro, amostra por amostra"""
+    horizonte = config.FAILURE_HORIZON * 3600
+    duracao = np.diff(timestamps, append=timestamps[-1]).astype(float)
+    duracao[-1] = np.median(duracao[:-1])
+    duracao = np.clip(duracao, 0, config.MONITOR_INTERVAL_SLOW)
+
+    rotulos = np.full(len(timestamps), np.nan)
+    for i in range(len(timestamps)):
+        if timestamps[i] + horizonte > timestamps[-1]:
+            continue
+        quente = 0.0
+        j = i
+        while j < len(timestamps) and timestamps[j] < timestamps[i] + horizonte:
+            if cpu[j] > config.FAILURE_CPU_THRESHOLD:
+                quente += duracao[j]
+            j += 1
+        rotulos[i] = float(quente >= config.FAILURE_MIN_DURATION)
+    return rotulos
+
+
+def medir(nome: str, func):
+    inicio = time.perf_counter()
+    resultado = func()
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<12} {duracao:10.3f} s")
+    return resultado, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--amostras", type=int, default=20000,
+                        help="amostras para o laço antigo e a referência")
+    parser.add_argument("--mes", type=int, default=30 * 86400,
+                        help="amostras para a vetorizada sozinha (1 mês a 1s)")
+    parser.add_argument("--intervalo", type=float, default=60.0)
+    args = parser.parse_args()
+
+    timestamps, cpu = gerar_amostras(args.amostras, args.intervalo)
+    print(f"{args.amostras} amostras, intervalo ~{args.intervalo}s")
+
+    _, t_antigo = medir("laço antigo", lambda: rotular_laco_antigo(cpu))
+    vetorizado, t_novo = medir("vetorizada", lambda: rotular_falhas(timestamps, cpu))
+    referencia, _ = medir("referência", lambda: rotular_referencia(timestamps, cpu))
+
+    iguais = np.array_equal(vetorizado, referencia, equal_nan=True)
+    print(f"Vetorizada = referência: {iguais} | positivos: {int(np.nansum(vetorizado))}")
+    print(f"Ganho sobre o laço antigo: {t_antigo / t_novo:.0f}x")
+
+    timestamps, cpu = gerar_amostras(args.mes, 1.0)
+    medir(f"{args.mes} amostras", lambda: rotular_falhas(timestamps, cpu))
+    return 0 if iguais else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,11 @@ from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import json
-import sqlite3
 
 from src.config import config
+from src.storage.fila import fila_escrita
 from src.utils.logger import logger
+from src.utils.metrics import metrics
 
 
 class GerenciadorAlertas:
@@ -26,6 +27,7 @@ class GerenciadorAlertas:
         self.cooldown_cache = {}
         self.alert_count = defaultdict(int)
 
+    @metrics.instrument_self("alertas.enviar")
     async def enviar(self, alerta: Dict[str, Any]) -> Dict[str, Any]:
         """Envia alerta pelos canais apropriados"""
 
@@ -159,32 +161,7 @@ class GerenciadorAlertas:
     async def _registrar_alerta(self, alerta: Dict[str, Any],
                                 resultados: List[Dict[str, Any]]):
         """Registra alerta no banco de dados"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       CREATE TABLE IF NOT EXISTS alerts
-                       (
-                           id
-                           TEXT
-                           PRIMARY
-                           KEY,
-                           timestamp
-                           DATETIME,
-                           tipo
-                           TEXT,
-                           severidade
-                           TEXT,
-                           mensagem
-                           TEXT,
-                           detalhes
-                           TEXT,
-                           resultados
-                           TEXT
-                       )
-                       """)
-
-        cursor.execute("""
+        await fila_escrita.enfileirar("""
             INSERT OR REPLACE INTO alerts 
             (id, timestamp, tipo, severidade, mensagem, detalhes, resultados)
             VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -198,9 +175,6 @@ class GerenciadorAlertas:
             json.dumps(resultados)
         ))
 
-        conn.commit()
-        conn.close()
-
     def get_estatisticas(self) -> Dict[str, Any]:
         """Retorna estatísticas de alertas"""
 
@@ -3,7 +3,8 @@ import numpy as np
 from typing import Dict, Any, List, Tuple
 from collections import defaultdict
 from datetime import datetime, timedelta
-import sqlite3
+
+from src.storage.database import banco
 
 
 class PriorizadorAlertas:
@@ -47,18 +48,12 @@ class PriorizadorAlertas:
 
     def _calcular_frequencia(self, tipo: str) -> float:
         """Calcula score baseado na frequência do alerta"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT COUNT(*)                                        as total,
-                              AVG(CAST(strftime('%s', timestamp) AS INTEGER)) as media_timestamp
-                       FROM alerts
-                       WHERE tipo = ? AND timestamp > datetime('now', '-24 hours')
-                       """, (tipo,))
-
-        row = cursor.fetchone()
-        conn.close()
+        row = banco.ler_um("""
+                           SELECT COUNT(*)                                        as total,
+                                  AVG(CAST(strftime('%s', timestamp) AS INTEGER)) as media_timestamp
+                           FROM alerts
+                           WHERE tipo = ? AND timestamp > datetime('now', '-24 hours')
+                           """, (tipo,))
 
         if row and row[0] > 0:
             total = row[0]
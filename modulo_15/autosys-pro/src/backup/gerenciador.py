@@ -2,7 +2,6 @@
 import shutil
 import hashlib
 import json
-import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
@@ -15,6 +14,7 @@ from concurrent.futures import ThreadPoolExecutor
 import psutil
 
 from src.config import config
+from src.storage.database import banco
 from src.utils.logger import logger
 from src.exceptions import BackupError
 
@@ -271,36 +271,7 @@ class GerenciadorBackup:
 
     async def _registrar_backup(self, backup_info: Dict[str, Any]):
         """Registra backup no banco de dados"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       CREATE TABLE IF NOT EXISTS backups
-                       (
-                           id
-                           TEXT
-                           PRIMARY
-                           KEY,
-                           timestamp
-                           DATETIME,
-                           path
-                           TEXT,
-                           tamanho_mb
-                           REAL,
-                           duracao
-                           REAL,
-                           tipo
-                           TEXT,
-                           targets
-                           TEXT,
-                           sucesso
-                           BOOLEAN,
-                           erro
-                           TEXT
-                       )
-                       """)
-
-        cursor.execute("""
+        await banco.executar("""
             INSERT OR REPLACE INTO backups 
             (id, timestamp, path, tamanho_mb, duracao, tipo, targets, sucesso, erro)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -316,23 +287,15 @@ class GerenciadorBackup:
             backup_info.get("erro")
         ))
 
-        conn.commit()
-        conn.close()
-
     async def _limpar_backups_antigos(self):
         """Remove backups mais antigos que o período de retenção"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
         cutoff = datetime.now() - timedelta(days=config.BACKUP_RETENTION_DAYS)
 
-        cursor.execute("""
-                       SELECT path
-                       FROM backups
-                       WHERE timestamp < ? AND sucesso = 1
-                       """, (cutoff.isoformat(),))
-
-        backups_antigos = cursor.fetchall()
+        backups_antigos = await banco.consultar("""
+                                                SELECT path
+                                                FROM backups
+                                                WHERE timestamp < ? AND sucesso = 1
+                                                """, (cutoff.isoformat(),))
 
         for backup in backups_antigos:
             path = Path(backup[0])
@@ -340,30 +303,21 @@ class GerenciadorBackup:
                 path.unlink()
                 logger.info(f"🗑️ Removido backup antigo: {path.name}")
 
-        cursor.execute("""
-                       DELETE
-                       FROM backups
-                       WHERE timestamp < ?
-                       """, (cutoff.isoformat(),))
-
-        conn.commit()
-        conn.close()
+        await banco.executar("""
+                             DELETE
+                             FROM backups
+                             WHERE timestamp < ?
+                             """, (cutoff.isoformat(),))
 
     async def _get_ultimo_backup_sucesso(self) -> Optional[Dict[str, Any]]:
         """Retorna informações do último backup bem-sucedido"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT id, timestamp, path, tipo
-                       FROM backups
-                       WHERE sucesso = 1
-                       ORDER BY timestamp DESC
-                           LIMIT 1
-                       """)
-
-        row = cursor.fetchone()
-        conn.close()
+        row = await banco.consultar_um("""
+                                       SELECT id, timestamp, path, tipo
+                                       FROM backups
+                                       WHERE sucesso = 1
+                                       ORDER BY timestamp DESC
+                                       LIMIT 1
+                                       """)
 
         if row:
             return {
@@ -377,19 +331,13 @@ class GerenciadorBackup:
 
     async def _get_ultimo_backup_completo(self) -> Optional[Dict[str, Any]]:
         """Retorna informações do último backup completo"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT id, timestamp, path, tipo
-                       FROM backups
-                       WHERE sucesso = 1 AND tipo = 'completo'
-                       ORDER BY timestamp DESC
-                           LIMIT 1
-                       """)
-
-        row = cursor.fetchone()
-        conn.close()
+        row = await banco.consultar_um("""
+                                       SELECT id, timestamp, path, tipo
+                                       FROM backups
+                                       WHERE sucesso = 1 AND tipo = 'completo'
+                                       ORDER BY timestamp DESC
+                                       LIMIT 1
+                                       """)
 
         if row:
             return {
@@ -404,18 +352,12 @@ class GerenciadorBackup:
     async def restaurar_backup(self, backup_id: str, destino: str) -> Dict[str, Any]:
         """Restaura um backup específico"""
 
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT path, tipo
-                       FROM backups
-                       WHERE id = ?
-                         AND sucesso = 1
-                       """, (backup_id,))
-
-        row = cursor.fetchone()
-        conn.close()
+        row = await banco.consultar_um("""
+                                       SELECT path, tipo
+                                       FROM backups
+                                       WHERE id = ?
+                                         AND sucesso = 1
+                                       """, (backup_id,))
 
         if not row:
             raise BackupError(f"Backup {backup_id} não encontrado")
@@ -5,14 +5,105 @@ from sklearn.cluster import KMeans
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import joblib
-import sqlite3
 import json
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, Any, List, Tuple
 from collections import defaultdict
+import asyncio
 
 from src.config import config
+from src.storage.database import BancoDados, banco
 from src.utils.logger import logger
+from src.utils.treinamento import ProgressoTreino, publicar, treinos
+
+
+ARQUIVO_MODELO = "otimizador_backup.pkl"
+ARQUIVO_CLUSTER = "cluster_backup.pkl"
+ARQUIVO_SCALER = "scaler_backup.pkl"
+
+# Árvores do RandomForest adicionadas por vez (warm_start): progresso e cancelamento
+LOTE_ARVORES = 10
+
+
+def carregar_historico_backups(conn) -> pd.DataFrame:
+    """Carrega histórico de backups do banco"""
+    query = """
+            SELECT
+                timestamp, tamanho_mb, duracao, tipo, sucesso
+            FROM backups
+            WHERE sucesso = 1
+            ORDER BY timestamp \
+            """
+
+    df = pd.read_sql_query(query, conn)
+
+    if len(df) > 0:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['hora'] = df['timestamp'].dt.hour
+        df['dia_semana'] = df['timestamp'].dt.dayofweek
+        df['dias_desde_ultimo'] = df['timestamp'].diff().dt.total_seconds() / 86400
+        df['dias_desde_ultimo'] = df['dias_desde_ultimo'].fillna(1)
+
+        # Codifica tipo de backup
+        tipo_map = {'completo': 0, 'incremental': 1, 'diferencial': 2}
+        df['tipo_encoded'] = df['tipo'].map(tipo_map).fillna(1)
+
+    return df
+
+
+def treinar_modelos(progresso: ProgressoTreino, caminho_db: str, diretorio: str) -> Dict[str, Any]:
+    """Treina e publica os modelos de backup (roda no processo de treino)"""
+    progresso(0.0, "carregando histórico")
+    banco_treino = BancoDados(Path(caminho_db), leitores=1)
+    try:
+        with banco_treino.leitor() as conn:
+            df = carregar_historico_backups(conn)
+    finally:
+        banco_treino.fechar()
+
+    if len(df) < 100:
+        return {"status": "insufficient_data", "records": len(df)}
+
+    # 1. Modelo de predição de tamanho
+    progresso(0.1, "treinando predição de tamanho")
+    X_size = df[['hora', 'dia_semana', 'dias_desde_ultimo', 'tipo_encoded']]
+    y_size = df['tamanho_mb']
+
+    scaler = StandardScaler()
+    X_size_scaled = scaler.fit_transform(X_size)
+
+    # warm_start com a mesma random_state dá a mesma floresta do fit único
+    total_arvores = 100
+    modelo_predicao = RandomForestRegressor(
+        n_estimators=LOTE_ARVORES,
+        max_depth=10,
+        random_state=42,
+        warm_start=True
+    )
+    for arvores in range(LOTE_ARVORES, total_arvores + 1, LOTE_ARVORES):
+        modelo_predicao.set_params(n_estimators=arvores)
+        modelo_predicao.fit(X_size_scaled, y_size)
+        progresso(0.1 + 0.7 * arvores / total_arvores)
+    modelo_predicao.set_params(warm_start=False)
+
+    # 2. Modelo de clusterização de padrões
+    progresso(0.8, "clusterizando padrões")
+    X_cluster = df[['hora', 'dia_semana', 'tamanho_mb', 'duracao']]
+    X_cluster_scaled = StandardScaler().fit_transform(X_cluster)
+
+    modelo_cluster = KMeans(n_clusters=3, random_state=42)
+    modelo_cluster.fit(X_cluster_scaled)
+
+    # Salva modelos
+    progresso(0.95, "publicando")
+    diretorio = Path(diretorio)
+    publicar(diretorio / ARQUIVO_MODELO, lambda f: joblib.dump(modelo_predicao, f))
+    publicar(diretorio / ARQUIVO_CLUSTER, lambda f: joblib.dump(modelo_cluster, f))
+    publicar(diretorio / ARQUIVO_SCALER, lambda f: joblib.dump(scaler, f))
+
+    progresso(1.0, "concluído")
+    return {"status": "success"}
 
 
 class OtimizadorBackup:
@@ -21,98 +112,58 @@ class OtimizadorBackup:
     def __init__(self):
         self.modelo_predicao = None
         self.modelo_cluster = None
-        self.scaler = StandardScaler()
-        self.modelo_path = config.MODELS_DIR / "otimizador_backup.pkl"
-        self.cluster_path = config.MODELS_DIR / "cluster_backup.pkl"
+        self.scaler = None
+        self.modelo_path = config.MODELS_DIR / ARQUIVO_MODELO
+        self.cluster_path = config.MODELS_DIR / ARQUIVO_CLUSTER
+        self.scaler_path = config.MODELS_DIR / ARQUIVO_SCALER
         self.is_trained = False
 
         self._load_models()
 
+    def _ler_modelos(self) -> Tuple[Any, Any, Any]:
+        return (joblib.load(self.modelo_path), joblib.load(self.cluster_path),
+                joblib.load(self.scaler_path))
+
+    def _usar_modelos(self, modelos: Tuple[Any, Any, Any]):
+        """Troca os três modelos de uma vez (sem await entre as atribuições)"""
+        self.modelo_predicao, self.modelo_cluster, self.scaler = modelos
+        self.is_trained = True
+
     def _load_models(self):
         """Carrega modelos existentes"""
         try:
             if self.modelo_path.exists():
-                self.modelo_predicao = joblib.load(self.modelo_path)
-                self.modelo_cluster = joblib.load(self.cluster_path)
-                self.scaler = joblib.load(config.MODELS_DIR / "scaler_backup.pkl")
-                self.is_trained = True
+                self._usar_modelos(self._ler_modelos())
                 logger.info("✅ Modelos de otimização de backup carregados")
         except Exception as e:
             logger.warning(f"⚠️ Não foi possível carregar modelos de backup: {e}")
 
     async def treinar(self):
-        """Treina modelos de otimização de backup"""
+        """Treina modelos de otimização de backup em processo separado
+
+        Os modelos novos substituem os atuais quando o job termina.
+        """
         logger.info("🧠 Treinando otimizador de backup...")
 
-        # Carrega histórico de backups
-        df = self._carregar_historico_backups()
+        resultado = await treinos.executar(
+            "otimizador_backup", treinar_modelos, str(config.DB_PATH), str(self.modelo_path.parent)
+        )
 
-        if len(df) < 100:
-            logger.warning(f"Dados insuficientes: {len(df)} backups")
+        if resultado.get("status") == "insufficient_data":
+            logger.warning(f"Dados insuficientes: {resultado['records']} backups")
             return {"status": "insufficient_data"}
+        if resultado.get("status") != "success":
+            return resultado
 
         try:
-            # 1. Modelo de predição de tamanho
-            X_size = df[['hora', 'dia_semana', 'dias_desde_ultimo', 'tipo_encoded']]
-            y_size = df['tamanho_mb']
-
-            X_size_scaled = self.scaler.fit_transform(X_size)
-
-            self.modelo_predicao = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
-            )
-            self.modelo_predicao.fit(X_size_scaled, y_size)
-
-            # 2. Modelo de clusterização de padrões
-            X_cluster = df[['hora', 'dia_semana', 'tamanho_mb', 'duracao']]
-            X_cluster_scaled = StandardScaler().fit_transform(X_cluster)
-
-            self.modelo_cluster = KMeans(n_clusters=3, random_state=42)
-            self.modelo_cluster.fit(X_cluster_scaled)
-
-            # Salva modelos
-            joblib.dump(self.modelo_predicao, self.modelo_path)
-            joblib.dump(self.modelo_cluster, self.cluster_path)
-            joblib.dump(self.scaler, config.MODELS_DIR / "scaler_backup.pkl")
-
-            self.is_trained = True
-            logger.info("✅ Modelos de otimização treinados")
-
-            return {"status": "success"}
-
+            loop = asyncio.get_running_loop()
+            self._usar_modelos(await loop.run_in_executor(None, self._ler_modelos))
         except Exception as e:
-            logger.error(f"❌ Erro no treinamento: {e}")
+            logger.error(f"❌ Modelos treinados, mas não carregados: {e}")
             return {"status": "error", "error": str(e)}
 
-    def _carregar_historico_backups(self) -> pd.DataFrame:
-        """Carrega histórico de backups do banco"""
-        conn = sqlite3.connect(config.DB_PATH)
-
-        query = """
-                SELECT
-                    timestamp, tamanho_mb, duracao, tipo, sucesso
-                FROM backups
-                WHERE sucesso = 1
-                ORDER BY timestamp \
-                """
-
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-
-        if len(df) > 0:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['hora'] = df['timestamp'].dt.hour
-            df['dia_semana'] = df['timestamp'].dt.dayofweek
-            df['dias_desde_ultimo'] = df['timestamp'].diff().dt.total_seconds() / 86400
-            df['dias_desde_ultimo'] = df['dias_desde_ultimo'].fillna(1)
-
-            # Codifica tipo de backup
-            tipo_map = {'completo': 0, 'incremental': 1, 'diferencial': 2}
-            df['tipo_encoded'] = df['tipo'].map(tipo_map).fillna(1)
-
-        return df
+        logger.info("✅ Modelos de otimização treinados")
+        return resultado
 
     async def sugerir_estrategia(self) -> Dict[str, Any]:
         """Sugere melhor estratégia de backup baseada em histórico"""
@@ -121,19 +172,13 @@ class OtimizadorBackup:
         dia_semana = datetime.now().weekday()
 
         # Pega último backup
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT tipo, timestamp
-                       FROM backups
-                       WHERE sucesso = 1
-                       ORDER BY timestamp DESC
-                           LIMIT 1
-                       """)
-
-        ultimo = cursor.fetchone()
-        conn.close()
+        ultimo = await banco.consultar_um("""
+                                          SELECT tipo, timestamp
+                                          FROM backups
+                                          WHERE sucesso = 1
+                                          ORDER BY timestamp DESC
+                                          LIMIT 1
+                                          """)
 
         dias_desde_ultimo = 1
         if ultimo:
@@ -211,20 +256,14 @@ class OtimizadorBackup:
     async def _sugerir_horario_ideal(self) -> str:
         """Sugere melhor horário para backup baseado em histórico"""
 
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT strftime('%H', timestamp) as hora,
-                              AVG(duracao)              as duracao_media
-                       FROM backups
-                       WHERE sucesso = 1
-                       GROUP BY hora
-                       ORDER BY duracao_media ASC LIMIT 1
-                       """)
-
-        row = cursor.fetchone()
-        conn.close()
+        row = await banco.consultar_um("""
+                                       SELECT strftime('%H', timestamp) as hora,
+                                              AVG(duracao)              as duracao_media
+                                       FROM backups
+                                       WHERE sucesso = 1
+                                       GROUP BY hora
+                                       ORDER BY duracao_media ASC LIMIT 1
+                                       """)
 
         if row:
             hora_ideal = int(row[0])
@@ -235,21 +274,15 @@ class OtimizadorBackup:
     async def otimizar_frequencia(self) -> Dict[str, Any]:
         """Otimiza frequência de backups baseado em padrões"""
 
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
         # Analisa frequência de mudanças
-        cursor.execute("""
-                       SELECT COUNT(*)        as total_backups,
-                              AVG(tamanho_mb) as tamanho_medio,
-                              MIN(timestamp)  as primeiro,
-                              MAX(timestamp)  as ultimo
-                       FROM backups
-                       WHERE sucesso = 1
-                       """)
-
-        stats = cursor.fetchone()
-        conn.close()
+        stats = await banco.consultar_um("""
+                                         SELECT COUNT(*)        as total_backups,
+                                                AVG(tamanho_mb) as tamanho_medio,
+                                                MIN(timestamp)  as primeiro,
+                                                MAX(timestamp)  as ultimo
+                                         FROM backups
+                                         WHERE sucesso = 1
+                                         """)
 
         if not stats[0] or stats[0] < 2:
             return {
@@ -294,45 +327,15 @@ class OtimizadorBackup:
     async def aprender_com_feedback(self, backup_id: str, feedback: Dict[str, Any]):
         """Aprende com feedback do usuário sobre o backup"""
 
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       CREATE TABLE IF NOT EXISTS backup_feedback
-                       (
-                           backup_id
-                           TEXT,
-                           timestamp
-                           DATETIME
-                           DEFAULT
-                           CURRENT_TIMESTAMP,
-                           utilidade
-                           INTEGER,
-                           performance
-                           INTEGER,
-                           comentario
-                           TEXT,
-                           PRIMARY
-                           KEY
-                       (
-                           backup_id,
-                           timestamp
-                       )
-                           )
-                       """)
-
-        cursor.execute("""
-                       INSERT INTO backup_feedback (backup_id, utilidade, performance, comentario)
-                       VALUES (?, ?, ?, ?)
-                       """, (
-                           backup_id,
-                           feedback.get("utilidade", 3),
-                           feedback.get("performance", 3),
-                           feedback.get("comentario", "")
-                       ))
-
-        conn.commit()
-        conn.close()
+        await banco.executar("""
+                             INSERT INTO backup_feedback (backup_id, utilidade, performance, comentario)
+                             VALUES (?, ?, ?, ?)
+                             """, (
+                                 backup_id,
+                                 feedback.get("utilidade", 3),
+                                 feedback.get("performance", 3),
+                                 feedback.get("comentario", "")
+                             ))
 
         logger.info(f"📝 Feedback registrado para backup {backup_id}")
 
@@ -3,8 +3,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import yaml
-from typing import Dict, Any
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List
+from dataclasses import dataclass, asdict, field
 
 load_dotenv()
 
@@ -22,12 +22,74 @@ class Config:
     DB_PATH: Path = DATA_DIR / "database" / "autosys.db"
     LOGS_DIR: Path = BASE_DIR / "logs"
 
+    # SQLite (WAL: um escritor persistente + pool de conexões de leitura)
+    DB_READ_POOL_SIZE: int = 4
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    # Fila de escrita (write-behind): linhas agrupadas em uma transação por lote
+    DB_WRITE_QUEUE_SIZE: int = 10000  # cheia, quem enfileira espera (backpressure)
+    DB_WRITE_BATCH_SIZE: int = 500
+    DB_WRITE_FLUSH_INTERVAL: float = 1.0  # segundos até gravar um lote incompleto
+    # Retenção: linhas brutas em partições diárias (DROP TABLE ao expirar) e agregados
+    METRICS_RETENTION_DAYS: int = 35  # o preditor lê os últimos 30 dias
+    ROLLUP_RETENTION_DAYS: Dict[str, int] = field(default_factory=lambda: {
+        '1m': 90, '1h': 730, '1d': 0  # 0 = sem expiração
+    })
+
+    # Raízes de /proc e /sys (no Docker, o host montado em /host/proc e /host/sys)
+    PROC_ROOT: str = os.getenv("HOST_PROC", "/proc")
+    SYS_ROOT: str = os.getenv("HOST_SYS", "/sys")
+
     # Monitoramento
     MONITOR_INTERVAL: int = 60  # segundos
     CPU_ALERT_THRESHOLD: float = 80.0  # porcentagem
     MEMORY_ALERT_THRESHOLD: float = 85.0
     DISK_ALERT_THRESHOLD: float = 90.0
 
+    # Amostragem adaptativa
+    ADAPTIVE_SAMPLING: bool = True
+    MONITOR_INTERVAL_FAST: int = 5  # perto de algum threshold
+    MONITOR_INTERVAL_SLOW: int = 300  # host ocioso
+    ADAPTIVE_MARGIN: float = 10.0  # pontos percentuais abaixo do threshold
+    ADAPTIVE_IDLE_CPU: float = 20.0
+    ADAPTIVE_IDLE_CYCLES: int = 3  # ciclos ociosos antes de desacelerar
+
+    # Coletores habilitados (nativos ou plugins do grupo "autosys.coletores");
+    # só os listados são importados
+    COLLECTORS: List[str] = field(default_factory=lambda: [
+        'cpu', 'memory', 'disk', 'network', 'processes',
+        'services', 'temperature', 'cgroups', 'probes'
+    ])
+    COLLECTOR_WORKERS: int = 8  # threads do motor de coleta
+    COLLECTOR_TIMEOUT: float = 5.0  # segundos por coletor
+    COLLECTOR_BACKEND: str = "psutil"  # psutil | procfs (Linux, /proc direto)
+    # Intervalo por coletor em segundos (sobrescreve o padrão de cada coletor)
+    COLLECTOR_INTERVALS: Dict[str, float] = field(default_factory=dict)
+    PROCESS_TOP_K: int = 5  # processos no top por CPU/memória/IO
+    CGROUP_RESCAN_INTERVAL: int = 60  # revarredura completa da árvore de cgroups
+    NETWORK_CONNECTIONS_DETAIL: bool = False  # psutil.net_connections com pid (lento)
+    NETWORK_INVENTORY_REFRESH: int = 300  # releitura de IPs sem netlink
+    SENSORS_RESCAN_INTERVAL: int = 600  # redescoberta completa dos sensores hwmon
+
+    # Serviços (units do systemd verificadas em lote)
+    SERVICES: List[str] = field(default_factory=lambda: [
+        'ssh', 'docker', 'nginx', 'postgresql', 'mysql', 'redis'
+    ])
+    SERVICES_TIMEOUT: float = 5.0
+    SERVICES_CACHE_TTL: float = 30.0
+
+    # Sondas ativas: [{"nome": ..., "tipo": "tcp|http|tls", "alvo": ..., "intervalo": 30}]
+    PROBES: List[Dict[str, Any]] = field(default_factory=list)
+    PROBES_CONCURRENCY: int = 200
+    PROBES_DNS_TTL: int = 300
+    PROBES_CERT_WARN_DAYS: int = 14
+
+    # Séries temporais (TSDB embarcada em DATA_DIR/tsdb)
+    TSDB_ENABLED: bool = True
+    TSDB_DIR: Path = DATA_DIR / "tsdb"
+    TSDB_CHUNK_POINTS: int = 120  # pontos por chunk comprimido
+    TSDB_CHUNK_SECONDS: int = 7200  # extensão máxima de um chunk
+    TSDB_RETENTION_DAYS: int = 90
+
     # Backup
     BACKUP_INTERVAL: int = 3600  # 1 hora
     BACKUP_RETENTION_DAYS: int = 30
@@ -38,6 +100,23 @@ class Config:
     ENABLE_ML: bool = True
     RETRAIN_INTERVAL: int = 86400  # 24 horas
     PREDICTION_THRESHOLD: float = 0.7
+    # Rótulo de treino: CPU acima do limiar por FAILURE_MIN_DURATION segundos
+    # (somados) dentro das próximas FAILURE_HORIZON horas
+    FAILURE_CPU_THRESHOLD: float = 95.0
+    FAILURE_MIN_DURATION: int = 300
+    FAILURE_HORIZON: int = 24
+    # Treino em processo separado (ProcessPoolExecutor, um processo novo por job)
+    ML_TRAIN_MAX_MEMORY_MB: int = 2048  # RLIMIT_AS do processo de treino (0 = sem limite)
+    ML_TRAIN_TIMEOUT: int = 3600  # segundos; depois disso o job é cancelado
+    ML_TRAIN_CANCEL_GRACE: float = 30.0  # espera após cancelar antes de matar o processo
+    ML_TRAIN_NICE: int = 10  # prioridade menor que a do monitoramento
+
+    # Auto-instrumentação: alocações por componente via tracemalloc (opt-in).
+    # Com ele ligado, toda alocação do processo passa pelo hook do tracemalloc
+    # (CPU a mais no processo inteiro, não só nos componentes medidos) e cada
+    # bloco vivo guarda seu traceback (memória a mais proporcional aos blocos)
+    SELF_TRACE_ALLOCATIONS: bool = False
+    SELF_TRACE_FRAMES: int = 1  # frames por traceback; mais frames, mais memória
 
     # Alertas
     ALERT_COOLDOWN: int = 300  # 5 minutos
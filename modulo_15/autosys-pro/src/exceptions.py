@@ -15,6 +15,10 @@ class PredictionError(AutoSysError):
     """Erros relacionados à predição ML"""
     pass
 
+class TrainingCancelledError(PredictionError):
+    """Treinamento cancelado (pedido, tempo máximo ou shutdown)"""
+    pass
+
 class AlertError(AutoSysError):
     """Erros relacionados a alertas"""
     pass
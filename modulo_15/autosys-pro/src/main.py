@@ -2,19 +2,24 @@
 import asyncio
 import signal
 import sys
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 from pathlib import Path
 
 from src.config import config
 from src.monitor.sistema import SistemaMonitor
-from src.monitor.preditor import PreditorFalhas
+from src.monitor.snapshot import MetricSnapshot, CAMPOS_NUCLEO, COLUNAS_LINHA
+from src.storage.database import banco
+from src.storage.fila import fila_escrita
+from src.storage.particoes import particoes
+from src.utils.treinamento import treinos
 from src.backup.gerenciador import GerenciadorBackup
-from src.backup.inteligencia import OtimizadorBackup
 from src.alertas.canais import GerenciadorAlertas
 from src.web.app import criar_app
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics as metricas_proprias
 
 logger = setup_logger("autosys")
 
@@ -26,12 +31,14 @@ class AutoSysOrchestrator:
         self.config = config
         self.running = False
         self.tasks: List[asyncio.Task] = []
+        self._encerramento: Optional[asyncio.Task] = None
+
+        # Esquema e migrações do SQLite antes de qualquer componente usá-lo
+        banco.abrir()
 
         # Inicializa componentes
         self.sistema_monitor = SistemaMonitor()
-        self.preditor_falhas = PreditorFalhas()
         self.gerenciador_backup = GerenciadorBackup()
-        self.otimizador_backup = OtimizadorBackup()
         self.gerenciador_alertas = GerenciadorAlertas()
 
         # Web app
@@ -49,6 +56,37 @@ class AutoSysOrchestrator:
             "current_disk": 0
         }
 
+        # Estado da amostragem adaptativa
+        self._intervalo_atual = self.config.MONITOR_INTERVAL
+        self._ciclos_ociosos = 0
+
+        # Séries temporais: núcleo do snapshot + séries rotuladas (cgroups, interfaces)
+        self.tsdb = None
+        self._ultima_retencao = 0.0
+        if self.config.TSDB_ENABLED:
+            from src.storage.tsdb import ArmazemSeries
+            self.tsdb = ArmazemSeries()
+
+        # Componentes de ML (scikit-learn/pandas) criados no primeiro uso
+        self._preditor_falhas = None
+        self._otimizador_backup = None
+
+    @property
+    def preditor_falhas(self):
+        """Preditor de falhas, importado só quando usado"""
+        if self._preditor_falhas is None:
+            from src.monitor.preditor import PreditorFalhas
+            self._preditor_falhas = PreditorFalhas()
+        return self._preditor_falhas
+
+    @property
+    def otimizador_backup(self):
+        """Otimizador de backup, importado só quando usado"""
+        if self._otimizador_backup is None:
+            from src.backup.inteligencia import OtimizadorBackup
+            self._otimizador_backup = OtimizadorBackup()
+        return self._otimizador_backup
+
     async def start(self):
         """Inicia todos os serviços"""
         try:
@@ -57,9 +95,14 @@ class AutoSysOrchestrator:
             self.metrics["start_time"] = datetime.now()
             self.metrics["status"] = "running"
 
-            # Registra handlers de graceful shutdown
-            signal.signal(signal.SIGINT, self.shutdown)
-            signal.signal(signal.SIGTERM, self.shutdown)
+            # Registra handlers de graceful shutdown (no event loop, para
+            # que o fechamento possa aguardar coletores async)
+            loop = asyncio.get_running_loop()
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sinal, self._pedir_shutdown)
+
+            # Métricas e alertas gravados em lote pela fila de escrita
+            fila_escrita.iniciar()
 
             # Inicia tarefas assíncronas
             self.tasks = [
@@ -75,7 +118,13 @@ class AutoSysOrchestrator:
             logger.info(f"🧠 ML ativo: {self.config.ENABLE_ML}")
 
             # Aguarda todas as tarefas
-            await asyncio.gather(*self.tasks)
+            try:
+                await asyncio.gather(*self.tasks)
+            except asyncio.CancelledError:
+                # Canceladas pelo shutdown: ele termina de fechar e encerra o processo
+                if self._encerramento is None:
+                    raise
+                await self._encerramento
 
         except Exception as e:
             logger.error(f"❌ Erro fatal: {e}", exc_info=True)
@@ -87,48 +136,138 @@ class AutoSysOrchestrator:
         """Loop principal de monitoramento"""
         while self.running:
             try:
-                # Coleta métricas
-                metrics = await self.sistema_monometer.coletar_tudo()
-
-                # Atualiza métricas em tempo real
-                self.metrics.update({
-                    "current_cpu": metrics.get("cpu", {}).get("percent", 0),
-                    "current_memory": metrics.get("memory", {}).get("percent", 0),
-                    "current_disk": metrics.get("disk", {}).get("percent", 0),
-                    "last_check": datetime.now().isoformat()
-                })
-
-                # Verifica thresholds
-                alertas = await self.sistema_monitor.verificar_alertas(metrics)
-
-                # Predição de falhas
-                if self.config.ENABLE_ML:
-                    predicao = await self.preditor_falhas.prever_falha(metrics)
-                    if predicao["probabilidade"] > self.config.PREDICTION_THRESHOLD:
-                        alerta = {
-                            "tipo": "predicao_falha",
-                            "severidade": "alta",
-                            "mensagem": f"⚠️ Probabilidade de falha: {predicao['probabilidade']:.1%}",
-                            "detalhes": predicao,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        alertas.append(alerta)
-
-                # Dispara alertas
-                for alerta in alertas:
-                    await self.gerenciador_alertas.enviar(alerta)
-                    self.metrics["total_alerts"] += 1
-
-                # Salva métricas
-                await self._salvar_metricas(metrics)
-
-                await asyncio.sleep(self.config.MONITOR_INTERVAL)
+                intervalo = await self._ciclo_monitoramento()
+                await asyncio.sleep(intervalo)
 
             except Exception as e:
                 logger.error(f"Erro no monitoramento: {e}")
                 self.metrics["failures"] += 1
                 await asyncio.sleep(5)
 
+    @metricas_proprias.instrument_self("ciclo")
+    async def _ciclo_monitoramento(self) -> float:
+        """Executa um ciclo de monitoramento e retorna o próximo intervalo"""
+        # Coleta direto no snapshot compacto: predição, intervalo e gravação
+        # usam o núcleo numérico; alertas e séries, os resultados dos coletores
+        snapshot, resultados = await self.sistema_monitor.coletar_snapshot()
+
+        # Atualiza métricas em tempo real
+        self.metrics.update({
+            "current_cpu": snapshot.get("cpu_percent"),
+            "current_memory": snapshot.get("memory_percent"),
+            "current_disk": snapshot.get("disk_percent"),
+            "last_check": datetime.now().isoformat()
+        })
+
+        # Verifica thresholds
+        alertas = await self.sistema_monitor.verificar_alertas(resultados)
+
+        # Predição de falhas
+        predicao = None
+        if self.config.ENABLE_ML:
+            predicao = await self.preditor_falhas.prever_falha(snapshot)
+            if predicao["probabilidade"] > self.config.PREDICTION_THRESHOLD:
+                alerta = {
+                    "tipo": "predicao_falha",
+                    "severidade": "alta",
+                    "mensagem": f"⚠️ Probabilidade de falha: {predicao['probabilidade']:.1%}",
+                    "detalhes": predicao,
+                    "timestamp": datetime.now().isoformat()
+                }
+                alertas.append(alerta)
+
+        # Dispara alertas
+        for alerta in alertas:
+            await self.gerenciador_alertas.enviar(alerta)
+            self.metrics["total_alerts"] += 1
+
+        # Taxa de amostragem adaptativa; o intervalo fica gravado com a
+        # amostra para que agregações possam ponderar por ele
+        intervalo = self._calcular_intervalo(snapshot, predicao)
+        snapshot["sample_interval"] = intervalo
+
+        # Salva métricas
+        await self._salvar_metricas(snapshot)
+        if self.tsdb:
+            await self._gravar_series(snapshot, resultados)
+
+        return intervalo
+
+    @metricas_proprias.instrument_self("gravar_series")
+    async def _gravar_series(self, snapshot: MetricSnapshot, resultados: Dict[str, Any]):
+        """Grava o ciclo na TSDB (compressão fora do event loop)"""
+        host = {"host": snapshot.hostname}
+        pontos = [
+            (campo, host, valor) for campo, valor in zip(CAMPOS_NUCLEO, snapshot.nucleo)
+            if campo not in ("timestamp", "hour_of_day", "day_of_week")
+        ]
+
+        for serie in resultados.get("cgroups", {}).get("series", []):
+            labels = {**host, **serie["labels"]}
+            for campo in ("cpu_percent", "memory_current", "io_rbytes", "io_wbytes", "pids_current"):
+                pontos.append((f"cgroup_{campo}", labels, serie.get(campo)))
+
+        for interface, info in resultados.get("network", {}).items():
+            if isinstance(info, dict) and "bytes_recv_s" in info:
+                labels = {**host, "interface": interface}
+                for campo in ("bytes_sent_s", "bytes_recv_s", "packets_sent_s", "packets_recv_s",
+                              "errin_s", "errout_s", "dropin_s", "dropout_s"):
+                    pontos.append((f"net_{campo}", labels, info.get(campo)))
+
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.tsdb.inserir_lote, pontos, snapshot["timestamp"])
+
+            if time.time() - self._ultima_retencao > 86400:
+                self._ultima_retencao = time.time()
+                await loop.run_in_executor(None, self.tsdb.aplicar_retencao)
+        except Exception as e:
+            logger.error(f"Erro ao gravar séries: {e}")
+
+    def _calcular_intervalo(self, snapshot: MetricSnapshot,
+                            predicao: Optional[Dict[str, Any]]) -> float:
+        """Escolhe o próximo intervalo pela proximidade dos thresholds"""
+        if not self.config.ADAPTIVE_SAMPLING:
+            return self.config.MONITOR_INTERVAL
+
+        margem = self.config.ADAPTIVE_MARGIN
+        valores = [
+            (snapshot.get("cpu_percent"), self.config.CPU_ALERT_THRESHOLD),
+            (snapshot.get("memory_percent"), self.config.MEMORY_ALERT_THRESHOLD),
+            (snapshot.get("disk_percent"), self.config.DISK_ALERT_THRESHOLD)
+        ]
+        probabilidade = predicao["probabilidade"] if predicao else 0.0
+
+        proximo = (
+            any(valor >= threshold - margem for valor, threshold in valores)
+            or probabilidade >= self.config.PREDICTION_THRESHOLD / 2
+        )
+        ocioso = (
+            valores[0][0] < self.config.ADAPTIVE_IDLE_CPU
+            and all(valor < threshold - 2 * margem for valor, threshold in valores)
+            and probabilidade < self.config.PREDICTION_THRESHOLD / 4
+        )
+
+        # Acelera na hora; só desacelera após alguns ciclos ociosos seguidos
+        if proximo:
+            self._ciclos_ociosos = 0
+            intervalo = self.config.MONITOR_INTERVAL_FAST
+        elif ocioso:
+            self._ciclos_ociosos += 1
+            if self._ciclos_ociosos >= self.config.ADAPTIVE_IDLE_CYCLES:
+                intervalo = self.config.MONITOR_INTERVAL_SLOW
+            else:
+                intervalo = self.config.MONITOR_INTERVAL
+        else:
+            self._ciclos_ociosos = 0
+            intervalo = self.config.MONITOR_INTERVAL
+
+        if intervalo != self._intervalo_atual:
+            logger.info(f"⏱️ Intervalo de monitoramento: {self._intervalo_atual}s → {intervalo}s")
+            self._intervalo_atual = intervalo
+
+        return intervalo
+
     async def _backup_loop(self):
         """Loop principal de backup"""
         while self.running:
@@ -214,51 +353,17 @@ class AutoSysOrchestrator:
         except Exception as e:
             logger.error(f"❌ Erro no servidor web: {e}")
 
-    async def _salvar_metricas(self, metrics: Dict[str, Any]):
+    @metricas_proprias.instrument_self("salvar_metricas")
+    async def _salvar_metricas(self, snapshot: MetricSnapshot):
         """Salva métricas no banco de dados"""
         try:
-            import sqlite3
-            import json
-
-            conn = sqlite3.connect(self.config.DB_PATH)
-            cursor = conn.cursor()
-
-            # Cria tabela se não existir
-            cursor.execute("""
-                           CREATE TABLE IF NOT EXISTS metrics
-                           (
-                               id
-                               INTEGER
-                               PRIMARY
-                               KEY
-                               AUTOINCREMENT,
-                               timestamp
-                               DATETIME
-                               DEFAULT
-                               CURRENT_TIMESTAMP,
-                               cpu
-                               REAL,
-                               memory
-                               REAL,
-                               disk
-                               REAL,
-                               details
-                               TEXT
-                           )
-                           """)
-
-            cursor.execute("""
-                           INSERT INTO metrics (cpu, memory, disk, details)
-                           VALUES (?, ?, ?, ?)
-                           """, (
-                               metrics.get("cpu", {}).get("percent", 0),
-                               metrics.get("memory", {}).get("percent", 0),
-                               metrics.get("disk", {}).get("percent", 0),
-                               json.dumps(metrics)
-                           ))
-
-            conn.commit()
-            conn.close()
+            # details guarda o snapshot compacto (núcleo + seção variável);
+            # a linha vai para a partição diária do seu timestamp
+            linha = snapshot.to_row()
+            sql = await particoes.sql_insert(linha[0], COLUNAS_LINHA)
+            await fila_escrita.enfileirar(sql, linha)
+
+            await particoes.aplicar_retencao()
 
         except Exception as e:
             logger.error(f"Erro ao salvar métricas: {e}")
@@ -266,22 +371,14 @@ class AutoSysOrchestrator:
     async def _deve_retreinar(self) -> bool:
         """Verifica se modelos precisam ser retreinados"""
         try:
-            import sqlite3
-            import json
-            from datetime import datetime, timedelta
-
-            conn = sqlite3.connect(self.config.DB_PATH)
-            cursor = conn.cursor()
-
             # Verifica dados novos desde último treinamento
-            cursor.execute("""
-                           SELECT COUNT(*)
-                           FROM metrics
-                           WHERE timestamp > datetime('now', '-1 day')
-                           """)
+            row = await banco.consultar_um("""
+                                           SELECT COUNT(*)
+                                           FROM metrics
+                                           WHERE timestamp > datetime('now', '-1 day')
+                                           """)
 
-            novos_registros = cursor.fetchone()[0]
-            conn.close()
+            novos_registros = row[0]
 
             # Retreina se tem pelo menos 100 novos registros
             return novos_registros > 100
@@ -289,7 +386,12 @@ class AutoSysOrchestrator:
         except Exception:
             return False
 
-    def shutdown(self, signum=None, frame=None):
+    def _pedir_shutdown(self):
+        """Handler de SIGINT/SIGTERM: agenda um único shutdown no event loop"""
+        if self._encerramento is None:
+            self._encerramento = asyncio.create_task(self.shutdown())
+
+    async def shutdown(self):
         """Desliga o sistema gracefulmente"""
         logger.info("🛑 Desligando AutoSys Pro...")
         self.running = False
@@ -299,6 +401,13 @@ class AutoSysOrchestrator:
         for task in self.tasks:
             task.cancel()
 
+        await self.sistema_monitor.fechar()
+        if self.tsdb:
+            self.tsdb.fechar()
+        treinos.fechar()
+        fila_escrita.fechar()
+        banco.fechar()
+
         logger.info("✅ Sistema desligado")
         sys.exit(0)
 
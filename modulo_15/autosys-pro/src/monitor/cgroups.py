@@ -0,0 +1,181 @@
+# src/monitor/cgroups.py
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.config import config
+from src.monitor.coleta import ColetorBase, ContextoColeta
+from src.utils.logger import logger
+
+# IDs de container em nomes como docker-<id>.scope, cri-containerd-<id>.scope ou /docker/<id>
+REGEX_CONTAINER = re.compile(r"([0-9a-f]{64})")
+# Diretórios onde containers novos aparecem: relistados todo ciclo, porque o
+# kernfs só atualiza o mtime do pai se o nó já tinha atributos alterados
+REGEX_PAI_CONTAINERS = re.compile(
+    r"\.slice$|^(docker|kubepods|burstable|besteffort|libpod_parent|pod[0-9a-f_-]{36})$"
+)
+
+
+class ColetorCgroups(ColetorBase):
+    """Coleta cpu/memória/io/pids por cgroup v2, com varredura incremental"""
+
+    nome = "cgroups"
+    metricas = ("disponivel", "total", "series")
+    custo = "medio"
+    intervalo = 10
+
+    def __init__(self, contexto: Optional[ContextoColeta] = None,
+                 raiz: Optional[str] = None,
+                 intervalo_revarredura: Optional[float] = None):
+        super().__init__(contexto)
+        self.raiz = raiz or os.path.join(config.SYS_ROOT, "fs", "cgroup")
+        self.intervalo_revarredura = intervalo_revarredura or config.CGROUP_RESCAN_INTERVAL
+        self.disponivel = os.path.exists(os.path.join(self.raiz, "cgroup.controllers"))
+
+        # diretório -> (mtime, subdiretórios) da última listagem
+        self._arvore: Dict[str, Tuple[float, List[str]]] = {}
+        self._ultima_revarredura = 0.0
+        # cgroup -> (usage_usec, instante) da amostra anterior
+        self._cpu_anterior: Dict[str, Tuple[int, float]] = {}
+
+        if not self.disponivel:
+            logger.info(f"ℹ️ cgroup v2 não encontrado em {self.raiz}")
+
+    def coletar(self) -> Dict[str, Any]:
+        """Percorre a hierarquia uma vez e emite uma série rotulada por cgroup"""
+        if not self.disponivel:
+            return {"disponivel": False, "series": []}
+
+        agora = time.monotonic()
+        forcar = agora - self._ultima_revarredura >= self.intervalo_revarredura
+        if forcar:
+            self._ultima_revarredura = agora
+
+        series = []
+        vistos = set()
+
+        for caminho in self._percorrer(self.raiz, forcar):
+            relativo = "/" + os.path.relpath(caminho, self.raiz)
+            match = REGEX_CONTAINER.search(relativo)
+
+            # Só containers e os slices de primeiro nível (system, user...)
+            if not match and relativo.count("/") > 1:
+                continue
+
+            vistos.add(relativo)
+            serie = self._ler_cgroup(caminho, relativo, agora)
+            serie["labels"] = {
+                "cgroup": relativo,
+                "container_id": match.group(1)[:12] if match else None
+            }
+            series.append(serie)
+
+        # Esquece amostras de cgroups que sumiram
+        for relativo in set(self._cpu_anterior) - vistos:
+            del self._cpu_anterior[relativo]
+
+        return {"disponivel": True, "total": len(series), "series": series}
+
+    def _percorrer(self, caminho: str, forcar: bool):
+        """Gera os diretórios da árvore, relistando só os que mudaram
+
+        Não desce abaixo de um container: os sub-cgroups dele (init.scope,
+        cgroups aninhados) já estão contabilizados no próprio container.
+        Fora dos pais conhecidos (REGEX_PAI_CONTAINERS), um cgroup novo pode
+        levar até CGROUP_RESCAN_INTERVAL para aparecer.
+        """
+        pilha = [caminho]
+
+        while pilha:
+            atual = pilha.pop()
+            try:
+                mtime = os.stat(atual).st_mtime
+            except OSError:
+                self._arvore.pop(atual, None)
+                continue
+
+            nome = os.path.basename(atual)
+            cache = self._arvore.get(atual)
+            if (cache is None or forcar or cache[0] != mtime
+                    or atual == self.raiz or REGEX_PAI_CONTAINERS.search(nome)):
+                try:
+                    with os.scandir(atual) as entradas:
+                        filhos = [e.path for e in entradas if e.is_dir(follow_symlinks=False)]
+                except OSError:
+                    continue
+                self._arvore[atual] = (mtime, filhos)
+            else:
+                filhos = cache[1]
+
+            if atual != self.raiz:
+                yield atual
+            if not REGEX_CONTAINER.search(nome):
+                pilha.extend(filhos)
+
+    def _ler_cgroup(self, caminho: str, relativo: str, agora: float) -> Dict[str, Any]:
+        """Lê cpu.stat, memory.current, io.stat e pids.current de um cgroup"""
+        cpu = self._ler_chave_valor(os.path.join(caminho, "cpu.stat"))
+        usage = cpu.get("usage_usec", 0)
+
+        cpu_percent = 0.0
+        anterior = self._cpu_anterior.get(relativo)
+        if anterior and agora > anterior[1]:
+            # Pode passar de 100% em containers com vários núcleos
+            cpu_percent = (usage - anterior[0]) / ((agora - anterior[1]) * 1e6) * 100
+        self._cpu_anterior[relativo] = (usage, agora)
+
+        rbytes, wbytes = self._ler_io(os.path.join(caminho, "io.stat"))
+
+        return {
+            "cpu_percent": round(max(cpu_percent, 0.0), 2),
+            "cpu_usage_usec": usage,
+            "cpu_throttled_usec": cpu.get("throttled_usec", 0),
+            "memory_current": self._ler_inteiro(os.path.join(caminho, "memory.current")),
+            "io_rbytes": rbytes,
+            "io_wbytes": wbytes,
+            "pids_current": self._ler_inteiro(os.path.join(caminho, "pids.current"))
+        }
+
+    @staticmethod
+    def _ler_inteiro(caminho: str) -> int:
+        """Lê um arquivo com um único inteiro (0 se ausente ou 'max')"""
+        try:
+            with open(caminho, "rb") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def _ler_chave_valor(caminho: str) -> Dict[str, int]:
+        """Lê arquivos no formato 'chave valor' por linha"""
+        try:
+            with open(caminho, "rb") as f:
+                conteudo = f.read()
+        except OSError:
+            return {}
+
+        valores = {}
+        for linha in conteudo.split(b"\n"):
+            chave, _, valor = linha.partition(b" ")
+            if valor:
+                valores[chave.decode()] = int(valor)
+        return valores
+
+    @staticmethod
+    def _ler_io(caminho: str) -> Tuple[int, int]:
+        """Soma rbytes/wbytes de todos os dispositivos em io.stat"""
+        rbytes = wbytes = 0
+        try:
+            with open(caminho, "rb") as f:
+                conteudo = f.read()
+        except OSError:
+            return 0, 0
+
+        for campo in conteudo.split():
+            if campo.startswith(b"rbytes="):
+                rbytes += int(campo[7:])
+            elif campo.startswith(b"wbytes="):
+                wbytes += int(campo[7:])
+
+        return rbytes, wbytes
@@ -0,0 +1,195 @@
+# src/monitor/coleta.py
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from src.config import config
+from src.utils.logger import logger
+from src.utils.metrics import metrics
+
+
+@dataclass
+class Coletor:
+    """Definição de um coletor executado pelo motor de coleta"""
+
+    nome: str
+    func: Callable[[], Any]
+    timeout: Optional[float] = None
+    intervalo: float = 0.0  # segundos entre coletas (0 = todo ciclo)
+    custo: str = "baixo"  # baixo | medio | alto
+    metricas: Tuple[str, ...] = ()
+    ultimo_resultado: Any = field(default_factory=dict)
+    ultima_coleta: Optional[float] = None
+
+    def vencido(self, agora: float) -> bool:
+        """Indica se o coletor deve rodar neste ciclo"""
+        if self.ultima_coleta is None or self.intervalo <= 0:
+            return True
+        # Tolerância para o jitter do loop de monitoramento
+        return agora - self.ultima_coleta >= self.intervalo * 0.95
+
+
+@dataclass
+class ContextoColeta:
+    """Recursos compartilhados entre os coletores de um SistemaMonitor"""
+
+    procfs: Any = None  # LeitorProcFS quando COLLECTOR_BACKEND == "procfs"
+    processadores: int = field(default_factory=lambda: os.cpu_count() or 1)
+
+
+class ColetorBase:
+    """Base dos coletores plugáveis (ver src/monitor/registro.py)
+
+    Subclasses declaram o nome, as métricas que produzem e o custo, e
+    implementam coletar() (síncrono, roda no thread pool, ou async def);
+    fechar() também pode ser async def, e é aguardado no shutdown.
+    Dependências pesadas devem ser importadas no __init__ ou em coletar(),
+    para que só sejam carregadas quando o coletor estiver habilitado.
+    """
+
+    nome: str = ""
+    metricas: Tuple[str, ...] = ()
+    custo: str = "baixo"  # baixo | medio | alto
+    intervalo: float = 0.0  # segundos entre coletas (0 = todo ciclo)
+    timeout: Optional[float] = None
+
+    def __init__(self, contexto: ContextoColeta):
+        self.contexto = contexto
+
+    def coletar(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def fechar(self):
+        """Libera recursos do coletor"""
+
+
+def importar_psutil():
+    """Importa o psutil sob demanda, lendo o /proc configurado"""
+    import psutil
+
+    psutil.PROCFS_PATH = config.PROC_ROOT
+    return psutil
+
+
+class MotorColeta:
+    """Executa coletores concorrentemente fora do event loop"""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.timeout = timeout or config.COLLECTOR_TIMEOUT
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.COLLECTOR_WORKERS,
+            thread_name_prefix="autosys-coleta"
+        )
+        self.coletores: Dict[str, Coletor] = {}
+        # Execução de cada coletor no thread pool; o wait_for não interrompe
+        # a thread, então um coletor travado continua ocupando o worker
+        self._em_execucao: Dict[str, Future] = {}
+
+    def registrar(self, nome: str, func: Callable[[], Any],
+                  timeout: Optional[float] = None, intervalo: float = 0.0,
+                  custo: str = "baixo", metricas: Tuple[str, ...] = ()):
+        """Registra um coletor no motor"""
+        # Intervalos do config sobrescrevem o padrão declarado pelo coletor
+        intervalo = config.COLLECTOR_INTERVALS.get(nome, intervalo)
+        # Medido dentro do worker: a CPU registrada é a da thread do coletor
+        func = metrics.instrument_self(f"collector.{nome}")(func)
+        self.coletores[nome] = Coletor(
+            nome=nome, func=func, timeout=timeout,
+            intervalo=intervalo, custo=custo, metricas=tuple(metricas)
+        )
+
+    def registrar_coletor(self, coletor: ColetorBase):
+        """Registra uma instância de coletor plugável"""
+        self.registrar(
+            coletor.nome, coletor.coletar, timeout=coletor.timeout,
+            intervalo=coletor.intervalo, custo=coletor.custo,
+            metricas=coletor.metricas
+        )
+
+    async def executar(self) -> Dict[str, Any]:
+        """Executa os coletores vencidos e mescla com o último valor dos demais"""
+        agora = time.monotonic()
+        vencidos = [c for c in self.coletores.values() if c.vencido(agora)]
+
+        execucoes = await asyncio.gather(*[
+            self._executar_coletor(coletor) for coletor in vencidos
+        ])
+
+        latencias: Dict[str, float] = {}
+        erros: Dict[str, str] = {}
+
+        for coletor, (resultado, latencia, erro) in zip(vencidos, execucoes):
+            latencias[coletor.nome] = round(latencia * 1000, 2)
+            if erro:
+                erros[coletor.nome] = erro
+                # Mantém o último valor bom (ou nenhum) e a sua idade;
+                # sem ultima_coleta nova, tenta de novo no próximo ciclo
+                continue
+            coletor.ultimo_resultado = resultado
+            coletor.ultima_coleta = agora
+
+        agora = time.monotonic()
+        resultados: Dict[str, Any] = {}
+        idades: Dict[str, Optional[float]] = {}
+
+        for coletor in self.coletores.values():
+            resultados[coletor.nome] = coletor.ultimo_resultado
+            idades[coletor.nome] = (
+                round(agora - coletor.ultima_coleta, 3)
+                if coletor.ultima_coleta is not None else None
+            )
+
+        return {
+            "resultados": resultados,
+            "latencias_ms": latencias,
+            "erros": erros,
+            "idades_s": idades
+        }
+
+    def descrever(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna o agendamento declarado de cada coletor"""
+        return {
+            nome: {"intervalo": c.intervalo, "custo": c.custo,
+                   "metricas": list(c.metricas)}
+            for nome, c in self.coletores.items()
+        }
+
+    async def _executar_coletor(self, coletor: Coletor):
+        """Executa um coletor no thread pool respeitando seu timeout"""
+        loop = asyncio.get_running_loop()
+        timeout = coletor.timeout or self.timeout
+        inicio = time.perf_counter()
+
+        try:
+            if asyncio.iscoroutinefunction(coletor.func):
+                resultado = await asyncio.wait_for(coletor.func(), timeout)
+            else:
+                anterior = self._em_execucao.get(coletor.nome)
+                if anterior is not None and not anterior.done():
+                    # Não redespacha: cada ciclo tomaria mais um worker até
+                    # esgotar COLLECTOR_WORKERS e parar todos os coletores
+                    logger.warning(f"⏱️ Coletor '{coletor.nome}' ainda em execução, pulando ciclo")
+                    return {}, time.perf_counter() - inicio, "timeout"
+
+                futuro = self.executor.submit(coletor.func)
+                self._em_execucao[coletor.nome] = futuro
+                resultado = await asyncio.wait_for(
+                    asyncio.wrap_future(futuro, loop=loop), timeout
+                )
+            return resultado, time.perf_counter() - inicio, None
+
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Coletor '{coletor.nome}' excedeu {timeout}s")
+            return {}, time.perf_counter() - inicio, "timeout"
+
+        except Exception as e:
+            logger.error(f"Erro no coletor '{coletor.nome}': {e}")
+            return {}, time.perf_counter() - inicio, str(e)
+
+    def fechar(self):
+        """Encerra o thread pool"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
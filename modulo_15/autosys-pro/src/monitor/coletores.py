@@ -0,0 +1,296 @@
+# src/monitor/coletores.py
+from typing import Dict, Any
+
+from src.config import config
+from src.monitor.coleta import ColetorBase, ContextoColeta, importar_psutil
+from src.monitor.cpu import amostrador_cpu
+
+
+class ColetorCPU(ColetorBase):
+    """Coleta métricas detalhadas de CPU"""
+
+    nome = "cpu"
+    metricas = ("percent", "per_core", "iowait", "steal", "count",
+                "frequency_current", "frequency_max", "load_avg", "stats")
+    custo = "baixo"
+    intervalo = 0
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        # Com o backend procfs o psutil não é necessário para CPU
+        self.psutil = None if contexto.procfs else importar_psutil()
+        self.frequencia_max = 0
+        if self.psutil:
+            cpu_freq = self.psutil.cpu_freq()
+            self.frequencia_max = cpu_freq.max if cpu_freq else 0
+
+    def coletar(self) -> Dict[str, Any]:
+        procfs = self.contexto.procfs
+        processadores = self.contexto.processadores
+
+        if procfs:
+            dados = procfs.dados
+            amostra = amostrador_cpu.atualizar(dados["cpu"])
+            frequencia = dados["freq_mhz"]
+            load_avg = dados["loadavg"]["load"]
+            stats = dados["cpu_stats"]
+        else:
+            amostra = amostrador_cpu.amostrar()
+            cpu_freq = self.psutil.cpu_freq()
+            frequencia = cpu_freq.current if cpu_freq else 0
+            load_avg = self.psutil.getloadavg()
+            cpu_stats = self.psutil.cpu_stats()
+            stats = {
+                "ctx_switches": cpu_stats.ctx_switches,
+                "interrupts": cpu_stats.interrupts,
+                "soft_interrupts": cpu_stats.soft_interrupts
+            }
+
+        return {
+            "percent": amostra.get("percent", 0.0),
+            "per_core": amostra.get("per_core", []),
+            "iowait": amostra.get("iowait", 0.0),
+            "steal": amostra.get("steal", 0.0),
+            "count": processadores,
+            "frequency_current": frequencia,
+            "frequency_max": self.frequencia_max,
+            "load_avg": [x / processadores * 100 for x in load_avg],
+            "stats": {
+                "ctx_switches": stats.get("ctx_switches", 0),
+                "interrupts": stats.get("interrupts", 0),
+                "soft_interrupts": stats.get("soft_interrupts", 0)
+            }
+        }
+
+
+class ColetorMemoria(ColetorBase):
+    """Coleta métricas detalhadas de memória"""
+
+    nome = "memory"
+    metricas = ("total_gb", "available_gb", "used_gb", "free_gb", "percent", "swap")
+    custo = "baixo"
+    intervalo = 0
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        self.psutil = None if contexto.procfs else importar_psutil()
+
+    def coletar(self) -> Dict[str, Any]:
+        if self.contexto.procfs:
+            mem = self.contexto.procfs.memoria()
+        else:
+            vm = self.psutil.virtual_memory()
+            sm = self.psutil.swap_memory()
+            mem = {
+                "total": vm.total, "available": vm.available, "used": vm.used,
+                "free": vm.free, "percent": vm.percent,
+                "swap_total": sm.total, "swap_used": sm.used,
+                "swap_free": sm.free, "swap_percent": sm.percent
+            }
+
+        return {
+            "total_gb": mem["total"] / (1024 ** 3),
+            "available_gb": mem["available"] / (1024 ** 3),
+            "used_gb": mem["used"] / (1024 ** 3),
+            "free_gb": mem["free"] / (1024 ** 3),
+            "percent": mem["percent"],
+            "swap": {
+                "total_gb": mem["swap_total"] / (1024 ** 3),
+                "used_gb": mem["swap_used"] / (1024 ** 3),
+                "free_gb": mem["swap_free"] / (1024 ** 3),
+                "percent": mem["swap_percent"]
+            }
+        }
+
+
+class ColetorDisco(ColetorBase):
+    """Coleta métricas detalhadas de disco"""
+
+    nome = "disk"
+    metricas = ("usage", "io", "total_percent")
+    custo = "medio"
+    intervalo = 10
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        # Partições e statvfs sempre vêm do psutil
+        self.psutil = importar_psutil()
+
+    def coletar(self) -> Dict[str, Any]:
+        disk_usage = {}
+        disk_io = {}
+
+        for partition in self.psutil.disk_partitions():
+            try:
+                usage = self.psutil.disk_usage(partition.mountpoint)
+                disk_usage[partition.device] = {
+                    "mountpoint": partition.mountpoint,
+                    "fstype": partition.fstype,
+                    "total_gb": usage.total / (1024 ** 3),
+                    "used_gb": usage.used / (1024 ** 3),
+                    "free_gb": usage.free / (1024 ** 3),
+                    "percent": usage.percent
+                }
+            except:
+                continue
+
+        try:
+            if self.contexto.procfs:
+                io_counters = self.contexto.procfs.dados["diskstats"]
+            else:
+                counters = self.psutil.disk_io_counters()
+                io_counters = counters._asdict() if counters else None
+
+            if io_counters:
+                disk_io = {
+                    "read_count": io_counters["read_count"],
+                    "write_count": io_counters["write_count"],
+                    "read_bytes": io_counters["read_bytes"],
+                    "write_bytes": io_counters["write_bytes"],
+                    "read_bytes_gb": io_counters["read_bytes"] / (1024 ** 3),
+                    "write_bytes_gb": io_counters["write_bytes"] / (1024 ** 3),
+                    "read_time_ms": io_counters["read_time"],
+                    "write_time_ms": io_counters["write_time"]
+                }
+        except:
+            pass
+
+        return {
+            "usage": disk_usage,
+            "io": disk_io,
+            "total_percent": self.psutil.disk_usage('/').percent
+        }
+
+
+class ColetorRede(ColetorBase):
+    """Coleta métricas detalhadas de rede"""
+
+    nome = "network"
+    metricas = ("<interface>", "total", "connections_count",
+                "connections_established", "connections_listening", "sockets")
+    custo = "medio"
+    intervalo = 5
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        from src.monitor.rede import ContadorSockets, InventarioInterfaces, TaxasInterfaces
+
+        self.inventario = InventarioInterfaces()
+        self.taxas = TaxasInterfaces()
+        self.sockets = ContadorSockets(config.PROC_ROOT)
+        self.psutil = None if contexto.procfs else importar_psutil()
+
+    def coletar(self) -> Dict[str, Any]:
+        network_stats = {}
+
+        # Interfaces de rede (inventário em cache) e taxas por interface
+        self.taxas.esquecer(self.inventario.atualizar())
+
+        try:
+            if self.contexto.procfs:
+                por_interface = self.contexto.procfs.rede_por_interface()
+            else:
+                por_interface = {
+                    nome: contadores._asdict()
+                    for nome, contadores in self.psutil.net_io_counters(pernic=True).items()
+                }
+            taxas = self.taxas.calcular(por_interface, velocidades={
+                nome: info.get("speed_mbps") for nome, info in self.inventario.interfaces.items()
+            })
+        except:
+            taxas = {}
+
+        for interface, info in self.inventario.interfaces.items():
+            network_stats[interface] = {**info, **taxas.get(interface, {})}
+
+        # IO de rede
+        try:
+            if self.contexto.procfs:
+                net_io = self.contexto.procfs.rede_total()
+            else:
+                net_io = self.psutil.net_io_counters()._asdict()
+
+            network_stats["total"] = {
+                "bytes_sent": net_io["bytes_sent"],
+                "bytes_recv": net_io["bytes_recv"],
+                "bytes_sent_gb": net_io["bytes_sent"] / (1024 ** 3),
+                "bytes_recv_gb": net_io["bytes_recv"] / (1024 ** 3),
+                "packets_sent": net_io["packets_sent"],
+                "packets_recv": net_io["packets_recv"],
+                "errin": net_io["errin"],
+                "errout": net_io["errout"],
+                "dropin": net_io["dropin"],
+                "dropout": net_io["dropout"]
+            }
+
+            # Taxas agregadas (soma das interfaces, sem loopback)
+            for campo in next(iter(taxas.values()), {}):
+                network_stats["total"][campo] = round(sum(
+                    t[campo] for nome, t in taxas.items() if nome != "lo"
+                ), 2)
+        except:
+            pass
+
+        # Conexões ativas (contagem direta de /proc/net; pid só no modo detalhado)
+        try:
+            if config.NETWORK_CONNECTIONS_DETAIL or not self.sockets.disponivel():
+                from src.monitor.rede import contar_conexoes_detalhadas
+                sockets = contar_conexoes_detalhadas()
+            else:
+                sockets = self.sockets.contar()
+
+            network_stats["connections_count"] = sockets["total"]
+            network_stats["connections_established"] = sockets["por_estado"].get("ESTABLISHED", 0)
+            network_stats["connections_listening"] = sockets["por_estado"].get("LISTEN", 0)
+            network_stats["sockets"] = sockets
+        except:
+            pass
+
+        return network_stats
+
+    def fechar(self):
+        self.inventario.fechar()
+
+
+class ColetorTemperatura(ColetorBase):
+    """Coleta temperatura do sistema"""
+
+    nome = "temperature"
+    metricas = ("<sensor>",)
+    custo = "medio"
+    intervalo = 30
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        from src.monitor.sensores import CacheSensores
+
+        # No Linux lê o hwmon direto; psutil só fora dele
+        self.sensores = CacheSensores()
+        self.psutil = None if self.sensores.disponivel() else importar_psutil()
+
+    def coletar(self) -> Dict[str, Any]:
+        if self.psutil is None:
+            return self.sensores.ler()
+
+        temps = {}
+
+        try:
+            if hasattr(self.psutil, "sensors_temperatures"):
+                sensors = self.psutil.sensors_temperatures()
+                for name, entries in sensors.items():
+                    temps[name] = [
+                        {
+                            "label": entry.label or name,
+                            "current": entry.current,
+                            "high": entry.high,
+                            "critical": entry.critical
+                        }
+                        for entry in entries
+                    ]
+        except:
+            pass
+
+        return temps
+
+    def fechar(self):
+        self.sensores.fechar()
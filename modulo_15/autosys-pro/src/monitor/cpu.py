@@ -0,0 +1,152 @@
+# src/monitor/cpu.py
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from src.config import config
+
+# Ordem dos campos em /proc/stat (guest já está contido em user)
+CAMPOS_CPU = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+
+class AmostradorCPU:
+    """Amostrador de CPU por deltas de /proc/stat, sem dormir
+
+    Cada consumidor (ciclo de coleta, gauge do Prometheus...) guarda seus
+    próprios contadores anteriores: o percentual que ele recebe cobre o
+    tempo desde a sua última amostra, não desde a de outro consumidor.
+    """
+
+    def __init__(self, caminho: str = "/proc/stat", janela_minima: float = 1.0):
+        self.caminho = Path(caminho)
+        self.janela_minima = janela_minima
+        self._lock = threading.Lock()
+        # Por consumidor: contadores, instante e resultado da última amostra
+        self._anterior: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        self._anterior_ts: Dict[str, float] = {}
+        self._ultimo: Dict[str, Dict[str, Any]] = {}
+
+    def amostrar(self, consumidor: str = "coleta") -> Dict[str, Any]:
+        """Retorna percentuais de CPU desde a amostra anterior do consumidor"""
+        with self._lock:
+            agora = time.monotonic()
+            if self._dentro_da_janela(consumidor, agora):
+                return self._ultimo[consumidor]
+
+            return self._atualizar(consumidor, self._ler_contadores(), agora)
+
+    def atualizar(self, contadores: Dict[str, Tuple[int, ...]],
+                  consumidor: str = "coleta") -> Dict[str, Any]:
+        """Atualiza a amostra com contadores já lidos por outro backend"""
+        with self._lock:
+            agora = time.monotonic()
+            if self._dentro_da_janela(consumidor, agora):
+                return self._ultimo[consumidor]
+
+            return self._atualizar(consumidor, contadores, agora)
+
+    def _dentro_da_janela(self, consumidor: str, agora: float) -> bool:
+        """Chamadas repetidas dentro da janela mínima recebem a mesma amostra
+        (um delta de poucos ticks seria só ruído)"""
+        anterior_ts = self._anterior_ts.get(consumidor)
+        return (consumidor in self._ultimo and anterior_ts is not None
+                and agora - anterior_ts < self.janela_minima)
+
+    def _atualizar(self, consumidor: str, contadores: Dict[str, Tuple[int, ...]],
+                   agora: float) -> Dict[str, Any]:
+        """Calcula percentuais a partir dos deltas e guarda os contadores"""
+        if not contadores:
+            return self._ultimo.get(consumidor, {})
+
+        anteriores = self._anterior.get(consumidor, {})
+        total = self._percentuais(contadores.get("cpu"), anteriores.get("cpu"))
+        nucleos = sorted(
+            (nome for nome in contadores if nome != "cpu"),
+            key=lambda nome: int(nome[3:])
+        )
+        per_core = [
+            self._percentuais(contadores[nome], anteriores.get(nome))["percent"]
+            for nome in nucleos
+        ]
+
+        self._anterior[consumidor] = contadores
+        self._anterior_ts[consumidor] = agora
+        self._ultimo[consumidor] = {
+            "percent": total["percent"],
+            "per_core": per_core,
+            "iowait": total["iowait"],
+            "steal": total["steal"]
+        }
+
+        return self._ultimo[consumidor]
+
+    @staticmethod
+    def _percentuais(atual: Optional[Tuple[int, ...]],
+                     anterior: Optional[Tuple[int, ...]]) -> Dict[str, float]:
+        """Converte o delta de contadores em percentuais"""
+        if not atual:
+            return {"percent": 0.0, "iowait": 0.0, "steal": 0.0}
+
+        # Sem amostra anterior, usa a média desde o boot
+        if anterior is None or len(anterior) != len(atual):
+            anterior = (0,) * len(atual)
+
+        delta = [max(a - b, 0) for a, b in zip(atual, anterior)]
+        total = sum(delta)
+
+        if total == 0:
+            return {"percent": 0.0, "iowait": 0.0, "steal": 0.0}
+
+        ocioso = delta[3] + delta[4]
+        return {
+            "percent": round((total - ocioso) / total * 100, 2),
+            "iowait": round(delta[4] / total * 100, 2),
+            "steal": round(delta[7] / total * 100, 2)
+        }
+
+    def _ler_contadores(self) -> Dict[str, Tuple[int, ...]]:
+        """Lê contadores de CPU de /proc/stat (ou psutil fora do Linux)"""
+        try:
+            with open(self.caminho, "rb") as f:
+                return parse_proc_stat(f.read())
+        except OSError:
+            return self._ler_contadores_psutil()
+
+    @staticmethod
+    def _ler_contadores_psutil() -> Dict[str, Tuple[int, ...]]:
+        """Fallback portátil usando psutil.cpu_times"""
+        import psutil
+
+        def converter(tempos) -> Tuple[int, ...]:
+            # Centésimos de segundo, mesma unidade de /proc/stat
+            return tuple(int(getattr(tempos, campo, 0.0) * 100) for campo in CAMPOS_CPU)
+
+        contadores = {"cpu": converter(psutil.cpu_times())}
+        for i, tempos in enumerate(psutil.cpu_times(percpu=True)):
+            contadores[f"cpu{i}"] = converter(tempos)
+
+        return contadores
+
+
+def parse_proc_stat(conteudo: bytes) -> Dict[str, Tuple[int, ...]]:
+    """Extrai as linhas cpu/cpuN de /proc/stat"""
+    contadores = {}
+
+    for linha in conteudo.split(b"\n"):
+        if not linha.startswith(b"cpu"):
+            # As linhas de CPU vêm primeiro no arquivo
+            if contadores:
+                break
+            continue
+
+        partes = linha.split()
+        valores = [int(v) for v in partes[1:9]]
+        valores += [0] * (len(CAMPOS_CPU) - len(valores))
+        contadores[partes[0].decode()] = tuple(valores)
+
+    return contadores
+
+
+# Singleton do processo (um estado de delta por consumidor)
+amostrador_cpu = AmostradorCPU(f"{config.PROC_ROOT}/stat")
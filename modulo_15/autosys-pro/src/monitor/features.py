@@ -0,0 +1,148 @@
+# src/monitor/features.py
+"""Features do preditor de falhas: em lote (treino) e em fluxo (inferência)
+
+derivar_lote() e EstadoFeatures calculam as mesmas colunas, na mesma
+ordem; o treino usa a versão pandas sobre o histórico e a inferência
+atualiza janelas em anel a cada amostra, em O(1), sem DataFrame.
+"""
+import math
+from array import array
+from typing import Iterable, List, Optional, Sequence
+
+# Colunas vindas direto da amostra (núcleo do MetricSnapshot / tabela metrics)
+FEATURES_BASE = [
+    'cpu_percent', 'memory_percent', 'disk_percent',
+    'load_avg_1min', 'load_avg_5min', 'load_avg_15min',
+    'processes_total', 'connections_total',
+    'hour_of_day', 'day_of_week'
+]
+FEATURES_DERIVADAS = [
+    'cpu_ma_60', 'mem_ma_60', 'cpu_trend', 'mem_trend',
+    'is_business_hours', 'is_weekend'
+]
+FEATURES = FEATURES_BASE + FEATURES_DERIVADAS
+
+JANELA_MEDIA = 60  # amostras
+HORARIO_COMERCIAL = (9, 18)  # inclusivo
+DIAS_FIM_DE_SEMANA = (5, 6)  # weekday(): sábado e domingo
+
+_CPU = FEATURES_BASE.index('cpu_percent')
+_MEM = FEATURES_BASE.index('memory_percent')
+_HORA = FEATURES_BASE.index('hour_of_day')
+_DIA = FEATURES_BASE.index('day_of_week')
+
+
+def derivar_lote(X):
+    """Adiciona as features derivadas a um DataFrame ordenado por tempo"""
+    X = X.copy()
+
+    # Médias móveis
+    X['cpu_ma_60'] = X['cpu_percent'].rolling(window=JANELA_MEDIA, min_periods=1).mean()
+    X['mem_ma_60'] = X['memory_percent'].rolling(window=JANELA_MEDIA, min_periods=1).mean()
+
+    # Tendências
+    X['cpu_trend'] = X['cpu_percent'] - X['cpu_ma_60']
+    X['mem_trend'] = X['memory_percent'] - X['mem_ma_60']
+
+    # Horário comercial
+    X['is_business_hours'] = ((X['hour_of_day'] >= HORARIO_COMERCIAL[0]) &
+                              (X['hour_of_day'] <= HORARIO_COMERCIAL[1])).astype(int)
+
+    # Fim de semana
+    X['is_weekend'] = (X['day_of_week'].isin(DIAS_FIM_DE_SEMANA)).astype(int)
+
+    return X[FEATURES]
+
+
+class JanelaMovel:
+    """Média das últimas `tamanho` amostras em um buffer circular
+
+    A soma é mantida incrementalmente e recalculada a cada volta completa,
+    para o erro de ponto flutuante não acumular.
+    """
+
+    __slots__ = ("valores", "tamanho", "total", "posicao", "soma")
+
+    def __init__(self, tamanho: int):
+        self.valores = array("d", [0.0]) * tamanho
+        self.tamanho = tamanho
+        self.total = 0
+        self.posicao = 0
+        self.soma = 0.0
+
+    def adicionar(self, valor: float):
+        self.soma += valor - self.valores[self.posicao]
+        self.valores[self.posicao] = valor
+        self.posicao += 1
+        if self.posicao == self.tamanho:
+            self.posicao = 0
+            self.soma = math.fsum(self.valores)
+        if self.total < self.tamanho:
+            self.total += 1
+
+    def media(self) -> float:
+        return self.soma / self.total if self.total else math.nan
+
+    def media_com(self, valor: float) -> float:
+        """Média como se `valor` fosse adicionado, sem alterar a janela"""
+        if self.total < self.tamanho:
+            return (self.soma + valor) / (self.total + 1)
+        return (self.soma - self.valores[self.posicao] + valor) / self.tamanho
+
+
+class EstadoFeatures:
+    """Estado em fluxo das features do preditor
+
+    No treino, linhas com alguma feature base ausente são descartadas antes
+    das médias móveis; aqui elas também não entram nas janelas (e saem com
+    os ausentes zerados, como a inferência sempre fez).
+    """
+
+    def __init__(self, janela: int = JANELA_MEDIA):
+        self.cpu = JanelaMovel(janela)
+        self.memoria = JanelaMovel(janela)
+
+    @property
+    def amostras(self) -> int:
+        return self.cpu.total
+
+    def atualizar(self, base: Sequence[float]) -> List[float]:
+        """Registra uma amostra (valores de FEATURES_BASE) e devolve o vetor FEATURES"""
+        if any(math.isnan(v) for v in base):
+            return self._montar(base, None, None)
+
+        self.cpu.adicionar(base[_CPU])
+        self.memoria.adicionar(base[_MEM])
+        return self._montar(base, self.cpu.media(), self.memoria.media())
+
+    def vetor(self, base: Sequence[float]) -> List[float]:
+        """Vetor FEATURES da amostra sem registrá-la (consultas avulsas)"""
+        if any(math.isnan(v) for v in base):
+            return self._montar(base, None, None)
+        return self._montar(base, self.cpu.media_com(base[_CPU]),
+                            self.memoria.media_com(base[_MEM]))
+
+    def _montar(self, base: Sequence[float], cpu_ma: Optional[float],
+                mem_ma: Optional[float]) -> List[float]:
+        vetor = [0.0 if math.isnan(v) else v for v in base]
+        # Amostra incompleta: médias das janelas atuais (ou o próprio valor)
+        if cpu_ma is None:
+            cpu_ma = self.cpu.media() if self.cpu.total else vetor[_CPU]
+        if mem_ma is None:
+            mem_ma = self.memoria.media() if self.memoria.total else vetor[_MEM]
+        hora, dia = vetor[_HORA], vetor[_DIA]
+
+        vetor += [
+            cpu_ma,
+            mem_ma,
+            vetor[_CPU] - cpu_ma,
+            vetor[_MEM] - mem_ma,
+            float(HORARIO_COMERCIAL[0] <= hora <= HORARIO_COMERCIAL[1]),
+            float(dia in DIAS_FIM_DE_SEMANA),
+        ]
+        return vetor
+
+    def aquecer(self, linhas: Iterable[Sequence[Optional[float]]]):
+        """Preenche as janelas com amostras históricas (mais antiga primeiro)"""
+        for linha in linhas:
+            self.atualizar([math.nan if v is None else float(v) for v in linha])
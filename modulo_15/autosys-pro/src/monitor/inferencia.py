@@ -0,0 +1,142 @@
+# src/monitor/inferencia.py
+"""Artefato de inferência do preditor de falhas, só com numpy
+
+O GradientBoostingClassifier e o StandardScaler treinados são exportados
+para vetores: ordem das colunas, média/escala do scaler e as árvores
+achatadas em arrays únicos (feature, limiar, filhos, valor de cada nó).
+Na predição todas as árvores descem juntas, um nível por iteração, sem
+pandas, sem sklearn e sem a validação de entrada dele.
+"""
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Sequence, Union
+
+import numpy as np
+
+VERSAO = 1
+
+
+class ModeloCompacto:
+    """Scaler + árvores do gradient boosting (classificação binária) em arrays
+
+    Folhas apontam para si mesmas (limiar +inf), então depois de
+    `profundidade` passos toda árvore está parada em uma folha, sem máscara.
+    """
+
+    CAMPOS = ("colunas", "media", "escala", "base", "feature", "limiar",
+              "esquerda", "direita", "valor", "raizes", "profundidade",
+              "importancias")
+
+    def __init__(self, colunas: Sequence[str], media: np.ndarray, escala: np.ndarray,
+                 base: float, feature: np.ndarray, limiar: np.ndarray,
+                 esquerda: np.ndarray, direita: np.ndarray, valor: np.ndarray,
+                 raizes: np.ndarray, profundidade: int, importancias: np.ndarray):
+        self.colunas = [str(c) for c in colunas]
+        self.media = np.asarray(media, dtype=np.float64)
+        self.escala = np.asarray(escala, dtype=np.float64)
+        self.base = float(base)
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.limiar = np.asarray(limiar, dtype=np.float64)
+        self.esquerda = np.asarray(esquerda, dtype=np.intp)
+        self.direita = np.asarray(direita, dtype=np.intp)
+        self.valor = np.asarray(valor, dtype=np.float64)
+        self.raizes = np.asarray(raizes, dtype=np.intp)
+        self.profundidade = int(profundidade)
+        self.importancias = np.asarray(importancias, dtype=np.float64)
+
+    @classmethod
+    def de_sklearn(cls, modelo, scaler, colunas: Sequence[str]) -> "ModeloCompacto":
+        """Exporta um GradientBoostingClassifier binário e seu StandardScaler"""
+        if modelo.estimators_.shape[1] != 1:
+            raise ValueError("Só classificação binária é suportada")
+
+        n = len(colunas)
+        media = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+        escala = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+
+        feature, limiar, esquerda, direita, valor, raizes = [], [], [], [], [], []
+        inicio = 0
+        profundidade = 0
+        for arvore in modelo.estimators_[:, 0]:
+            t = arvore.tree_
+            folha = t.children_left < 0
+            indices = np.arange(t.node_count)
+
+            raizes.append(inicio)
+            feature.append(np.where(folha, 0, t.feature))
+            limiar.append(np.where(folha, np.inf, t.threshold))
+            esquerda.append(np.where(folha, indices, t.children_left) + inicio)
+            direita.append(np.where(folha, indices, t.children_right) + inicio)
+            # learning_rate já aplicado: a soma das folhas é o termo das árvores
+            valor.append(t.value[:, 0, 0] * modelo.learning_rate)
+            profundidade = max(profundidade, t.max_depth)
+            inicio += t.node_count
+
+        # Termo inicial (prior do log-odds): o que a decision_function tem além das árvores
+        zero = np.zeros((1, n))
+        arvores = sum(a.predict(zero)[0] for a in modelo.estimators_[:, 0])
+        base = modelo.decision_function(zero)[0] - modelo.learning_rate * arvores
+
+        return cls(
+            colunas=colunas, media=media, escala=escala, base=base,
+            feature=np.concatenate(feature), limiar=np.concatenate(limiar),
+            esquerda=np.concatenate(esquerda), direita=np.concatenate(direita),
+            valor=np.concatenate(valor), raizes=np.asarray(raizes),
+            profundidade=profundidade, importancias=modelo.feature_importances_
+        )
+
+    def salvar(self, destino: Union[str, Path, BinaryIO]):
+        """Grava em .npz (sem pickle), em um caminho ou arquivo binário aberto"""
+        if isinstance(destino, (str, Path)):
+            with open(destino, "wb") as f:
+                return self.salvar(f)
+        np.savez(destino, versao=VERSAO, **{
+            campo: np.asarray(getattr(self, campo)) for campo in self.CAMPOS
+        })
+
+    @classmethod
+    def carregar(cls, caminho: Union[str, Path]) -> "ModeloCompacto":
+        with np.load(caminho, allow_pickle=False) as dados:
+            if int(dados["versao"]) != VERSAO:
+                raise ValueError(f"Versão de artefato não suportada: {int(dados['versao'])}")
+            campos = {campo: dados[campo] for campo in cls.CAMPOS}
+        campos["colunas"] = campos["colunas"].tolist()
+        campos["base"] = float(campos["base"])
+        campos["profundidade"] = int(campos["profundidade"])
+        return cls(**campos)
+
+    def decisao(self, X: np.ndarray) -> np.ndarray:
+        """Log-odds de cada linha de X (amostras x colunas, na ordem de `colunas`)"""
+        # Mesma conta do StandardScaler; as árvores do sklearn comparam em float32
+        X = ((np.asarray(X, dtype=np.float64) - self.media) / self.escala).astype(np.float32)
+
+        # nos[i, j]: nó atual da árvore i para a amostra j
+        nos = np.repeat(self.raizes[:, None], X.shape[0], axis=1)
+        amostras = np.arange(X.shape[0])
+        for _ in range(self.profundidade):
+            esquerda = X[amostras, self.feature[nos]] <= self.limiar[nos]
+            nos = np.where(esquerda, self.esquerda[nos], self.direita[nos])
+        return self.base + self.valor[nos].sum(axis=0)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidade da classe positiva para cada linha de X"""
+        return 1.0 / (1.0 + np.exp(-self.decisao(X)))
+
+    def predict(self, vetor: Sequence[float]) -> float:
+        """Probabilidade de falha de um único vetor de features"""
+        X = (np.asarray(vetor, dtype=np.float64) - self.media) / self.escala
+        X = X.astype(np.float32)
+
+        nos = self.raizes
+        for _ in range(self.profundidade):
+            nos = np.where(X[self.feature[nos]] <= self.limiar[nos],
+                           self.esquerda[nos], self.direita[nos])
+        bruto = self.base + self.valor[nos].sum()
+        return float(1.0 / (1.0 + np.exp(-bruto)))
+
+    def importancia_features(self) -> Dict[str, float]:
+        return dict(zip(self.colunas, self.importancias.tolist()))
+
+    def top_features(self, n: int = 5) -> Dict[str, float]:
+        ordenadas: List = sorted(self.importancia_features().items(),
+                                 key=lambda x: x[1], reverse=True)
+        return dict(ordenadas[:n])
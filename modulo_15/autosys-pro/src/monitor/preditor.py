@@ -1,193 +1,317 @@
 # src/monitor/preditor.py
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-import joblib
-import sqlite3
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, Union
 import asyncio
 
 from src.config import config
+from src.monitor.features import (
+    FEATURES, FEATURES_BASE, JANELA_MEDIA, EstadoFeatures, derivar_lote
+)
+from src.monitor.inferencia import ModeloCompacto
+from src.monitor.snapshot import MetricSnapshot
+from src.storage.database import BancoDados, banco
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.utils.treinamento import ProgressoTreino, publicar, treinos
+
+ARQUIVO_MODELO = "preditor_falhas.pkl"
+ARQUIVO_SCALER = "scaler_falhas.pkl"
+ARQUIVO_ARTEFATO = "preditor_falhas.npz"
+ARQUIVO_METRICAS = "preditor_metrics.json"
+
+
+def rotular_falhas(timestamps: np.ndarray, cpu: np.ndarray,
+                   limiar: Optional[float] = None,
+                   duracao_minima: Optional[float] = None,
+                   horizonte: Optional[float] = None) -> np.ndarray:
+    """Rótulo por amostra: 1 se nos próximos `horizonte` segundos a CPU passa
+    `duracao_minima` segundos (somados) acima do limiar, 0 se não, NaN se a
+    janela ainda não foi totalmente observada
+
+    Cada amostra vale o tempo até a próxima (limitado a MONITOR_INTERVAL_SLOW,
+    para lacunas de coleta não contarem como CPU alta), o que respeita
+    amostragem adaptativa e intervalos irregulares. A soma da janela à frente
+    sai de uma soma acumulada: O(n log n) no searchsorted, sem laço Python.
+    `timestamps` em segundos, em ordem crescente.
+    """
+    limiar = config.FAILURE_CPU_THRESHOLD if limiar is None else limiar
+    duracao_minima = config.FAILURE_MIN_DURATION if duracao_minima is None else duracao_minima
+    horizonte = config.FAILURE_HORIZON * 3600 if horizonte is None else horizonte
+
+    total = len(timestamps)
+    rotulos = np.full(total, np.nan)
+    if total == 0:
+        return rotulos
+
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    duracao = np.diff(timestamps, append=timestamps[-1]).astype(np.float64)
+    duracao[-1] = np.median(duracao[:-1]) if total > 1 else 0.0
+    np.clip(duracao, 0, config.MONITOR_INTERVAL_SLOW, out=duracao)
+
+    # acumulado[i] = segundos quentes antes da amostra i
+    acumulado = np.zeros(total + 1)
+    np.cumsum(np.where(np.asarray(cpu) > limiar, duracao, 0.0), out=acumulado[1:])
+
+    # Janela [t_i, t_i + horizonte): fim = primeira amostra fora dela
+    fim = np.searchsorted(timestamps, timestamps + horizonte, side="left")
+    quente = acumulado[fim] - acumulado[np.arange(total)]
+
+    observada = timestamps + horizonte <= timestamps[-1]
+    rotulos[observada] = (quente[observada] >= duracao_minima).astype(np.float64)
+    return rotulos
+
+
+def carregar_dados_treinamento(conn):
+    """Histórico rotulado para treinamento (DataFrame)"""
+    import pandas as pd
+
+    # Carrega métricas das últimas 30 dias: colunas tipadas, lidas do
+    # índice de cobertura de cada partição (sem json_extract por linha)
+    query = """
+            SELECT timestamp,
+                   cpu    as cpu_percent,
+                   memory as memory_percent,
+                   disk   as disk_percent,
+                   load_avg_1min,
+                   load_avg_5min,
+                   load_avg_15min,
+                   processes_total,
+                   connections_total,
+                   hour_of_day,
+                   day_of_week
+            FROM metrics
+            WHERE timestamp > datetime('now', '-30 days')
+            ORDER BY timestamp
+            """
+
+    df = pd.read_sql_query(query, conn)
+
+    # Cria target: falha nas próximas FAILURE_HORIZON horas
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values('timestamp')
+
+    df['falha_futura'] = rotular_falhas(
+        df['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64),
+        df['cpu_percent'].to_numpy(dtype=np.float64)
+    )
+
+    # Remove linhas com NaN (inclui as sem janela futura completa)
+    df = df.dropna()
+    df['falha_futura'] = df['falha_futura'].astype(int)
+
+    return df
+
+
+def treinar_modelo(progresso: ProgressoTreino, caminho_db: str, diretorio: str) -> Dict[str, Any]:
+    """Treina e publica o modelo (roda no processo de treino, ver utils.treinamento)
+
+    Lê o banco por uma conexão própria, reporta progresso a cada estágio do
+    boosting e grava os arquivos com publicar(): o artefato .npz é o único
+    que a inferência lê, então a troca do modelo é um rename.
+    """
+    import joblib
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    progresso(0.0, "carregando dados")
+    banco_treino = BancoDados(Path(caminho_db), leitores=1)
+    try:
+        with banco_treino.leitor() as conn:
+            df = carregar_dados_treinamento(conn)
+    finally:
+        banco_treino.fechar()
+
+    if len(df) < 1000:
+        return {"status": "insufficient_data", "records": len(df)}
+
+    progresso(0.05, "treinando")
+
+    # Prepara features e target (mesmas colunas de EstadoFeatures)
+    X = derivar_lote(df[FEATURES_BASE]).to_numpy(dtype=np.float64)
+    y = df['falha_futura']
+    del df
+
+    # Split treino/teste
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # Normaliza features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Treina modelo (Gradient Boosting para melhor performance)
+    modelo = GradientBoostingClassifier(
+        n_estimators=200,
+        max_depth=8,
+        learning_rate=0.1,
+        subsample=0.8,
+        random_state=42
+    )
+
+    # O monitor roda a cada árvore: progresso e ponto de cancelamento
+    def monitor(estagio, _modelo, _locais):
+        progresso(0.05 + 0.85 * (estagio + 1) / modelo.n_estimators)
+        return False
+
+    modelo.fit(X_train_scaled, y_train, monitor=monitor)
+
+    # Avalia modelo
+    progresso(0.9, "avaliando")
+    y_pred = modelo.predict(X_test_scaled)
+    y_proba = modelo.predict_proba(X_test_scaled)[:, 1]
+
+    metricas = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred),
+        "recall": recall_score(y_test, y_pred),
+        "f1_score": f1_score(y_test, y_pred),
+        "roc_auc": roc_auc_score(y_test, y_proba),
+        "feature_importance": dict(zip(
+            FEATURES,
+            modelo.feature_importances_.tolist()
+        ))
+    }
+
+    # Salva modelo (sklearn, para análise), métricas e, por último, o artefato
+    progresso(0.95, "publicando")
+    diretorio = Path(diretorio)
+    compacto = ModeloCompacto.de_sklearn(modelo, scaler, FEATURES)
+    publicar(diretorio / ARQUIVO_MODELO, lambda f: joblib.dump(modelo, f))
+    publicar(diretorio / ARQUIVO_SCALER, lambda f: joblib.dump(scaler, f))
+    publicar(diretorio / ARQUIVO_METRICAS,
+             lambda f: f.write(json.dumps(metricas, indent=2).encode()))
+    publicar(diretorio / ARQUIVO_ARTEFATO, compacto.salvar)
+
+    progresso(1.0, "concluído")
+    return metricas
 
 
 class PreditorFalhas:
-    """Sistema de predição de falhas usando ML"""
+    """Sistema de predição de falhas usando ML
+
+    O treino usa pandas e sklearn (importados só nele); a inferência roda
+    sobre o ModeloCompacto exportado, só com numpy.
+    """
 
     def __init__(self):
-        self.modelo = None
-        self.scaler = StandardScaler()
-        self.modelo_path = config.MODELS_DIR / "preditor_falhas.pkl"
-        self.scaler_path = config.MODELS_DIR / "scaler_falhas.pkl"
+        self.modelo: Optional[ModeloCompacto] = None
+        self.modelo_path = config.MODELS_DIR / ARQUIVO_MODELO
+        self.scaler_path = config.MODELS_DIR / ARQUIVO_SCALER
+        self.artefato_path = config.MODELS_DIR / ARQUIVO_ARTEFATO
         self.is_trained = False
-        self.features = [
-            'cpu_percent', 'memory_percent', 'disk_percent',
-            'load_avg_1min', 'load_avg_5min', 'load_avg_15min',
-            'processes_total', 'connections_total',
-            'hour_of_day', 'day_of_week'
-        ]
+        self._top_features: Dict[str, float] = {}
+        self.features = FEATURES_BASE
+
+        # Médias móveis e tendências em fluxo, atualizadas a cada predição
+        self.estado = EstadoFeatures()
+        self._estado_aquecido = False
 
         # Carrega modelo existente se disponível
         self._load_model()
 
     def _load_model(self):
-        """Carrega modelo treinado do disco"""
+        """Carrega o artefato de inferência do disco
+
+        Modelos treinados antes do artefato (só os .pkl) são exportados uma
+        vez; isso ainda precisa do sklearn, as cargas seguintes não.
+        """
         try:
-            if self.modelo_path.exists():
-                self.modelo = joblib.load(self.modelo_path)
-                self.scaler = joblib.load(self.scaler_path)
-                self.is_trained = True
+            if not self.artefato_path.exists() and self.modelo_path.exists():
+                import joblib
+                compacto = ModeloCompacto.de_sklearn(
+                    joblib.load(self.modelo_path), joblib.load(self.scaler_path), FEATURES
+                )
+                publicar(self.artefato_path, compacto.salvar)
+                logger.info("📦 Modelo de predição exportado para o artefato numpy")
+
+            if self.artefato_path.exists():
+                self._usar_modelo(ModeloCompacto.carregar(self.artefato_path))
                 logger.info("✅ Modelo de predição carregado com sucesso")
         except Exception as e:
             logger.warning(f"⚠️ Não foi possível carregar modelo: {e}")
 
-    async def treinar(self, force: bool = False) -> Dict[str, float]:
-        """Treina modelo com dados históricos"""
+    def _usar_modelo(self, modelo: ModeloCompacto):
+        if modelo.colunas != FEATURES:
+            raise ValueError(f"Colunas do artefato diferem das features atuais: {modelo.colunas}")
+        self.modelo = modelo
+        self._top_features = modelo.top_features(5)
+        self.is_trained = True
+
+    async def treinar(self, force: bool = False) -> Dict[str, Any]:
+        """Treina modelo com dados históricos em processo separado
+
+        O event loop só acompanha o job; o modelo novo entra no lugar do
+        atual (sem reiniciar) quando o artefato já foi publicado.
+        """
         if self.is_trained and not force:
             return {"status": "already_trained"}
 
         logger.info("🧠 Treinando modelo de predição de falhas...")
 
-        # Carrega dados do banco
-        df = self._carregar_dados_treinamento()
+        resultado = await treinos.executar(
+            "preditor_falhas", treinar_modelo, str(config.DB_PATH), str(self.artefato_path.parent)
+        )
 
-        if len(df) < 1000:
-            logger.warning(f"Dados insuficientes para treinamento: {len(df)} registros")
-            return {"status": "insufficient_data", "records": len(df)}
+        if resultado.get("status") == "insufficient_data":
+            logger.warning(f"Dados insuficientes para treinamento: {resultado['records']} registros")
+        if "accuracy" not in resultado:
+            return resultado
 
         try:
-            # Prepara features e target
-            X = df[self.features]
-            y = df['falha_futura']
-
-            # Feature engineering
-            X = self._feature_engineering(X)
-
-            # Split treino/teste
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-
-            # Normaliza features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-
-            # Treina modelo (Gradient Boosting para melhor performance)
-            self.modelo = GradientBoostingClassifier(
-                n_estimators=200,
-                max_depth=8,
-                learning_rate=0.1,
-                subsample=0.8,
-                random_state=42
-            )
-
-            self.modelo.fit(X_train_scaled, y_train)
-
-            # Avalia modelo
-            y_pred = self.modelo.predict(X_test_scaled)
-            y_proba = self.modelo.predict_proba(X_test_scaled)[:, 1]
-
-            metrics = {
-                "accuracy": accuracy_score(y_test, y_pred),
-                "precision": precision_score(y_test, y_pred),
-                "recall": recall_score(y_test, y_pred),
-                "f1_score": f1_score(y_test, y_pred),
-                "roc_auc": roc_auc_score(y_test, y_proba),
-                "feature_importance": dict(zip(
-                    self.features,
-                    self.modelo.feature_importances_.tolist()
-                ))
-            }
-
-            # Salva modelo
-            joblib.dump(self.modelo, self.modelo_path)
-            joblib.dump(self.scaler, self.scaler_path)
-
-            # Salva métricas
-            with open(config.MODELS_DIR / "preditor_metrics.json", 'w') as f:
-                json.dump(metrics, f, indent=2)
-
-            self.is_trained = True
-            logger.info(f"✅ Modelo treinado - Acurácia: {metrics['accuracy']:.2%}")
-
-            return metrics
-
+            loop = asyncio.get_running_loop()
+            modelo = await loop.run_in_executor(None, ModeloCompacto.carregar, self.artefato_path)
+            self._usar_modelo(modelo)
         except Exception as e:
-            logger.error(f"❌ Erro no treinamento: {e}")
+            logger.error(f"❌ Modelo treinado, mas não carregado: {e}")
             return {"status": "error", "error": str(e)}
 
-    def _carregar_dados_treinamento(self) -> pd.DataFrame:
-        """Carrega dados históricos para treinamento"""
-        conn = sqlite3.connect(config.DB_PATH)
-
-        # Carrega métricas das últimas 30 dias
-        query = """
-                SELECT m.timestamp, \
-                       m.cpu                                                  as cpu_percent, \
-                       m.memory                                               as memory_percent, \
-                       m.disk                                                 as disk_percent, \
-                       json_extract(m.details, '$.cpu.load_avg[0]')           as load_avg_1min, \
-                       json_extract(m.details, '$.cpu.load_avg[1]')           as load_avg_5min, \
-                       json_extract(m.details, '$.cpu.load_avg[2]')           as load_avg_15min, \
-                       json_extract(m.details, '$.processes.total')           as processes_total, \
-                       json_extract(m.details, '$.network.connections_count') as connections_total, \
-                       strftime('%H', m.timestamp)                            as hour_of_day, \
-                       strftime('%w', m.timestamp)                            as day_of_week
-                FROM metrics m
-                WHERE m.timestamp > datetime('now', '-30 days')
-                ORDER BY m.timestamp \
-                """
-
-        df = pd.read_sql_query(query, conn)
-
-        # Cria target: falha nas próximas 24 horas
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
+        logger.info(f"✅ Modelo treinado - Acurácia: {resultado['accuracy']:.2%}")
+        return resultado
 
-        # Define falha como CPU > 95% por pelo menos 5 minutos consecutivos
-        df['falha_futura'] = 0
-
-        for i in range(len(df) - 288):  # 24 horas * 12 amostras/hora = 288
-            janela = df['cpu_percent'].iloc[i:i + 288]
-            if (janela > 95).sum() >= 5:  # 5 amostras = 5 minutos
-                df.loc[df.index[i], 'falha_futura'] = 1
-
-        conn.close()
-
-        # Remove linhas com NaN
-        df = df.dropna()
-
-        return df
-
-    def _feature_engineering(self, X: pd.DataFrame) -> pd.DataFrame:
-        """Adiciona features derivadas"""
-        X = X.copy()
-
-        # Médias móveis
-        X['cpu_ma_60'] = X['cpu_percent'].rolling(window=60, min_periods=1).mean()
-        X['mem_ma_60'] = X['memory_percent'].rolling(window=60, min_periods=1).mean()
-
-        # Tendências
-        X['cpu_trend'] = X['cpu_percent'] - X['cpu_ma_60']
-        X['mem_trend'] = X['memory_percent'] - X['mem_ma_60']
+    async def _aquecer_estado(self):
+        """Carrega as últimas amostras gravadas nas janelas (uma vez, no início)"""
+        self._estado_aquecido = True
+        colunas = ["cpu", "memory", "disk"] + self.features[3:]
+        try:
+            rows = await banco.consultar(f"""
+                SELECT {', '.join(colunas)}
+                FROM metrics
+                WHERE timestamp > datetime('now', '-1 day')
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (JANELA_MEDIA,))
+            self.estado.aquecer(tuple(row) for row in reversed(rows))
+        except Exception as e:
+            logger.warning(f"⚠️ Estado de features sem histórico: {e}")
 
-        # Horário comercial (9-18)
-        X['is_business_hours'] = ((X['hour_of_day'] >= 9) &
-                                  (X['hour_of_day'] <= 18)).astype(int)
+    @metrics.instrument_self("prever_falha")
+    async def prever_falha(self, metrics: Union[MetricSnapshot, Dict[str, Any]],
+                           registrar: bool = True) -> Dict[str, Any]:
+        """Faz predição de falha com dados atuais (snapshot ou dict de coletar_tudo)
 
-        # Fim de semana
-        X['is_weekend'] = (X['day_of_week'].isin([0, 6])).astype(int)
+        Com registrar=True (o ciclo de monitoramento) a amostra entra no estado
+        em fluxo das features, mesmo sem modelo treinado, para as janelas
+        estarem cheias quando ele existir; consultas avulsas passam False.
+        """
+        try:
+            if not isinstance(metrics, MetricSnapshot):
+                metrics = MetricSnapshot.from_metrics(metrics)
 
-        return X
+            if not self._estado_aquecido:
+                await self._aquecer_estado()
+            base = [metrics[campo] for campo in self.features]
+            vetor = self.estado.atualizar(base) if registrar else self.estado.vetor(base)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar features: {e}")
+            vetor = None
 
-    async def prever_falha(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
-        """Faz predição de falha com dados atuais"""
         if not self.is_trained:
             return {
                 "probabilidade": 0.0,
@@ -196,33 +320,11 @@ class PreditorFalhas:
             }
 
         try:
-            # Prepara features
-            features = pd.DataFrame([{
-                'cpu_percent': metrics.get('cpu', {}).get('percent', 0),
-                'memory_percent': metrics.get('memory', {}).get('percent', 0),
-                'disk_percent': metrics.get('disk', {}).get('total_percent', 0),
-                'load_avg_1min': metrics.get('cpu', {}).get('load_avg', [0, 0, 0])[0],
-                'load_avg_5min': metrics.get('cpu', {}).get('load_avg', [0, 0, 0])[1],
-                'load_avg_15min': metrics.get('cpu', {}).get('load_avg', [0, 0, 0])[2],
-                'processes_total': metrics.get('processes', {}).get('total', 0),
-                'connections_total': metrics.get('network', {}).get('connections_count', 0),
-                'hour_of_day': datetime.now().hour,
-                'day_of_week': datetime.now().weekday()
-            }])
-
-            # Feature engineering
-            features = self._feature_engineering(features)
-
-            # Preenche NaN com médias
-            features = features.fillna(features.mean())
-
-            # Normaliza
-            features_scaled = self.scaler.transform(features[self.features +
-                                                             ['cpu_ma_60', 'mem_ma_60', 'cpu_trend', 'mem_trend',
-                                                              'is_business_hours', 'is_weekend']])
-
-            # Predição
-            probabilidade = self.modelo.predict_proba(features_scaled)[0, 1]
+            if vetor is None:
+                raise ValueError("features indisponíveis")
+
+            # Scaler e árvores em numpy sobre o vetor (sem DataFrame nem sklearn)
+            probabilidade = self.modelo.predict(vetor)
 
             # Nível de risco
             if probabilidade >= 0.8:
@@ -241,24 +343,11 @@ class PreditorFalhas:
                 nivel = "mínimo"
                 mensagem = "✅ Sistema estável, baixíssimo risco"
 
-            # Top features que influenciaram
-            feature_importance = dict(zip(
-                self.features + ['cpu_ma_60', 'mem_ma_60', 'cpu_trend',
-                                 'mem_trend', 'is_business_hours', 'is_weekend'],
-                self.modelo.feature_importances_
-            ))
-
-            top_features = sorted(
-                feature_importance.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:5]
-
             return {
-                "probabilidade": round(float(probabilidad), 3),
+                "probabilidade": round(probabilidade, 3),
                 "nivel_risco": nivel,
                 "mensagem": mensagem,
-                "top_features": dict(top_features),
+                "top_features": dict(self._top_features),
                 "timestamp": datetime.now().isoformat(),
                 "threshold_atual": config.PREDICTION_THRESHOLD,
                 "requer_acao": probabilidade > config.PREDICTION_THRESHOLD
@@ -282,7 +371,7 @@ class PreditorFalhas:
             return {"status": "not_trained"}
 
         try:
-            with open(config.MODELS_DIR / "preditor_metrics.json", 'r') as f:
+            with open(config.MODELS_DIR / ARQUIVO_METRICAS, 'r') as f:
                 metrics = json.load(f)
 
             return {
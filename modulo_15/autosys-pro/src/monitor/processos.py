@@ -0,0 +1,193 @@
+# src/monitor/processos.py
+import heapq
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import psutil
+
+from src.config import config
+from src.monitor.coleta import ColetorBase, ContextoColeta, importar_psutil
+
+ChaveProcesso = Tuple[int, float]
+
+
+def _inicio_no_stat(proc: psutil.Process):
+    """starttime cru do /proc/<pid>/stat, ou None fora do Linux
+
+    Dentro de oneshot() o psutil lê o stat uma vez e o reaproveita em
+    cpu_percent() e status(); o create_time() público fica em cache no
+    handle e não enxerga um pid reaproveitado.
+    """
+    ler_stat = getattr(proc._proc, "_parse_stat_file", None)
+    if ler_stat is None:
+        return None
+    try:
+        return ler_stat()["create_time"]
+    except (KeyError, TypeError, IndexError):
+        return None
+
+
+class RastreadorProcessos:
+    """Tabela de processos incremental, mantendo handles do psutil entre ciclos"""
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k or config.PROCESS_TOP_K
+        self.handles: Dict[ChaveProcesso, psutil.Process] = {}
+        self.chaves: Dict[int, ChaveProcesso] = {}
+        self.info: Dict[ChaveProcesso, Dict[str, Any]] = {}
+        self._io_anterior: Dict[ChaveProcesso, int] = {}
+        self._inicio: Dict[ChaveProcesso, Any] = {}
+        self._ultimo_ciclo = None
+        self.memoria_total = psutil.virtual_memory().total
+
+    def atualizar(self) -> Dict[str, Any]:
+        """Atualiza a tabela e retorna contagens e top-K"""
+        agora = time.monotonic()
+        intervalo = agora - self._ultimo_ciclo if self._ultimo_ciclo else None
+        self._ultimo_ciclo = agora
+
+        pids = set(psutil.pids())
+
+        # Remove processos que morreram
+        for pid in list(self.chaves):
+            if pid not in pids:
+                self._remover(pid)
+
+        # Registra processos novos (cpu_percent começa a contar daqui)
+        novos = pids.difference(self.chaves)
+        for pid in novos:
+            self._adicionar(pid)
+
+        # Atualiza apenas os processos que já estavam na tabela
+        for pid in list(self.chaves):
+            if pid not in novos:
+                self._atualizar_processo(pid, intervalo)
+
+        processos = self.info.values()
+        status = Counter(p["status"] for p in processos)
+
+        return {
+            "total": len(self.info),
+            "running": status.get(psutil.STATUS_RUNNING, 0),
+            "sleeping": status.get(psutil.STATUS_SLEEPING, 0),
+            "zombie": status.get(psutil.STATUS_ZOMBIE, 0),
+            "top_cpu": self._top("cpu_percent"),
+            "top_memory": self._top("memory_percent"),
+            "top_io": self._top("io_bytes_s")
+        }
+
+    def _adicionar(self, pid: int):
+        """Cria o handle de um processo novo"""
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                chave = (pid, proc.create_time())
+                nome = proc.name()
+                status = proc.status()
+                proc.cpu_percent(None)
+                inicio = _inicio_no_stat(proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return
+
+        self.handles[chave] = proc
+        self.chaves[pid] = chave
+        self._inicio[chave] = inicio
+        self.info[chave] = {
+            "pid": pid,
+            "name": nome,
+            "cpu_percent": 0.0,
+            "memory_percent": 0.0,
+            "io_bytes_s": 0.0,
+            "status": status
+        }
+
+    def _remover(self, pid: int):
+        """Descarta um processo que não existe mais"""
+        chave = self.chaves.pop(pid, None)
+        if chave is None:
+            return
+        self.handles.pop(chave, None)
+        self.info.pop(chave, None)
+        self._io_anterior.pop(chave, None)
+        self._inicio.pop(chave, None)
+
+    def _reaproveitado(self, chave: ChaveProcesso, proc: psutil.Process) -> bool:
+        """O pid agora é de outro processo? (chamar dentro do oneshot)"""
+        inicio = self._inicio.get(chave)
+        if inicio is None:
+            # Sem o stat em cache: is_running() cria um Process novo para comparar
+            return not proc.is_running()
+        return _inicio_no_stat(proc) != inicio
+
+    def _atualizar_processo(self, pid: int, intervalo: Optional[float]):
+        """Atualiza in-place a entrada de um processo conhecido"""
+        chave = self.chaves[pid]
+        proc = self.handles[chave]
+        entrada = self.info[chave]
+
+        try:
+            with proc.oneshot():
+                # Mesmo stat que cpu_percent()/status() leem: se o kernel
+                # reaproveitou o pid entre ciclos, é outro processo e os
+                # deltas de CPU/IO não podem continuar
+                reaproveitado = self._reaproveitado(chave, proc)
+                if not reaproveitado:
+                    entrada["cpu_percent"] = proc.cpu_percent(None)
+                    entrada["status"] = proc.status()
+                    # rss / total evita o virtual_memory() que memory_percent() faz
+                    entrada["memory_percent"] = round(
+                        proc.memory_info().rss / self.memoria_total * 100, 2
+                    )
+                    io_total = self._io_total(proc)
+        except psutil.NoSuchProcess:
+            self._remover(pid)
+            return
+        except psutil.AccessDenied:
+            return
+
+        if reaproveitado:
+            self._remover(pid)
+            self._adicionar(pid)
+            return
+
+        if io_total is not None:
+            anterior = self._io_anterior.get(chave)
+            if anterior is not None and intervalo:
+                entrada["io_bytes_s"] = round(max(io_total - anterior, 0) / intervalo, 1)
+            self._io_anterior[chave] = io_total
+
+    @staticmethod
+    def _io_total(proc: psutil.Process):
+        """Bytes lidos+escritos pelo processo, se permitido"""
+        try:
+            io = proc.io_counters()
+            return io.read_bytes + io.write_bytes
+        except (psutil.AccessDenied, AttributeError, NotImplementedError):
+            return None
+
+    def _top(self, campo: str) -> List[Dict[str, Any]]:
+        """Top-K por campo usando heap limitado (O(n log k))"""
+        top = heapq.nlargest(
+            self.top_k,
+            (p for p in self.info.values() if p[campo] > 0),
+            key=lambda p: p[campo]
+        )
+        return [dict(p) for p in top]
+
+
+class ColetorProcessos(ColetorBase):
+    """Coleta informações sobre processos"""
+
+    nome = "processes"
+    metricas = ("total", "running", "sleeping", "zombie", "top_cpu", "top_memory", "top_io")
+    custo = "alto"
+    intervalo = 15
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        importar_psutil()
+        self.rastreador = RastreadorProcessos()
+
+    def coletar(self) -> Dict[str, Any]:
+        return self.rastreador.atualizar()
@@ -0,0 +1,269 @@
+# src/monitor/procfs.py
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.monitor.cpu import parse_proc_stat
+from src.utils.logger import logger
+
+# Dispositivos virtuais que não entram no total de I/O de disco
+PREFIXOS_DISCO_IGNORADOS = ("loop", "ram", "zram", "fd", "sr")
+
+
+class ArquivoProc:
+    """Arquivo de /proc mantido aberto e relido com pread em buffer fixo"""
+
+    def __init__(self, caminho: Path, tamanho_inicial: int = 16384):
+        self.caminho = caminho
+        self.fd = os.open(caminho, os.O_RDONLY)
+        self.buffer = bytearray(tamanho_inicial)
+        self.view = memoryview(self.buffer)
+
+    def ler(self) -> bytes:
+        """Relê o arquivo inteiro a partir do offset 0"""
+        total = 0
+
+        while True:
+            lidos = os.preadv(self.fd, [self.view[total:]], total)
+            if lidos == 0:
+                break
+            total += lidos
+
+            # Buffer cheio: dobra o tamanho e continua de onde parou
+            if total == len(self.buffer):
+                self.view.release()
+                self.buffer.extend(bytes(len(self.buffer)))
+                self.view = memoryview(self.buffer)
+
+        return self.view[:total].tobytes()
+
+    def fechar(self):
+        """Fecha o descritor"""
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class LeitorProcFS:
+    """Backend de coleta lendo /proc diretamente, um parse por ciclo"""
+
+    ARQUIVOS = {
+        "stat": "stat",
+        "meminfo": "meminfo",
+        "diskstats": "diskstats",
+        "loadavg": "loadavg",
+        "uptime": "uptime"
+    }
+
+    def __init__(self, raiz: str = "/proc", raiz_sys: str = "/sys"):
+        self.raiz = Path(raiz)
+        self.raiz_sys = Path(raiz_sys)
+        self.arquivos: Dict[str, ArquivoProc] = {}
+        self.dados: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        for nome, relativo in self.ARQUIVOS.items():
+            self.arquivos[nome] = ArquivoProc(self.raiz / relativo)
+        self.arquivos["net_dev"] = ArquivoProc(diretorio_rede(raiz) / "dev")
+
+        self.discos = self._listar_discos()
+
+        # Frequência da CPU0 como referência (evita ler um arquivo por núcleo)
+        freq = self.raiz_sys / "devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+        self.arquivo_freq = ArquivoProc(freq, 64) if freq.exists() else None
+
+    @staticmethod
+    def disponivel(raiz: str = "/proc") -> bool:
+        """Indica se o backend pode ser usado neste host"""
+        return hasattr(os, "preadv") and Path(raiz, "stat").exists()
+
+    def _listar_discos(self) -> Optional[set]:
+        """Lista discos inteiros (sem partições) via /sys/block"""
+        try:
+            return {
+                nome for nome in os.listdir(self.raiz_sys / "block")
+                if not nome.startswith(PREFIXOS_DISCO_IGNORADOS)
+            }
+        except OSError:
+            return None
+
+    def atualizar(self) -> Dict[str, Any]:
+        """Relê e interpreta todos os arquivos uma única vez por ciclo"""
+        with self._lock:
+            stat = self.arquivos["stat"].ler()
+            self.dados = {
+                "cpu": parse_proc_stat(stat),
+                "cpu_stats": self._parse_stat_extras(stat),
+                "meminfo": self._parse_meminfo(self.arquivos["meminfo"].ler()),
+                "diskstats": self._parse_diskstats(self.arquivos["diskstats"].ler()),
+                "net_dev": self._parse_net_dev(self.arquivos["net_dev"].ler()),
+                "loadavg": self._parse_loadavg(self.arquivos["loadavg"].ler()),
+                "uptime": float(self.arquivos["uptime"].ler().split()[0]),
+                "freq_mhz": int(self.arquivo_freq.ler()) / 1000 if self.arquivo_freq else 0
+            }
+            return self.dados
+
+    # ============= PARSERS =============
+
+    @staticmethod
+    def _parse_stat_extras(conteudo: bytes) -> Dict[str, int]:
+        """Extrai ctxt, intr, softirq e btime de /proc/stat"""
+        extras = {}
+        chaves = {b"ctxt": "ctx_switches", b"intr": "interrupts",
+                  b"softirq": "soft_interrupts", b"btime": "boot_time"}
+
+        for linha in conteudo.split(b"\n"):
+            chave, _, resto = linha.partition(b" ")
+            if chave in chaves:
+                extras[chaves[chave]] = int(resto.split(None, 1)[0])
+
+        return extras
+
+    @staticmethod
+    def _parse_meminfo(conteudo: bytes) -> Dict[str, int]:
+        """Converte /proc/meminfo em bytes por campo"""
+        campos = {}
+
+        for linha in conteudo.split(b"\n"):
+            chave, _, resto = linha.partition(b":")
+            if resto:
+                campos[chave.decode()] = int(resto.split()[0]) * 1024
+
+        return campos
+
+    def _parse_diskstats(self, conteudo: bytes) -> Dict[str, int]:
+        """Soma contadores de /proc/diskstats dos discos inteiros"""
+        total = {"read_count": 0, "write_count": 0, "read_bytes": 0,
+                 "write_bytes": 0, "read_time": 0, "write_time": 0}
+
+        for linha in conteudo.split(b"\n"):
+            partes = linha.split()
+            if len(partes) < 14:
+                continue
+
+            nome = partes[2].decode()
+            if self.discos is not None:
+                if nome not in self.discos:
+                    continue
+            elif nome.startswith(PREFIXOS_DISCO_IGNORADOS):
+                continue
+
+            # Setores de 512 bytes, independente do dispositivo
+            total["read_count"] += int(partes[3])
+            total["read_bytes"] += int(partes[5]) * 512
+            total["read_time"] += int(partes[6])
+            total["write_count"] += int(partes[7])
+            total["write_bytes"] += int(partes[9]) * 512
+            total["write_time"] += int(partes[10])
+
+        return total
+
+    @staticmethod
+    def _parse_net_dev(conteudo: bytes) -> Dict[str, List[int]]:
+        """Extrai os 16 contadores por interface de /proc/net/dev"""
+        interfaces = {}
+
+        # Duas linhas de cabeçalho
+        for linha in conteudo.split(b"\n")[2:]:
+            nome, _, resto = linha.partition(b":")
+            if resto:
+                interfaces[nome.strip().decode()] = [int(v) for v in resto.split()]
+
+        return interfaces
+
+    @staticmethod
+    def _parse_loadavg(conteudo: bytes) -> Dict[str, Any]:
+        """Extrai médias de carga e contagem de tarefas de /proc/loadavg"""
+        partes = conteudo.split()
+        running, _, total = partes[3].partition(b"/")
+
+        return {
+            "load": [float(partes[0]), float(partes[1]), float(partes[2])],
+            "running": int(running),
+            "total": int(total)
+        }
+
+    # ============= VISÕES NO FORMATO DO psutil =============
+
+    def memoria(self) -> Dict[str, int]:
+        """Memória no mesmo formato de psutil.virtual_memory/swap_memory"""
+        m = self.dados["meminfo"]
+        total = m.get("MemTotal", 0)
+        free = m.get("MemFree", 0)
+        cached = m.get("Cached", 0) + m.get("SReclaimable", 0)
+        available = m.get("MemAvailable", free + cached)
+        used = total - free - m.get("Buffers", 0) - cached
+        if used < 0:
+            used = total - free
+
+        swap_total = m.get("SwapTotal", 0)
+        swap_free = m.get("SwapFree", 0)
+
+        return {
+            "total": total,
+            "available": available,
+            "used": used,
+            "free": free,
+            "percent": round((total - available) / total * 100, 1) if total else 0.0,
+            "swap_total": swap_total,
+            "swap_used": swap_total - swap_free,
+            "swap_free": swap_free,
+            "swap_percent": round((swap_total - swap_free) / swap_total * 100, 1)
+            if swap_total else 0.0
+        }
+
+    def rede_total(self) -> Dict[str, int]:
+        """Soma de /proc/net/dev no formato de psutil.net_io_counters"""
+        total = [0] * 16
+        for valores in self.dados["net_dev"].values():
+            total = [a + b for a, b in zip(total, valores)]
+
+        return self._contadores_rede(total)
+
+    def rede_por_interface(self) -> Dict[str, Dict[str, int]]:
+        """/proc/net/dev por interface, como psutil.net_io_counters(pernic=True)"""
+        return {
+            nome: self._contadores_rede(valores)
+            for nome, valores in self.dados["net_dev"].items()
+        }
+
+    @staticmethod
+    def _contadores_rede(valores: List[int]) -> Dict[str, int]:
+        """Mapeia as colunas de /proc/net/dev para os nomes do psutil"""
+        return {
+            "bytes_recv": valores[0], "packets_recv": valores[1],
+            "errin": valores[2], "dropin": valores[3],
+            "bytes_sent": valores[8], "packets_sent": valores[9],
+            "errout": valores[10], "dropout": valores[11]
+        }
+
+    def fechar(self):
+        """Fecha todos os arquivos mantidos abertos"""
+        for arquivo in self.arquivos.values():
+            arquivo.fechar()
+        self.arquivos.clear()
+
+        if self.arquivo_freq:
+            self.arquivo_freq.fechar()
+
+
+def diretorio_rede(raiz: str) -> Path:
+    """Diretório net do host: fora do /proc local usa o namespace do PID 1"""
+    # /host/proc/net aponta para self/net, que é o namespace do container
+    raiz = Path(raiz)
+    return raiz / "net" if raiz == Path("/proc") else raiz / "1" / "net"
+
+
+def criar_leitor_procfs(raiz: str = "/proc", raiz_sys: str = "/sys") -> Optional[LeitorProcFS]:
+    """Cria o backend procfs, ou None se o host não o suportar"""
+    if not LeitorProcFS.disponivel(raiz):
+        logger.warning("⚠️ Backend procfs indisponível, usando psutil")
+        return None
+
+    try:
+        return LeitorProcFS(raiz, raiz_sys)
+    except OSError as e:
+        logger.warning(f"⚠️ Falha ao abrir arquivos de {raiz}: {e}")
+        return None
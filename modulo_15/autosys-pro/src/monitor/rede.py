@@ -0,0 +1,378 @@
+# src/monitor/rede.py
+import os
+import socket
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from src.config import config
+from src.monitor.procfs import diretorio_rede
+from src.utils.logger import logger
+
+# Estados TCP como aparecem (em hexa) em /proc/net/tcp
+ESTADOS_TCP = {
+    b"01": "ESTABLISHED", b"02": "SYN_SENT", b"03": "SYN_RECV",
+    b"04": "FIN_WAIT1", b"05": "FIN_WAIT2", b"06": "TIME_WAIT",
+    b"07": "CLOSE", b"08": "CLOSE_WAIT", b"09": "LAST_ACK",
+    b"0A": "LISTEN", b"0B": "CLOSING", b"0C": "NEW_SYN_RECV"
+}
+
+
+class ContadorSockets:
+    """Conta sockets por estado e porta local lendo /proc/net em blocos"""
+
+    ARQUIVOS = ("tcp", "tcp6", "udp", "udp6")
+
+    def __init__(self, raiz: str = "/proc", tamanho_bloco: int = 256 * 1024,
+                 max_portas: int = 20):
+        self.raiz = diretorio_rede(raiz)
+        self.tamanho_bloco = tamanho_bloco
+        self.max_portas = max_portas
+
+    def disponivel(self) -> bool:
+        """Indica se /proc/net/tcp existe neste host"""
+        return (self.raiz / "tcp").exists()
+
+    def contar(self) -> Dict[str, Any]:
+        """Percorre as tabelas de sockets sem criar objetos por conexão"""
+        por_estado: Counter = Counter()
+        por_protocolo: Counter = Counter()
+        por_porta: Counter = Counter()
+        portas_listen = set()
+
+        for nome in self.ARQUIVOS:
+            protocolo = nome.rstrip("6")
+            for local, estado in self._ler_entradas(self.raiz / nome):
+                # UDP não tem LISTEN; "07" (CLOSE) é um socket não conectado
+                if protocolo == "udp":
+                    estado_nome = "ESTABLISHED" if estado == b"01" else "UNCONN"
+                else:
+                    estado_nome = ESTADOS_TCP.get(estado, "UNKNOWN")
+
+                porta = int(local[local.rindex(b":") + 1:], 16)
+                por_estado[estado_nome] += 1
+                por_protocolo[protocolo] += 1
+                por_porta[(protocolo, porta, estado_nome)] += 1
+
+                if estado_nome in ("LISTEN", "UNCONN"):
+                    portas_listen.add((protocolo, porta))
+
+        return {
+            "total": sum(por_protocolo.values()),
+            "por_estado": dict(por_estado),
+            "por_protocolo": dict(por_protocolo),
+            "portas": self._resumir_portas(por_porta, portas_listen)
+        }
+
+    def _ler_entradas(self, caminho: Path):
+        """Gera (endereço local, estado) lendo o arquivo em blocos"""
+        try:
+            arquivo = open(caminho, "rb", buffering=0)
+        except OSError:
+            return
+
+        with arquivo:
+            resto = b""
+            cabecalho = True
+
+            while True:
+                bloco = arquivo.read(self.tamanho_bloco)
+                if not bloco:
+                    break
+
+                linhas = (resto + bloco).split(b"\n")
+                resto = linhas.pop()
+
+                if cabecalho and linhas:
+                    linhas = linhas[1:]
+                    cabecalho = False
+
+                for linha in linhas:
+                    campos = linha.split(None, 4)
+                    if len(campos) >= 4:
+                        yield campos[1], campos[3]
+
+            campos = resto.split(None, 4)
+            if len(campos) >= 4 and not cabecalho:
+                yield campos[1], campos[3]
+
+    def _resumir_portas(self, por_porta: Counter, portas_listen: set) -> List[Dict[str, Any]]:
+        """Agrupa contagens por porta de serviço local (portas em LISTEN)"""
+        portas: Dict[tuple, Dict[str, int]] = {}
+
+        for (protocolo, porta, estado), total in por_porta.items():
+            if (protocolo, porta) not in portas_listen:
+                continue
+            portas.setdefault((protocolo, porta), {})[estado] = total
+
+        resumo = [
+            {"protocolo": protocolo, "porta": porta, "estados": estados,
+             "conexoes": sum(v for k, v in estados.items() if k not in ("LISTEN", "UNCONN"))}
+            for (protocolo, porta), estados in portas.items()
+        ]
+        resumo.sort(key=lambda p: p["conexoes"], reverse=True)
+
+        return resumo[:self.max_portas]
+
+
+# Grupos multicast de rtnetlink: links e endereços IPv4/IPv6
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+# Contadores por interface (nomes do psutil) usados nas taxas
+CONTADORES_REDE = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+                   "errin", "errout", "dropin", "dropout")
+LIMITE_32_BITS = 2 ** 32
+# Menor quadro Ethernet no fio (64 + preâmbulo e intervalo entre quadros):
+# limite de pacotes por segundo dado o link
+BYTES_POR_PACOTE_MINIMO = 84
+
+
+class InventarioInterfaces:
+    """Inventário de interfaces e endereços, relido só quando algo muda
+
+    Mudanças são detectadas por um socket rtnetlink não bloqueante (links
+    e endereços). Lendo o /sys de outro namespace (HOST_SYS), ou sem
+    netlink, compara a lista de /sys/class/net com os ifindex a cada ciclo
+    e relê tudo periodicamente para pegar troca de IP.
+    """
+
+    def __init__(self, raiz_sys: Optional[str] = None,
+                 intervalo_atualizacao: Optional[float] = None):
+        raiz_sys = raiz_sys or config.SYS_ROOT
+        self.raiz = Path(raiz_sys) / "class" / "net"
+        self.intervalo_atualizacao = intervalo_atualizacao or config.NETWORK_INVENTORY_REFRESH
+        self.interfaces: Dict[str, Dict[str, Any]] = {}
+        self._assinatura: Optional[frozenset] = None
+        self._ultima_atualizacao: Optional[float] = None
+        self._netlink = self._abrir_netlink() if raiz_sys == "/sys" else None
+
+        try:
+            import netifaces
+            self.netifaces = netifaces
+        except ImportError:
+            self.netifaces = None
+
+    def atualizar(self) -> Set[str]:
+        """Relê o inventário se houve mudança; retorna interfaces recriadas"""
+        if not self._mudou():
+            return set()
+
+        anteriores = {nome: info["ifindex"] for nome, info in self.interfaces.items()}
+        self.interfaces = self._ler_inventario()
+        self._assinatura = self._ler_assinatura()
+        self._ultima_atualizacao = time.monotonic()
+
+        # ifindex diferente = interface recriada: seus contadores recomeçaram
+        return {
+            nome for nome, info in self.interfaces.items()
+            if nome in anteriores and anteriores[nome] != info["ifindex"]
+        } | (set(anteriores) - set(self.interfaces))
+
+    def _mudou(self) -> bool:
+        """Indica se o inventário precisa ser relido"""
+        if self._ultima_atualizacao is None:
+            return True
+
+        if self._netlink is not None:
+            return self._drenar_netlink()
+
+        if time.monotonic() - self._ultima_atualizacao >= self.intervalo_atualizacao:
+            return True
+        return self._ler_assinatura() != self._assinatura
+
+    def _abrir_netlink(self) -> Optional[socket.socket]:
+        """Assina eventos de link/endereço do kernel (só Linux)"""
+        if not hasattr(socket, "AF_NETLINK"):
+            return None
+
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_NONBLOCK,
+                                 socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+            return sock
+        except OSError as e:
+            logger.info(f"ℹ️ netlink indisponível, inventário de rede por polling: {e}")
+            return None
+
+    def _drenar_netlink(self) -> bool:
+        """Consome os eventos pendentes; True se chegou algum"""
+        recebeu = False
+
+        while True:
+            try:
+                if not self._netlink.recv(65536):
+                    break
+                recebeu = True
+            except BlockingIOError:
+                break
+            except OSError:
+                # ENOBUFS: eventos perdidos, relê tudo por garantia
+                recebeu = True
+                break
+
+        return recebeu
+
+    def _ler_assinatura(self) -> frozenset:
+        """Pares (nome, ifindex) de /sys/class/net"""
+        assinatura = set()
+        try:
+            nomes = os.listdir(self.raiz)
+        except OSError:
+            return frozenset()
+
+        for nome in nomes:
+            assinatura.add((nome, self._ler_atributo(nome, "ifindex")))
+        return frozenset(assinatura)
+
+    def _ler_atributo(self, interface: str, atributo: str) -> Optional[str]:
+        """Lê um atributo de /sys/class/net/<interface>"""
+        try:
+            with open(self.raiz / interface / atributo) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _ler_inventario(self) -> Dict[str, Dict[str, Any]]:
+        """Nome, ifindex, estado, MTU, MAC e primeiro IPv4/IPv6 de cada interface"""
+        try:
+            nomes = sorted(os.listdir(self.raiz))
+        except OSError:
+            nomes = sorted(self.netifaces.interfaces()) if self.netifaces else []
+
+        inventario = {}
+        for nome in nomes:
+            mtu = self._ler_atributo(nome, "mtu")
+            # speed: Mbit/s; -1 ou erro de leitura em interfaces virtuais/sem link
+            velocidade = self._ler_atributo(nome, "speed")
+            info = {
+                "ifindex": self._ler_atributo(nome, "ifindex"),
+                "operstate": self._ler_atributo(nome, "operstate") or "unknown",
+                "mtu": int(mtu) if mtu and mtu.isdigit() else None,
+                "speed_mbps": int(velocidade) if velocidade and velocidade.isdigit()
+                and int(velocidade) > 0 else None,
+                "ipv4": "N/A",
+                "ipv6": "N/A",
+                "mac": self._ler_atributo(nome, "address") or "N/A"
+            }
+
+            if self.netifaces:
+                try:
+                    addrs = self.netifaces.ifaddresses(nome)
+                except ValueError:
+                    addrs = {}
+                info["ipv4"] = addrs.get(self.netifaces.AF_INET, [{}])[0].get('addr', 'N/A')
+                info["ipv6"] = addrs.get(self.netifaces.AF_INET6, [{}])[0].get('addr', 'N/A')
+
+            inventario[nome] = info
+
+        logger.info(f"🔌 Inventário de rede atualizado: {len(inventario)} interface(s)")
+        return inventario
+
+    def fechar(self):
+        """Fecha o socket netlink"""
+        if self._netlink is not None:
+            self._netlink.close()
+            self._netlink = None
+
+
+class TaxasInterfaces:
+    """Taxas por segundo por interface a partir de deltas dos contadores"""
+
+    def __init__(self):
+        # interface -> (instante, contadores) da amostra anterior
+        self._anterior: Dict[str, tuple] = {}
+        # Interfaces com algum contador já acima de 32 bits: nunca dão a volta
+        self._64_bits: Set[str] = set()
+
+    def calcular(self, contadores: Dict[str, Dict[str, int]],
+                 agora: Optional[float] = None,
+                 velocidades: Optional[Dict[str, Optional[int]]] = None
+                 ) -> Dict[str, Dict[str, float]]:
+        """Retorna {interface: {bytes_sent_s, ..., dropout_s}}
+
+        `velocidades` (Mbit/s por interface, do inventário) permite distinguir
+        a volta de um contador de 32 bits de um reset do contador.
+        """
+        agora = agora if agora is not None else time.monotonic()
+        velocidades = velocidades or {}
+        taxas = {}
+
+        for interface, valores in contadores.items():
+            anterior = self._anterior.get(interface)
+            self._anterior[interface] = (agora, valores)
+            if any(valores[campo] >= LIMITE_32_BITS for campo in CONTADORES_REDE):
+                self._64_bits.add(interface)
+
+            if anterior is None or agora <= anterior[0]:
+                continue
+
+            intervalo = agora - anterior[0]
+            maximo_bytes = (None if interface in self._64_bits
+                            else self._maximo_bytes(velocidades.get(interface), intervalo))
+            taxas[interface] = {}
+            for campo in CONTADORES_REDE:
+                maximo = maximo_bytes
+                if maximo is not None and not campo.startswith("bytes"):
+                    maximo /= BYTES_POR_PACOTE_MINIMO
+                delta = self._delta(anterior[1][campo], valores[campo], maximo)
+                taxas[interface][f"{campo}_s"] = round(delta / intervalo, 2)
+
+        # Esquece interfaces que sumiram
+        for interface in set(self._anterior) - set(contadores):
+            del self._anterior[interface]
+            self._64_bits.discard(interface)
+
+        return taxas
+
+    def esquecer(self, interfaces: Set[str]):
+        """Descarta a amostra anterior (interface recriada, contadores zerados)"""
+        for interface in interfaces:
+            self._anterior.pop(interface, None)
+            self._64_bits.discard(interface)
+
+    @staticmethod
+    def _maximo_bytes(velocidade_mbps: Optional[int], intervalo: float) -> Optional[float]:
+        """Bytes que o link consegue passar no intervalo (None sem velocidade)"""
+        if not velocidade_mbps:
+            return None
+        return velocidade_mbps * 1_000_000 / 8 * intervalo
+
+    @staticmethod
+    def _delta(anterior: int, atual: int, maximo_volta: Optional[float] = None) -> int:
+        """Diferença tolerante a volta de contador de 32 bits e a reset
+
+        Só é volta se a interface pode ter contadores de 32 bits (nenhum
+        passou de 2^32) e o delta com a volta cabe no que o link transmite
+        no intervalo (`maximo_volta`); caso contrário o contador foi zerado
+        (driver recarregado, interface reiniciada) e conta só o que veio depois.
+        """
+        if atual >= anterior:
+            return atual - anterior
+        volta = atual + LIMITE_32_BITS - anterior
+        if maximo_volta is not None and anterior < LIMITE_32_BITS and volta <= maximo_volta:
+            return volta
+        return atual
+
+
+def contar_conexoes_detalhadas() -> Dict[str, Any]:
+    """Modo detalhado: usa psutil.net_connections com resolução de pid"""
+    import psutil
+
+    por_estado: Counter = Counter()
+    por_pid: Counter = Counter()
+    total = 0
+
+    for conexao in psutil.net_connections(kind="inet"):
+        total += 1
+        por_estado[conexao.status] += 1
+        if conexao.pid:
+            por_pid[conexao.pid] += 1
+
+    return {
+        "total": total,
+        "por_estado": dict(por_estado),
+        "por_pid": [{"pid": pid, "conexoes": n} for pid, n in por_pid.most_common(10)]
+    }
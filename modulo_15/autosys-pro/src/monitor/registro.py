@@ -0,0 +1,70 @@
+# src/monitor/registro.py
+import importlib
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Type
+
+from src.config import config
+from src.monitor.coleta import ColetorBase, ContextoColeta
+from src.utils.logger import logger
+
+# Plugins de terceiros: [project.entry-points."autosys.coletores"] nome = "pacote.modulo:Classe"
+GRUPO_ENTRY_POINTS = "autosys.coletores"
+
+# Coletores nativos como "modulo:Classe"; o módulo só é importado se habilitado
+COLETORES_NATIVOS: Dict[str, str] = {
+    "cpu": "src.monitor.coletores:ColetorCPU",
+    "memory": "src.monitor.coletores:ColetorMemoria",
+    "disk": "src.monitor.coletores:ColetorDisco",
+    "network": "src.monitor.coletores:ColetorRede",
+    "processes": "src.monitor.processos:ColetorProcessos",
+    "services": "src.monitor.servicos:ColetorServicos",
+    "temperature": "src.monitor.coletores:ColetorTemperatura",
+    "cgroups": "src.monitor.cgroups:ColetorCgroups",
+    "probes": "src.monitor.servicos:ColetorSondas",
+}
+
+
+def descobrir_coletores() -> Dict[str, str]:
+    """Retorna {nome: 'modulo:Classe'} dos coletores nativos e dos plugins"""
+    caminhos = dict(COLETORES_NATIVOS)
+
+    try:
+        for ep in entry_points(group=GRUPO_ENTRY_POINTS):
+            # Nativos têm precedência: um plugin não substitui "cpu" por acidente
+            caminhos.setdefault(ep.name, ep.value)
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao listar plugins de coletores: {e}")
+
+    return caminhos
+
+
+def carregar_coletor(caminho: str) -> Type[ColetorBase]:
+    """Importa a classe de um coletor a partir de 'modulo:Classe'"""
+    modulo, _, classe = caminho.partition(":")
+    return getattr(importlib.import_module(modulo), classe)
+
+
+def criar_coletores(contexto: ContextoColeta,
+                    nomes: Optional[List[str]] = None) -> List[ColetorBase]:
+    """Instancia, na ordem do config, apenas os coletores habilitados"""
+    disponiveis = descobrir_coletores()
+    coletores = []
+
+    for nome in (nomes if nomes is not None else config.COLLECTORS):
+        caminho = disponiveis.get(nome)
+        if caminho is None:
+            logger.warning(f"⚠️ Coletor desconhecido: {nome}")
+            continue
+
+        try:
+            coletor = carregar_coletor(caminho)(contexto)
+        except ImportError as e:
+            # Dependência opcional ausente: desativa só este coletor
+            logger.warning(f"⚠️ Coletor '{nome}' desativado: {e}")
+            continue
+
+        coletor.nome = nome
+        coletores.append(coletor)
+
+    logger.info(f"📦 Coletores ativos: {', '.join(c.nome for c in coletores) or 'nenhum'}")
+    return coletores
@@ -0,0 +1,137 @@
+# src/monitor/sensores.py
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.config import config
+from src.monitor.procfs import ArquivoProc
+from src.utils.logger import logger
+
+
+@dataclass
+class Sensor:
+    """Sensor de temperatura hwmon descoberto (limites já convertidos para °C)"""
+
+    chip: str
+    label: str
+    arquivo: ArquivoProc  # temp*_input mantido aberto
+    high: Optional[float] = None
+    critical: Optional[float] = None
+
+
+class CacheSensores:
+    """Descobre os sensores de /sys/class/hwmon uma vez e relê só os temp*_input"""
+
+    def __init__(self, raiz: Optional[str] = None,
+                 intervalo_revarredura: Optional[float] = None):
+        self.raiz = Path(raiz or os.path.join(config.SYS_ROOT, "class", "hwmon"))
+        self.intervalo_revarredura = intervalo_revarredura or config.SENSORS_RESCAN_INTERVAL
+        self.sensores: List[Sensor] = []
+        self._dispositivos: frozenset = frozenset()
+        self._ultima_descoberta: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def disponivel(self) -> bool:
+        """Indica se há hwmon neste host"""
+        return self.raiz.is_dir()
+
+    def ler(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Lê as temperaturas no formato de psutil.sensors_temperatures()"""
+        with self._lock:
+            if self._precisa_redescobrir():
+                self._descobrir()
+
+            temps: Dict[str, List[Dict[str, Any]]] = {}
+            falhou = False
+
+            for sensor in self.sensores:
+                try:
+                    atual = int(sensor.arquivo.ler()) / 1000
+                except (OSError, ValueError):
+                    # Dispositivo removido ou sensor sem leitura no momento
+                    falhou = True
+                    continue
+
+                temps.setdefault(sensor.chip, []).append({
+                    "label": sensor.label,
+                    "current": atual,
+                    "high": sensor.high,
+                    "critical": sensor.critical
+                })
+
+            if falhou:
+                self._ultima_descoberta = None
+
+            return temps
+
+    def _precisa_redescobrir(self) -> bool:
+        """Redescobre no hotplug (lista de hwmonN mudou) ou na revarredura periódica"""
+        if self._ultima_descoberta is None:
+            return True
+        if time.monotonic() - self._ultima_descoberta >= self.intervalo_revarredura:
+            return True
+        return self._listar_dispositivos() != self._dispositivos
+
+    def _listar_dispositivos(self) -> frozenset:
+        """Nomes dos diretórios hwmonN (um único listdir)"""
+        try:
+            return frozenset(os.listdir(self.raiz))
+        except OSError:
+            return frozenset()
+
+    def _descobrir(self):
+        """Varre os chips hwmon e abre os temp*_input, cacheando label e limites"""
+        self.fechar()
+        self._dispositivos = self._listar_dispositivos()
+        self._ultima_descoberta = time.monotonic()
+
+        for dispositivo in sorted(self._dispositivos):
+            base = self.raiz / dispositivo
+            # Alguns drivers expõem os atributos em device/ em vez de no próprio hwmonN
+            if not (base / "name").exists() and (base / "device" / "name").exists():
+                base = base / "device"
+
+            chip = self._ler_texto(base / "name") or dispositivo
+
+            for entrada in sorted(base.glob("temp*_input")):
+                prefixo = entrada.name[:-len("_input")]
+                try:
+                    arquivo = ArquivoProc(entrada, 32)
+                except OSError:
+                    continue
+
+                self.sensores.append(Sensor(
+                    chip=chip,
+                    label=self._ler_texto(base / f"{prefixo}_label") or chip,
+                    arquivo=arquivo,
+                    high=self._ler_milicelsius(base / f"{prefixo}_max"),
+                    critical=self._ler_milicelsius(base / f"{prefixo}_crit")
+                ))
+
+        logger.info(f"🌡️ {len(self.sensores)} sensor(es) de temperatura em {len(self._dispositivos)} chip(s)")
+
+    @staticmethod
+    def _ler_texto(caminho: Path) -> Optional[str]:
+        """Lê um atributo de texto do sysfs (None se ausente)"""
+        try:
+            return caminho.read_text().strip() or None
+        except OSError:
+            return None
+
+    @classmethod
+    def _ler_milicelsius(cls, caminho: Path) -> Optional[float]:
+        """Lê um limite em m°C e converte para °C"""
+        texto = cls._ler_texto(caminho)
+        try:
+            return int(texto) / 1000 if texto else None
+        except ValueError:
+            return None
+
+    def fechar(self):
+        """Fecha os descritores dos sensores"""
+        for sensor in self.sensores:
+            sensor.arquivo.fechar()
+        self.sensores = []
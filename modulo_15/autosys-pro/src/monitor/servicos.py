@@ -0,0 +1,354 @@
+# src/monitor/servicos.py
+import asyncio
+import socket
+import ssl
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.config import config
+from src.monitor.coleta import ColetorBase, ContextoColeta
+from src.utils.logger import logger
+
+
+class VerificadorServicos:
+    """Verifica o estado de várias units do systemd em uma única chamada"""
+
+    PROPRIEDADES = ("Id", "LoadState", "ActiveState", "SubState")
+
+    def __init__(self, servicos: Optional[List[str]] = None,
+                 timeout: Optional[float] = None, ttl: Optional[float] = None):
+        self.servicos = list(servicos if servicos is not None else config.SERVICES)
+        self.timeout = timeout or config.SERVICES_TIMEOUT
+        self.ttl = ttl if ttl is not None else config.SERVICES_CACHE_TTL
+        self.cache: Dict[str, str] = {}
+        self.detalhes: Dict[str, Dict[str, str]] = {}
+        self._cache_ts: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def verificar(self) -> Dict[str, str]:
+        """Retorna {serviço: ActiveState}, reaproveitando o cache dentro do TTL"""
+        async with self._lock:
+            if self._cache_valido():
+                return self.cache
+
+            try:
+                blocos = await self._systemctl_show(
+                    [self._nome_unit(s) for s in self.servicos]
+                )
+            except FileNotFoundError:
+                logger.warning("⚠️ systemctl não encontrado, serviços como 'unknown'")
+                blocos = []
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ systemctl show excedeu {self.timeout}s")
+                # Mantém o último resultado conhecido
+                return self.cache or {s: "unknown" for s in self.servicos}
+
+            # systemctl show imprime um bloco por unit, na ordem pedida
+            self.detalhes = dict(zip(self.servicos, blocos))
+            self.cache = {
+                servico: self.detalhes.get(servico, {}).get("ActiveState", "unknown")
+                for servico in self.servicos
+            }
+            self._cache_ts = time.monotonic()
+
+            return self.cache
+
+    def _cache_valido(self) -> bool:
+        """Indica se o cache ainda está dentro do TTL"""
+        return (self._cache_ts is not None
+                and time.monotonic() - self._cache_ts < self.ttl)
+
+    @staticmethod
+    def _nome_unit(servico: str) -> str:
+        """Completa o sufixo .service quando omitido"""
+        return servico if "." in servico else f"{servico}.service"
+
+    async def _systemctl_show(self, units: List[str]) -> List[Dict[str, str]]:
+        """Executa um único 'systemctl show' para todas as units"""
+        if not units:
+            return []
+
+        processo = await asyncio.create_subprocess_exec(
+            "systemctl", "show", "--no-pager",
+            f"--property={','.join(self.PROPRIEDADES)}",
+            *units,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+
+        try:
+            saida, _ = await asyncio.wait_for(processo.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            processo.kill()
+            await processo.wait()
+            raise
+
+        return self._parse_show(saida.decode(errors="replace"))
+
+    @staticmethod
+    def _parse_show(saida: str) -> List[Dict[str, str]]:
+        """Divide a saída de 'systemctl show' em um dict por unit"""
+        blocos = []
+
+        for bloco in saida.strip().split("\n\n"):
+            propriedades = {}
+            for linha in bloco.splitlines():
+                chave, _, valor = linha.partition("=")
+                propriedades[chave] = valor
+            if propriedades:
+                blocos.append(propriedades)
+
+        return blocos
+
+
+@dataclass
+class Sonda:
+    """Verificação ativa de um alvo (tcp, http ou tls)"""
+
+    nome: str
+    tipo: str  # tcp | http | tls
+    alvo: str  # host:porta para tcp/tls, URL para http
+    intervalo: float = 30.0
+    timeout: float = 5.0
+    status_esperado: Optional[int] = None  # http: None aceita qualquer < 400
+    proxima_execucao: float = 0.0
+    em_execucao: bool = False
+    resultado: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def host_porta(self) -> Tuple[str, int]:
+        """Separa host e porta (aceita [ipv6]:porta)"""
+        host, _, porta = self.alvo.rpartition(":")
+        return host.strip("[]"), int(porta)
+
+
+class CacheDNS:
+    """Cache de resolução de nomes com TTL fixo"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entradas: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+
+    async def resolver(self, host: str, porta: int) -> List[tuple]:
+        """Retorna endereços (family, sockaddr), consultando o DNS só após o TTL"""
+        chave = (host, porta)
+        entrada = self._entradas.get(chave)
+        agora = time.monotonic()
+
+        if entrada and entrada[0] > agora:
+            return entrada[1]
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, porta, type=socket.SOCK_STREAM)
+        enderecos = [(family, sockaddr) for family, _, _, _, sockaddr in infos]
+        self._entradas[chave] = (agora + self.ttl, enderecos)
+
+        return enderecos
+
+
+class MotorSondas:
+    """Executa sondas TCP/HTTP/TLS concorrentes com limite global"""
+
+    def __init__(self, sondas: Optional[List[Dict[str, Any]]] = None,
+                 max_concorrencia: Optional[int] = None,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        definicoes = sondas if sondas is not None else config.PROBES
+        self.sondas: Dict[str, Sonda] = {d["nome"]: Sonda(**d) for d in definicoes}
+        self.max_concorrencia = max_concorrencia or config.PROBES_CONCURRENCY
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.dns = CacheDNS(config.PROBES_DNS_TTL)
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._sessao = None  # aiohttp.ClientSession, criada na primeira sonda http
+        self._tarefas: set = set()
+
+    async def executar_pendentes(self) -> Dict[str, Dict[str, Any]]:
+        """Dispara as sondas vencidas e retorna o último resultado de todas"""
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concorrencia)
+
+        agora = time.monotonic()
+
+        # As sondas rodam em segundo plano: o ciclo de coleta não espera
+        # pelos timeouts, só lê o último resultado de cada uma
+        for sonda in self.sondas.values():
+            if sonda.em_execucao or sonda.proxima_execucao > agora:
+                continue
+
+            sonda.em_execucao = True
+            sonda.proxima_execucao = agora + sonda.intervalo
+            tarefa = asyncio.create_task(self._executar(sonda))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+        return {nome: sonda.resultado for nome, sonda in self.sondas.items()
+                if sonda.resultado}
+
+    async def aguardar(self):
+        """Aguarda as sondas em andamento (útil em testes e no shutdown)"""
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+
+    async def _executar(self, sonda: Sonda):
+        """Executa uma sonda respeitando o limite de concorrência"""
+        try:
+            await self._executar_sonda(sonda)
+        finally:
+            sonda.em_execucao = False
+
+    async def _executar_sonda(self, sonda: Sonda):
+        """Mede a sonda e guarda o resultado"""
+        async with self._semaforo:
+            inicio = time.perf_counter()
+            resultado: Dict[str, Any] = {"tipo": sonda.tipo, "alvo": sonda.alvo}
+
+            try:
+                if sonda.tipo == "tcp":
+                    await asyncio.wait_for(self._sonda_tcp(sonda), sonda.timeout)
+                elif sonda.tipo == "http":
+                    resultado.update(await self._sonda_http(sonda))
+                elif sonda.tipo == "tls":
+                    resultado.update(
+                        await asyncio.wait_for(self._sonda_tls(sonda), sonda.timeout)
+                    )
+                else:
+                    raise ValueError(f"Tipo de sonda desconhecido: {sonda.tipo}")
+
+                resultado.setdefault("ok", True)
+
+            except asyncio.TimeoutError:
+                resultado.update({"ok": False, "erro": f"timeout ({sonda.timeout}s)"})
+            except Exception as e:
+                resultado.update({"ok": False, "erro": str(e) or type(e).__name__})
+
+            resultado["latencia_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+            resultado["timestamp"] = datetime.now().isoformat()
+            sonda.resultado = resultado
+
+    async def _conectar(self, sonda: Sonda, **kwargs):
+        """Abre conexão usando o cache de DNS (tenta cada endereço)"""
+        host, porta = sonda.host_porta
+        ultimo_erro: Optional[Exception] = None
+
+        for family, sockaddr in await self.dns.resolver(host, porta):
+            try:
+                return await asyncio.open_connection(
+                    sockaddr[0], sockaddr[1], family=family, **kwargs
+                )
+            except OSError as e:
+                ultimo_erro = e
+
+        raise ultimo_erro or OSError(f"Sem endereços para {host}")
+
+    async def _sonda_tcp(self, sonda: Sonda):
+        """Conexão TCP simples"""
+        _, writer = await self._conectar(sonda)
+        writer.close()
+        await writer.wait_closed()
+
+    async def _sonda_tls(self, sonda: Sonda) -> Dict[str, Any]:
+        """Handshake TLS e dias até a expiração do certificado"""
+        host, _ = sonda.host_porta
+        _, writer = await self._conectar(
+            sonda, ssl=self.ssl_context, server_hostname=host
+        )
+
+        try:
+            certificado = writer.get_extra_info("peercert") or {}
+        finally:
+            writer.close()
+
+        resultado: Dict[str, Any] = {}
+        if "notAfter" in certificado:
+            expira = ssl.cert_time_to_seconds(certificado["notAfter"])
+            dias = (expira - time.time()) / 86400
+            resultado["dias_para_expirar"] = round(dias, 1)
+
+            if dias < config.PROBES_CERT_WARN_DAYS:
+                resultado["ok"] = False
+                resultado["erro"] = f"certificado expira em {dias:.0f} dias"
+
+        return resultado
+
+    async def _sonda_http(self, sonda: Sonda) -> Dict[str, Any]:
+        """GET HTTP reaproveitando conexões da sessão compartilhada"""
+        import aiohttp
+
+        sessao = self._obter_sessao()
+
+        async with sessao.get(
+            sonda.alvo,
+            timeout=aiohttp.ClientTimeout(total=sonda.timeout),
+            allow_redirects=False
+        ) as resposta:
+            status = resposta.status
+
+        if sonda.status_esperado is not None:
+            ok = status == sonda.status_esperado
+        else:
+            ok = status < 400
+
+        resultado: Dict[str, Any] = {"ok": ok, "status": status}
+        if not ok:
+            resultado["erro"] = f"HTTP {status}"
+
+        return resultado
+
+    def _obter_sessao(self):
+        """Sessão HTTP única: keep-alive e cache de DNS do aiohttp"""
+        import aiohttp
+
+        if self._sessao is None or self._sessao.closed:
+            conector = aiohttp.TCPConnector(
+                limit=self.max_concorrencia,
+                ttl_dns_cache=config.PROBES_DNS_TTL,
+                ssl=self.ssl_context
+            )
+            self._sessao = aiohttp.ClientSession(connector=conector)
+
+        return self._sessao
+
+    async def fechar(self):
+        """Cancela sondas pendentes e fecha a sessão HTTP"""
+        for tarefa in list(self._tarefas):
+            tarefa.cancel()
+
+        if self._sessao and not self._sessao.closed:
+            await self._sessao.close()
+
+
+class ColetorServicos(ColetorBase):
+    """Coleta status de serviços do sistema"""
+
+    nome = "services"
+    metricas = ("<servico>",)
+    custo = "alto"
+    intervalo = 60
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        self.verificador = VerificadorServicos()
+
+    async def coletar(self) -> Dict[str, str]:
+        return await self.verificador.verificar()
+
+
+class ColetorSondas(ColetorBase):
+    """Executa as sondas ativas (TCP/HTTP/TLS) vencidas"""
+
+    nome = "probes"
+    metricas = ("<sonda>",)
+    custo = "medio"
+    # Cada sonda tem seu próprio intervalo; o coletor roda todo tick
+    intervalo = 0
+
+    def __init__(self, contexto: ContextoColeta):
+        super().__init__(contexto)
+        self.motor = MotorSondas()
+
+    async def coletar(self) -> Dict[str, Dict[str, Any]]:
+        return await self.motor.executar_pendentes()
+
+    async def fechar(self):
+        await self.motor.fechar()
@@ -1,260 +1,127 @@
 # src/monitor/sistema.py
-import psutil
-import platform
 import asyncio
-from datetime import datetime
-from typing import Dict, Any, List, Optional
-import subprocess
+import inspect
+import os
 import socket
-import netifaces
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
 from src.config import config
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.monitor.coleta import MotorColeta, ContextoColeta, importar_psutil
+from src.monitor.cpu import amostrador_cpu
+from src.monitor.registro import criar_coletores
+from src.monitor.snapshot import MetricSnapshot
 
 
 class SistemaMonitor:
     """Monitor avançado de recursos do sistema"""
 
     def __init__(self):
+        uname = os.uname()
         self.hostname = socket.gethostname()
-        self.sistema = platform.system()
-        self.versao = platform.release()
-        self.processadores = psutil.cpu_count()
-        self.memoria_total = psutil.virtual_memory().total / (1024 ** 3)
+        self.sistema = uname.sysname
+        self.versao = uname.release
+        self.processadores = os.cpu_count() or 1
+
+        # Backend nativo opcional: lê /proc uma vez por ciclo para todos os coletores
+        self.procfs = None
+        if config.COLLECTOR_BACKEND == "procfs":
+            from src.monitor.procfs import criar_leitor_procfs
+            self.procfs = criar_leitor_procfs(config.PROC_ROOT, config.SYS_ROOT)
+
+        # Só os coletores listados em COLLECTORS são importados e instanciados
+        self.contexto = ContextoColeta(procfs=self.procfs, processadores=self.processadores)
+        self.coletores = criar_coletores(self.contexto)
+
+        # Coletores executados concorrentemente no thread pool, cada um
+        # no seu próprio intervalo (MONITOR_INTERVAL é o tick base)
+        self.motor = MotorColeta()
+        for coletor in self.coletores:
+            self.motor.registrar_coletor(coletor)
+
+        # Gauge de CPU do /metrics: estado de delta próprio no amostrador
+        metrics.set_cpu_sampler(lambda: amostrador_cpu.amostrar("prometheus").get("percent", 0.0))
+
+    async def _executar_coletores(self) -> Tuple[Dict[str, Any], float]:
+        """Roda o motor (e a leitura do /proc, se ativa); retorna a coleta e a duração em ms"""
+        inicio = time.perf_counter()
+
+        if self.procfs:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.motor.executor, self.procfs.atualizar)
+
+        coleta = await self.motor.executar()
+        return coleta, round((time.perf_counter() - inicio) * 1000, 2)
+
+    async def coletar_snapshot(self) -> Tuple[MetricSnapshot, Dict[str, Any]]:
+        """Coleta do ciclo de monitoramento: snapshot + resultados por coletor
+
+        O núcleo é preenchido direto dos resultados dos coletores, sem montar
+        o dict aninhado de coletar_tudo(); alertas e TSDB usam os resultados.
+        """
+        coleta, duracao_ms = await self._executar_coletores()
+        resultados = coleta["resultados"]
+        snapshot = MetricSnapshot.de_resultados(
+            resultados, self.hostname, datetime.now(), duracao_ms=duracao_ms,
+            erros=coleta["erros"], uptime=self._get_uptime()
+        )
+        return snapshot, resultados
 
     async def coletar_tudo(self) -> Dict[str, Any]:
         """Coleta todas as métricas do sistema"""
+        coleta, duracao_ms = await self._executar_coletores()
+        resultados = coleta["resultados"]
+
         metrics = {
             "timestamp": datetime.now().isoformat(),
             "hostname": self.hostname,
             "uptime": self._get_uptime(),
-            "cpu": await self._coletar_cpu(),
-            "memory": await self._coletar_memoria(),
-            "disk": await self._coletar_disco(),
-            "network": await self._coletar_rede(),
-            "processes": await self._coletar_processos(),
-            "services": await self._coletar_servicos(),
-            "temperature": await self._coletar_temperatura(),
-            "io_stats": await self._coletar_io()
+            **resultados,
+            "io_stats": self._montar_io(resultados),
+            "coleta": {
+                "duracao_ms": duracao_ms,
+                "latencias_ms": coleta["latencias_ms"],
+                "erros": coleta["erros"],
+                "idades_s": coleta["idades_s"]
+            }
         }
 
         return metrics
 
-    async def _coletar_cpu(self) -> Dict[str, Any]:
-        """Coleta métricas detalhadas de CPU"""
-        cpu_percent = psutil.cpu_percent(interval=1, percpu=True)
-        cpu_freq = psutil.cpu_freq()
-
-        return {
-            "percent": psutil.cpu_percent(interval=1),
-            "per_core": cpu_percent,
-            "count": self.processadores,
-            "frequency_current": cpu_freq.current if cpu_freq else 0,
-            "frequency_max": cpu_freq.max if cpu_freq else 0,
-            "load_avg": [x / psutil.cpu_count() * 100 for x in psutil.getloadavg()],
-            "stats": {
-                "ctx_switches": psutil.cpu_stats().ctx_switches,
-                "interrupts": psutil.cpu_stats().interrupts,
-                "soft_interrupts": psutil.cpu_stats().soft_interrupts
-            }
-        }
+    @staticmethod
+    def _montar_io(resultados: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta estatísticas de I/O a partir dos contadores já coletados"""
+        net_total = resultados.get("network", {}).get("total", {})
+        disk_io = resultados.get("disk", {}).get("io", {})
 
-    async def _coletar_memoria(self) -> Dict[str, Any]:
-        """Coleta métricas detalhadas de memória"""
-        mem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        if not net_total or not disk_io:
+            return {}
 
         return {
-            "total_gb": mem.total / (1024 ** 3),
-            "available_gb": mem.available / (1024 ** 3),
-            "used_gb": mem.used / (1024 ** 3),
-            "free_gb": mem.free / (1024 ** 3),
-            "percent": mem.percent,
-            "swap": {
-                "total_gb": swap.total / (1024 ** 3),
-                "used_gb": swap.used / (1024 ** 3),
-                "free_gb": swap.free / (1024 ** 3),
-                "percent": swap.percent
+            "network": {
+                "bytes_sent": net_total["bytes_sent"],
+                "bytes_recv": net_total["bytes_recv"]
+            },
+            "disk": {
+                "read_bytes": disk_io["read_bytes"],
+                "write_bytes": disk_io["write_bytes"]
             }
         }
 
-    async def _coletar_disco(self) -> Dict[str, Any]:
-        """Coleta métricas detalhadas de disco"""
-        disk_usage = {}
-        disk_io = {}
-
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                disk_usage[partition.device] = {
-                    "mountpoint": partition.mountpoint,
-                    "fstype": partition.fstype,
-                    "total_gb": usage.total / (1024 ** 3),
-                    "used_gb": usage.used / (1024 ** 3),
-                    "free_gb": usage.free / (1024 ** 3),
-                    "percent": usage.percent
-                }
-            except:
-                continue
-
-        try:
-            io_counters = psutil.disk_io_counters()
-            if io_counters:
-                disk_io = {
-                    "read_count": io_counters.read_count,
-                    "write_count": io_counters.write_count,
-                    "read_bytes_gb": io_counters.read_bytes / (1024 ** 3),
-                    "write_bytes_gb": io_counters.write_bytes / (1024 ** 3),
-                    "read_time_ms": io_counters.read_time,
-                    "write_time_ms": io_counters.write_time
-                }
-        except:
-            pass
-
-        return {
-            "usage": disk_usage,
-            "io": disk_io,
-            "total_percent": psutil.disk_usage('/').percent
-        }
-
-    async def _coletar_rede(self) -> Dict[str, Any]:
-        """Coleta métricas detalhadas de rede"""
-        network_stats = {}
-
-        # Interfaces de rede
-        for interface in netifaces.interfaces():
-            addrs = netifaces.ifaddresses(interface)
-            network_stats[interface] = {
-                "ipv4": addrs.get(netifaces.AF_INET, [{}])[0].get('addr', 'N/A'),
-                "ipv6": addrs.get(netifaces.AF_INET6, [{}])[0].get('addr', 'N/A'),
-                "mac": addrs.get(netifaces.AF_LINK, [{}])[0].get('addr', 'N/A')
-            }
-
-        # IO de rede
-        try:
-            net_io = psutil.net_io_counters()
-            network_stats["total"] = {
-                "bytes_sent_gb": net_io.bytes_sent / (1024 ** 3),
-                "bytes_recv_gb": net_io.bytes_recv / (1024 ** 3),
-                "packets_sent": net_io.packets_sent,
-                "packets_recv": net_io.packets_recv,
-                "errin": net_io.errin,
-                "errout": net_io.errout,
-                "dropin": net_io.dropin,
-                "dropout": net_io.dropout
-            }
-        except:
-            pass
-
-        # Conexões ativas
-        try:
-            connections = psutil.net_connections()
-            network_stats["connections_count"] = len(connections)
-            network_stats["connections_established"] = len([
-                c for c in connections if c.status == 'ESTABLISHED'
-            ])
-            network_stats["connections_listening"] = len([
-                c for c in connections if c.status == 'LISTEN'
-            ])
-        except:
-            pass
-
-        return network_stats
-
-    async def _coletar_processos(self) -> Dict[str, Any]:
-        """Coleta informações sobre processos"""
-        processos = []
-        top_processos = []
-
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-            try:
-                pinfo = proc.info
-                processos.append(pinfo)
-
-                # Top 10 processos por CPU
-                if pinfo['cpu_percent'] > 0:
-                    top_processos.append(pinfo)
-            except:
-                pass
-
-        # Ordena top processos
-        top_processos.sort(key=lambda x: x['cpu_percent'], reverse=True)
-
-        return {
-            "total": len(processos),
-            "running": len([p for p in processos if p['status'] == 'running']),
-            "sleeping": len([p for p in processos if p['status'] == 'sleeping']),
-            "zombie": len([p for p in processos if p['status'] == 'zombie']),
-            "top_cpu": top_processos[:5],
-            "top_memory": sorted(processos, key=lambda x: x['memory_percent'], reverse=True)[:5]
-        }
-
-    async def _coletar_servicos(self) -> Dict[str, Any]:
-        """Coleta status de serviços do sistema"""
-        servicos = {}
-
-        # Serviços críticos para monitorar
-        servicos_criticos = ['ssh', 'docker', 'nginx', 'postgresql', 'mysql', 'redis']
-
-        for servico in servicos_criticos:
-            try:
-                result = subprocess.run(
-                    f"systemctl is-active {servico}",
-                    shell=True,
-                    capture_output=True,
-                    text=True
-                )
-                servicos[servico] = result.stdout.strip()
-            except:
-                servicos[servico] = "unknown"
-
-        return servicos
-
-    async def _coletar_temperatura(self) -> Dict[str, Any]:
-        """Coleta temperatura do sistema"""
-        temps = {}
-
-        try:
-            if hasattr(psutil, "sensors_temperatures"):
-                sensors = psutil.sensors_temperatures()
-                for name, entries in sensors.items():
-                    temps[name] = [
-                        {
-                            "label": entry.label or name,
-                            "current": entry.current,
-                            "high": entry.high,
-                            "critical": entry.critical
-                        }
-                        for entry in entries
-                    ]
-        except:
-            pass
-
-        return temps
-
-    async def _coletar_io(self) -> Dict[str, Any]:
-        """Coleta estatísticas de I/O"""
-        try:
-            io_counters = psutil.net_io_counters()
-            disk_io = psutil.disk_io_counters()
-
-            return {
-                "network": {
-                    "bytes_sent": io_counters.bytes_sent,
-                    "bytes_recv": io_counters.bytes_recv
-                },
-                "disk": {
-                    "read_bytes": disk_io.read_bytes,
-                    "write_bytes": disk_io.write_bytes
-                }
-            }
-        except:
-            return {}
-
     def _get_uptime(self) -> str:
         """Retorna tempo de atividade do sistema"""
-        uptime_seconds = int(psutil.boot_time())
-        from datetime import datetime, timedelta
-        uptime = datetime.now() - datetime.fromtimestamp(uptime_seconds)
+        if self.procfs and self.procfs.dados:
+            segundos = self.procfs.dados["uptime"]
+        else:
+            try:
+                with open(os.path.join(config.PROC_ROOT, "uptime"), "rb") as f:
+                    segundos = float(f.read().split()[0])
+            except (OSError, ValueError, IndexError):
+                segundos = time.time() - importar_psutil().boot_time()
+
+        uptime = timedelta(seconds=segundos)
 
         days = uptime.days
         hours = uptime.seconds // 3600
@@ -265,8 +132,25 @@ class SistemaMonitor:
         else:
             return f"{hours}h {minutes}m"
 
+    async def fechar(self):
+        """Libera os coletores e encerra o motor de coleta"""
+        for coletor in self.coletores:
+            try:
+                resultado = coletor.fechar()
+                # Coletores async (sondas) fecham sessões no event loop
+                if inspect.isawaitable(resultado):
+                    await resultado
+            except Exception as e:
+                logger.error(f"Erro ao fechar coletor '{coletor.nome}': {e}")
+
+        if self.procfs:
+            self.procfs.fechar()
+
+        self.motor.fechar()
+
+    @metrics.instrument_self("verificar_alertas")
     async def verificar_alertas(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Verifica thresholds e gera alertas"""
+        """Verifica thresholds e gera alertas (resultados dos coletores ou dict de coletar_tudo)"""
         alertas = []
 
         # CPU
@@ -302,6 +186,17 @@ class SistemaMonitor:
                 "threshold": config.DISK_ALERT_THRESHOLD
             })
 
+        # Sondas ativas com falha
+        for nome, sonda in metrics.get("probes", {}).items():
+            if not sonda.get("ok", True):
+                alertas.append({
+                    "tipo": "servico_parado",
+                    "severidade": "alta",
+                    "mensagem": f"🔴 Serviço {nome} falhou na sonda {sonda.get('tipo')}: "
+                                f"{sonda.get('erro', 'desconhecido')}",
+                    "detalhes": {"servico": nome, **sonda}
+                })
+
         # Processos zombie
         zombie_count = metrics.get("processes", {}).get("zombie", 0)
         if zombie_count > 0:
@@ -0,0 +1,241 @@
+# src/monitor/snapshot.py
+import json
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+# Núcleo numérico de esquema fixo: cada campo ocupa uma posição de um array('d')
+CAMPOS_NUCLEO = (
+    "timestamp",  # epoch em segundos
+    "cpu_percent", "cpu_iowait", "cpu_steal",
+    "load_avg_1min", "load_avg_5min", "load_avg_15min",
+    "memory_percent", "memory_available_gb", "swap_percent",
+    "disk_percent", "disk_read_bytes", "disk_write_bytes",
+    "net_bytes_sent", "net_bytes_recv", "net_bytes_sent_s", "net_bytes_recv_s",
+    "processes_total", "processes_running", "processes_zombie",
+    "connections_total", "connections_established",
+    "hour_of_day", "day_of_week",
+    "sample_interval", "coleta_ms"
+)
+INDICE_NUCLEO = {campo: i for i, campo in enumerate(CAMPOS_NUCLEO)}
+
+# Onde cada campo do núcleo está nos resultados dos coletores (a primeira
+# chave é o nome do coletor; o dict de coletar_tudo() tem a mesma forma)
+CAMINHOS_NUCLEO: Dict[str, Tuple] = {
+    "cpu_percent": ("cpu", "percent"),
+    "cpu_iowait": ("cpu", "iowait"),
+    "cpu_steal": ("cpu", "steal"),
+    "load_avg_1min": ("cpu", "load_avg", 0),
+    "load_avg_5min": ("cpu", "load_avg", 1),
+    "load_avg_15min": ("cpu", "load_avg", 2),
+    "memory_percent": ("memory", "percent"),
+    "memory_available_gb": ("memory", "available_gb"),
+    "swap_percent": ("memory", "swap", "percent"),
+    "disk_percent": ("disk", "total_percent"),
+    "disk_read_bytes": ("disk", "io", "read_bytes"),
+    "disk_write_bytes": ("disk", "io", "write_bytes"),
+    "net_bytes_sent": ("network", "total", "bytes_sent"),
+    "net_bytes_recv": ("network", "total", "bytes_recv"),
+    "net_bytes_sent_s": ("network", "total", "bytes_sent_s"),
+    "net_bytes_recv_s": ("network", "total", "bytes_recv_s"),
+    "processes_total": ("processes", "total"),
+    "processes_running": ("processes", "running"),
+    "processes_zombie": ("processes", "zombie"),
+    "connections_total": ("network", "connections_count"),
+    "connections_established": ("network", "connections_established"),
+}
+
+# Processos guardados por ranking na seção variável: [pid, nome, valor]
+TOP_PROCESSOS = {"top_cpu": "cpu_percent", "top_memory": "memory_percent", "top_io": "io_bytes_s"}
+
+# Campos do núcleo também gravados como colunas tipadas da tabela metrics
+# (features do preditor); o nome da coluna é o nome do campo
+COLUNAS_TIPADAS = (
+    "load_avg_1min", "load_avg_5min", "load_avg_15min",
+    "processes_total", "connections_total",
+    "hour_of_day", "day_of_week"
+)
+
+# Colunas da tabela metrics preenchidas por to_row(), na ordem
+COLUNAS_LINHA = ("timestamp", "cpu", "memory", "disk", "details", "sample_interval") + COLUNAS_TIPADAS
+
+VERSAO_JSON = 1
+NAN = float("nan")
+
+
+def _extrair(metrics: Dict[str, Any], caminho: Tuple) -> float:
+    """Segue o caminho no dict aninhado (NaN se o coletor não produziu o valor)"""
+    valor: Any = metrics
+    try:
+        for chave in caminho:
+            valor = valor[chave]
+        return float(valor)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return NAN
+
+
+def _extras(resultados: Dict[str, Any], erros: Optional[Dict[str, str]],
+            uptime: Optional[str]) -> Dict[str, Any]:
+    """Seção variável: o que não cabe no núcleo e interessa guardar"""
+    extras: Dict[str, Any] = {}
+    if uptime:
+        extras["uptime"] = uptime
+    if erros:
+        extras["erros_coleta"] = erros
+
+    por_nucleo = resultados.get("cpu", {}).get("per_core")
+    if por_nucleo:
+        extras["per_core"] = por_nucleo
+
+    processos = resultados.get("processes", {})
+    top = {
+        ranking: [[p.get("pid"), p.get("name"), p.get(campo)] for p in processos[ranking]]
+        for ranking, campo in TOP_PROCESSOS.items() if processos.get(ranking)
+    }
+    if top:
+        extras["top_processos"] = top
+
+    servicos = resultados.get("services")
+    if servicos:
+        extras["servicos"] = servicos
+
+    falhando = [nome for nome, sonda in resultados.get("probes", {}).items()
+                if not sonda.get("ok", True)]
+    if falhando:
+        extras["sondas_falhando"] = falhando
+    return extras
+
+
+class MetricSnapshot:
+    """Amostra compacta de um ciclo: núcleo numérico fixo + seção variável pequena
+
+    O núcleo é um array('d') contíguo; to_vector() o expõe ao numpy sem cópia.
+    Valores ausentes (coletor desativado ou ainda sem amostra) ficam NaN.
+    """
+
+    __slots__ = ("nucleo", "hostname", "extras")
+
+    def __init__(self, nucleo: Optional[array] = None, hostname: str = "",
+                 extras: Optional[Dict[str, Any]] = None):
+        self.nucleo = nucleo if nucleo is not None else array("d", [NAN]) * len(CAMPOS_NUCLEO)
+        self.hostname = hostname
+        self.extras = extras if extras is not None else {}
+
+    @classmethod
+    def de_resultados(cls, resultados: Dict[str, Any], hostname: str = "",
+                      momento: Optional[datetime] = None,
+                      duracao_ms: Optional[float] = None,
+                      erros: Optional[Dict[str, str]] = None,
+                      uptime: Optional[str] = None,
+                      intervalo: Optional[float] = None) -> "MetricSnapshot":
+        """Preenche o núcleo direto dos resultados dos coletores
+
+        Caminho do ciclo de monitoramento: não passa pelo dict aninhado
+        de coletar_tudo().
+        """
+        nucleo = array("d", [NAN]) * len(CAMPOS_NUCLEO)
+        for campo, caminho in CAMINHOS_NUCLEO.items():
+            nucleo[INDICE_NUCLEO[campo]] = _extrair(resultados, caminho)
+
+        momento = momento or datetime.now()
+        nucleo[INDICE_NUCLEO["timestamp"]] = momento.timestamp()
+        nucleo[INDICE_NUCLEO["hour_of_day"]] = momento.hour
+        nucleo[INDICE_NUCLEO["day_of_week"]] = momento.weekday()
+        if duracao_ms is not None:
+            nucleo[INDICE_NUCLEO["coleta_ms"]] = duracao_ms
+        if intervalo is not None:
+            nucleo[INDICE_NUCLEO["sample_interval"]] = intervalo
+
+        return cls(nucleo, hostname, _extras(resultados, erros, uptime))
+
+    @classmethod
+    def from_metrics(cls, metrics: Dict[str, Any],
+                     intervalo: Optional[float] = None) -> "MetricSnapshot":
+        """Extrai o núcleo e a seção variável do dict de coletar_tudo()"""
+        try:
+            momento = datetime.fromisoformat(metrics["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            momento = None
+
+        coleta = metrics.get("coleta", {})
+        return cls.de_resultados(
+            metrics, metrics.get("hostname", ""), momento,
+            duracao_ms=coleta.get("duracao_ms"), erros=coleta.get("erros"),
+            uptime=metrics.get("uptime"), intervalo=intervalo
+        )
+
+    def __getitem__(self, campo: str) -> float:
+        return self.nucleo[INDICE_NUCLEO[campo]]
+
+    def __setitem__(self, campo: str, valor: float):
+        self.nucleo[INDICE_NUCLEO[campo]] = valor
+
+    def get(self, campo: str, padrao: float = 0.0) -> float:
+        """Valor do campo, ou o padrão se ausente (NaN)"""
+        valor = self.nucleo[INDICE_NUCLEO[campo]]
+        return padrao if math.isnan(valor) else valor
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.nucleo[0])
+
+    def to_vector(self, campos: Optional[Sequence[str]] = None):
+        """Núcleo como np.ndarray float64 (view sem cópia; subconjunto copia)"""
+        import numpy as np
+
+        vetor = np.frombuffer(self.nucleo, dtype=np.float64)
+        if campos is None:
+            return vetor
+        return vetor[[INDICE_NUCLEO[c] for c in campos]]
+
+    def to_row(self) -> Tuple:
+        """Valores para COLUNAS_LINHA da tabela metrics
+
+        O timestamp vai explícito, em UTC no formato do CURRENT_TIMESTAMP do
+        SQLite: com a fila de escrita, o default seria a hora do commit.
+        """
+        momento = datetime.fromtimestamp(self.nucleo[0], timezone.utc)
+        return (
+            momento.strftime("%Y-%m-%d %H:%M:%S"),
+            self.get("cpu_percent"),
+            self.get("memory_percent"),
+            self.get("disk_percent"),
+            self.to_json(),
+            self._ou_none("sample_interval"),
+            *(self._ou_none(campo) for campo in COLUNAS_TIPADAS)
+        )
+
+    def _ou_none(self, campo: str) -> Optional[float]:
+        valor = self.nucleo[INDICE_NUCLEO[campo]]
+        return None if math.isnan(valor) else valor
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forma serializável: NaN vira None (JSON válido para o json_extract do SQLite)"""
+        return {
+            "v": VERSAO_JSON,
+            "hostname": self.hostname,
+            "core": {
+                campo: (None if valor != valor else valor)
+                for campo, valor in zip(CAMPOS_NUCLEO, self.nucleo)
+            },
+            "extra": self.extras
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, texto: str) -> "MetricSnapshot":
+        """Reconstrói um snapshot gravado por to_json()"""
+        dados = json.loads(texto)
+        core = dados.get("core", {})
+        nucleo = array("d", (
+            NAN if core.get(campo) is None else core[campo] for campo in CAMPOS_NUCLEO
+        ))
+        return cls(nucleo, dados.get("hostname", ""), dados.get("extra", {}))
+
+    def __repr__(self) -> str:
+        return (f"MetricSnapshot(hostname={self.hostname!r}, "
+                f"cpu={self.get('cpu_percent'):.1f}, memory={self.get('memory_percent'):.1f}, "
+                f"disk={self.get('disk_percent'):.1f})")
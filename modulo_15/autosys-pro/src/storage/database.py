@@ -0,0 +1,277 @@
+# src/storage/database.py
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from src.config import config
+from src.exceptions import DatabaseError
+from src.utils.logger import logger
+
+
+def _executar_script(conn: sqlite3.Connection, script: str):
+    """Executa comando a comando (executescript faria COMMIT da migração em curso)"""
+    for comando in script.split(";"):
+        if comando.strip():
+            conn.execute(comando)
+
+
+def _migracao_esquema_inicial(conn: sqlite3.Connection):
+    """Tabelas que antes eram criadas sob demanda por cada módulo"""
+    _executar_script(conn, """
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            cpu REAL,
+            memory REAL,
+            disk REAL,
+            details TEXT,
+            sample_interval REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS alerts (
+            id TEXT PRIMARY KEY,
+            timestamp DATETIME,
+            tipo TEXT,
+            severidade TEXT,
+            mensagem TEXT,
+            detalhes TEXT,
+            resultados TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS backups (
+            id TEXT PRIMARY KEY,
+            timestamp DATETIME,
+            path TEXT,
+            tamanho_mb REAL,
+            duracao REAL,
+            tipo TEXT,
+            targets TEXT,
+            sucesso BOOLEAN,
+            erro TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS backup_feedback (
+            backup_id TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            utilidade INTEGER,
+            performance INTEGER,
+            comentario TEXT,
+            PRIMARY KEY (backup_id, timestamp)
+        );
+    """)
+
+    # Bancos criados antes do intervalo de amostragem adaptativo
+    colunas = [row[1] for row in conn.execute("PRAGMA table_info(metrics)")]
+    if "sample_interval" not in colunas:
+        conn.execute("ALTER TABLE metrics ADD COLUMN sample_interval REAL")
+
+
+def _migracao_indices(conn: sqlite3.Connection):
+    """Índices para os filtros por período usados pela API e pelo ML"""
+    _executar_script(conn, """
+        CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_alerts_tipo_timestamp ON alerts (tipo, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_backups_sucesso_timestamp ON backups (sucesso, timestamp);
+    """)
+
+
+def _migracao_rollups(conn: sqlite3.Connection):
+    # Import tardio: rollups usa o singleton deste módulo
+    from src.storage.rollups import criar_rollups
+    criar_rollups(conn)
+
+
+def _migracao_particoes(conn: sqlite3.Connection):
+    from src.storage.particoes import migrar
+    migrar(conn)
+
+
+def _migracao_colunas_tipadas(conn: sqlite3.Connection):
+    from src.storage.particoes import migrar_colunas_tipadas
+    migrar_colunas_tipadas(conn)
+
+
+# (versão, descrição, função); a versão aplicada fica em PRAGMA user_version
+MIGRACOES: List[tuple] = [
+    (1, "esquema inicial", _migracao_esquema_inicial),
+    (2, "índices por timestamp", _migracao_indices),
+    (3, "rollups 1m/1h/1d de metrics", _migracao_rollups),
+    (4, "partições diárias de metrics", _migracao_particoes),
+    (5, "colunas tipadas e índice de cobertura em metrics", _migracao_colunas_tipadas),
+]
+
+
+class BancoDados:
+    """Acesso compartilhado ao SQLite: uma conexão de escrita e um pool de leitura
+
+    Em modo WAL os leitores nunca bloqueiam o escritor. As escritas passam
+    por uma única thread (sem disputa pelo lock do SQLite) e as leituras por
+    um pool de conexões somente-leitura; as conexões são persistentes, então
+    o cache de statements preparados do sqlite3 é reaproveitado.
+    """
+
+    def __init__(self, caminho: Optional[Path] = None, leitores: Optional[int] = None):
+        self.caminho = Path(caminho or config.DB_PATH)
+        self.total_leitores = leitores or config.DB_READ_POOL_SIZE
+        self._escritor: Optional[sqlite3.Connection] = None
+        self._lock_escrita = threading.Lock()
+        self._leitores: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._executor_escrita: Optional[ThreadPoolExecutor] = None
+        self._executor_leitura: Optional[ThreadPoolExecutor] = None
+        self._lock_abertura = threading.Lock()
+
+    # ============= CICLO DE VIDA =============
+
+    def abrir(self):
+        """Abre as conexões e aplica as migrações pendentes (idempotente)"""
+        with self._lock_abertura:
+            if self._escritor is not None:
+                return
+
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._escritor = self._conectar()
+            self._escritor.execute("PRAGMA journal_mode=WAL")
+            self._escritor.execute("PRAGMA synchronous=NORMAL")
+            self._migrar()
+
+            for _ in range(self.total_leitores):
+                self._leitores.put(self._conectar(somente_leitura=True))
+
+            self._executor_escrita = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="autosys-db-escrita"
+            )
+            self._executor_leitura = ThreadPoolExecutor(
+                max_workers=self.total_leitores, thread_name_prefix="autosys-db-leitura"
+            )
+
+            logger.info(f"🗄️ Banco aberto em WAL ({self.total_leitores} leitores): {self.caminho}")
+
+    def _conectar(self, somente_leitura: bool = False) -> sqlite3.Connection:
+        if somente_leitura:
+            conn = sqlite3.connect(
+                f"file:{self.caminho}?mode=ro", uri=True,
+                check_same_thread=False, cached_statements=256
+            )
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            # isolation_level=None: transações explícitas em em_transacao()
+            conn = sqlite3.connect(
+                self.caminho, check_same_thread=False,
+                cached_statements=256, isolation_level=None
+            )
+
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={config.DB_BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _migrar(self):
+        """Aplica, em ordem, as migrações acima da versão atual do banco"""
+        versao = self._escritor.execute("PRAGMA user_version").fetchone()[0]
+
+        for numero, descricao, migracao in MIGRACOES:
+            if numero <= versao:
+                continue
+
+            try:
+                self._escritor.execute("BEGIN IMMEDIATE")
+                migracao(self._escritor)
+                self._escritor.execute(f"PRAGMA user_version={numero}")
+                self._escritor.execute("COMMIT")
+            except Exception as e:
+                if self._escritor.in_transaction:
+                    self._escritor.execute("ROLLBACK")
+                raise DatabaseError(f"Falha na migração {numero} ({descricao}): {e}") from e
+
+            logger.info(f"🗄️ Migração {numero} aplicada: {descricao}")
+
+    def fechar(self):
+        """Fecha executores e conexões"""
+        with self._lock_abertura:
+            if self._escritor is None:
+                return
+
+            self._executor_escrita.shutdown(wait=True)
+            self._executor_leitura.shutdown(wait=True)
+
+            while not self._leitores.empty():
+                self._leitores.get_nowait().close()
+            self._escritor.close()
+            self._escritor = None
+
+    # ============= API SÍNCRONA (threads de trabalho, código legado síncrono) =============
+
+    @contextmanager
+    def leitor(self):
+        """Empresta uma conexão somente-leitura do pool"""
+        self.abrir()
+        conn = self._leitores.get()
+        try:
+            yield conn
+        finally:
+            self._leitores.put(conn)
+
+    def ler(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with self.leitor() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def ler_um(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        with self.leitor() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def escrever(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Executa um comando em transação própria; retorna rowcount"""
+        return self.em_transacao(lambda conn: conn.execute(sql, params).rowcount)
+
+    def escrever_muitos(self, sql: str, linhas: Iterable[Sequence[Any]]) -> int:
+        return self.em_transacao(lambda conn: conn.executemany(sql, linhas).rowcount)
+
+    def em_transacao(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Executa func(conn) na conexão de escrita dentro de BEGIN/COMMIT"""
+        self.abrir()
+        with self._lock_escrita:
+            conn = self._escritor
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = func(conn)
+                conn.execute("COMMIT")
+                return resultado
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ============= API ASSÍNCRONA (nunca bloqueia o event loop) =============
+
+    async def consultar(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        self.abrir()
+        return await self._rodar(self._executor_leitura, self.ler, sql, params)
+
+    async def consultar_um(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        self.abrir()
+        return await self._rodar(self._executor_leitura, self.ler_um, sql, params)
+
+    async def executar(self, sql: str, params: Sequence[Any] = ()) -> int:
+        self.abrir()
+        return await self._rodar(self._executor_escrita, self.escrever, sql, params)
+
+    async def executar_muitos(self, sql: str, linhas: Iterable[Sequence[Any]]) -> int:
+        self.abrir()
+        return await self._rodar(self._executor_escrita, self.escrever_muitos, sql, list(linhas))
+
+    async def transacao(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        self.abrir()
+        return await self._rodar(self._executor_escrita, self.em_transacao, func)
+
+    @staticmethod
+    async def _rodar(executor: ThreadPoolExecutor, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+
+# Singleton: conexões abertas no primeiro uso ou em banco.abrir() no startup
+banco = BancoDados()
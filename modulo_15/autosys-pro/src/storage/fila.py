@@ -0,0 +1,215 @@
+# src/storage/fila.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from src.config import config
+from src.storage.database import BancoDados, banco
+from src.utils.logger import logger
+from src.utils.metrics import metrics
+
+Linha = Tuple[str, Sequence[Any]]
+
+
+class FilaEscrita:
+    """Write-behind para o SQLite: agrupa linhas em uma transação por lote
+
+    Um lote é gravado ao atingir DB_WRITE_BATCH_SIZE linhas ou
+    DB_WRITE_FLUSH_INTERVAL segundos após a primeira linha, com um único
+    commit (e um único fsync do WAL). Linhas com o mesmo SQL viram um
+    executemany; entre SQLs diferentes a ordem não é garantida.
+    Se o lote falhar, cada SQL é regravado em transação própria e, no
+    grupo que falhar de novo, linha a linha: só as linhas rejeitadas
+    pelo banco são descartadas.
+    """
+
+    def __init__(self, banco_dados: Optional[BancoDados] = None,
+                 capacidade: Optional[int] = None,
+                 tamanho_lote: Optional[int] = None,
+                 intervalo: Optional[float] = None):
+        self.banco = banco_dados or banco
+        self.capacidade = capacidade or config.DB_WRITE_QUEUE_SIZE
+        self.tamanho_lote = tamanho_lote or config.DB_WRITE_BATCH_SIZE
+        self.intervalo = intervalo if intervalo is not None else config.DB_WRITE_FLUSH_INTERVAL
+
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        # Linhas já retiradas da fila e ainda não entregues ao banco
+        self._lote: List[Linha] = []
+
+        self.linhas_gravadas = 0
+        self.lotes_gravados = 0
+        self.linhas_perdidas = 0
+        self._duracoes_flush: Deque[float] = deque(maxlen=256)
+
+    @property
+    def ativa(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    def iniciar(self):
+        """Cria a fila e a tarefa de drenagem no event loop corrente"""
+        if self.ativa:
+            return
+        self._fila = asyncio.Queue(maxsize=self.capacidade)
+        self._tarefa = asyncio.get_running_loop().create_task(self._drenar())
+        logger.info(f"🗄️ Fila de escrita ativa (lote {self.tamanho_lote}, "
+                    f"{self.intervalo}s, capacidade {self.capacidade})")
+
+    async def enfileirar(self, sql: str, params: Sequence[Any] = ()):
+        """Agenda uma escrita; com a fila cheia, espera (backpressure)
+
+        Sem a fila ativa (scripts, testes) grava direto.
+        """
+        if not self.ativa:
+            await self.banco.executar(sql, params)
+            return
+
+        await self._fila.put((sql, params))
+        metrics.db_queue_depth.set(self._fila.qsize())
+
+    async def _drenar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._lote.append(await self._fila.get())
+            prazo = loop.time() + self.intervalo
+
+            while len(self._lote) < self.tamanho_lote:
+                # Pega o que já está na fila sem esperar
+                if not self._fila.empty():
+                    self._lote.append(self._fila.get_nowait())
+                    continue
+
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    self._lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            lote, self._lote = self._lote, []
+            metrics.db_queue_depth.set(self._fila.qsize())
+            inicio = time.perf_counter()
+            try:
+                await self.banco.transacao(lambda conn: self._gravar(conn, lote))
+            except Exception as e:
+                # Rollback do lote: isola as linhas ruins sem travar a fila
+                try:
+                    falhas = await loop.run_in_executor(None, self._gravar_isolando, lote)
+                except Exception as erro:
+                    self._descartar(len(lote), erro)
+                else:
+                    self._concluir_isolado(lote, falhas, e, time.perf_counter() - inicio)
+            else:
+                self._registrar(len(lote), time.perf_counter() - inicio)
+
+    def _descartar(self, linhas: int, erro: Exception):
+        self.linhas_perdidas += linhas
+        metrics.db_rows_written.labels(status="error").inc(linhas)
+        logger.error(f"❌ Falha ao gravar {linhas} linha(s): {erro}")
+
+    @staticmethod
+    def _agrupar(lote: List[Linha]) -> Dict[str, List[Sequence[Any]]]:
+        agrupado: Dict[str, List[Sequence[Any]]] = {}
+        for sql, params in lote:
+            agrupado.setdefault(sql, []).append(params)
+        return agrupado
+
+    @classmethod
+    def _gravar(cls, conn, lote: List[Linha]):
+        """Grava o lote em uma transação (roda na thread de escrita do banco)"""
+        for sql, linhas in cls._agrupar(lote).items():
+            conn.executemany(sql, linhas)
+
+    def _gravar_isolando(self, lote: List[Linha]) -> List[Tuple[Linha, Exception]]:
+        """Regrava um lote que falhou: um SQL por transação e, no grupo que
+        falhar, uma linha por transação. Retorna as linhas rejeitadas."""
+        falhas: List[Tuple[Linha, Exception]] = []
+        for sql, linhas in self._agrupar(lote).items():
+            try:
+                self.banco.escrever_muitos(sql, linhas)
+                continue
+            except Exception:
+                pass
+
+            for params in linhas:
+                try:
+                    self.banco.escrever(sql, params)
+                except Exception as e:
+                    falhas.append(((sql, params), e))
+        return falhas
+
+    def _concluir_isolado(self, lote: List[Linha], falhas: List[Tuple[Linha, Exception]],
+                          erro_lote: Exception, duracao: float):
+        """Contabiliza um lote regravado por _gravar_isolando"""
+        logger.warning(f"⚠️ Lote de {len(lote)} linhas falhou ({erro_lote}); "
+                       f"regravado por SQL, {len(falhas)} linha(s) rejeitada(s)")
+        for (sql, params), erro in falhas:
+            logger.error(f"❌ Linha descartada ({' '.join(sql.split())[:80]} {params!r}): {erro}")
+        self.linhas_perdidas += len(falhas)
+        metrics.db_rows_written.labels(status="error").inc(len(falhas))
+
+        gravadas = len(lote) - len(falhas)
+        if gravadas:
+            self._registrar(gravadas, duracao)
+
+    def _registrar(self, linhas: int, duracao: float):
+        """Contabiliza um lote gravado (duração inclui o commit)"""
+        self.linhas_gravadas += linhas
+        self.lotes_gravados += 1
+        self._duracoes_flush.append(duracao)
+        metrics.db_flush_duration.observe(duracao)
+        metrics.db_flush_rows.observe(linhas)
+        metrics.db_rows_written.labels(status="ok").inc(linhas)
+
+    def fechar(self):
+        """Para a drenagem e grava de forma síncrona tudo o que estiver pendente
+
+        Síncrono para poder rodar no handler de sinal do shutdown; um lote
+        já entregue à thread de escrita termina antes (lock de escrita).
+        """
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            self._tarefa = None
+
+        pendentes, self._lote = self._lote, []
+        while self._fila is not None and not self._fila.empty():
+            pendentes.append(self._fila.get_nowait())
+
+        if pendentes:
+            inicio = time.perf_counter()
+            try:
+                self.banco.em_transacao(lambda conn: self._gravar(conn, pendentes))
+            except Exception as e:
+                try:
+                    falhas = self._gravar_isolando(pendentes)
+                except Exception as erro:
+                    self._descartar(len(pendentes), erro)
+                else:
+                    self._concluir_isolado(pendentes, falhas, e, time.perf_counter() - inicio)
+            else:
+                self._registrar(len(pendentes), time.perf_counter() - inicio)
+                logger.info(f"🗄️ Fila de escrita descarregada: {len(pendentes)} linhas")
+        metrics.db_queue_depth.set(0)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        duracoes = sorted(self._duracoes_flush)
+        return {
+            "ativa": self.ativa,
+            "profundidade": self._fila.qsize() if self._fila is not None else 0,
+            "capacidade": self.capacidade,
+            "linhas_gravadas": self.linhas_gravadas,
+            "lotes_gravados": self.lotes_gravados,
+            "linhas_perdidas": self.linhas_perdidas,
+            "linhas_por_lote": round(self.linhas_gravadas / self.lotes_gravados, 1)
+            if self.lotes_gravados else 0,
+            "flush_ms": {
+                "p50": round(duracoes[len(duracoes) // 2] * 1000, 3) if duracoes else 0,
+                "max": round(duracoes[-1] * 1000, 3) if duracoes else 0
+            }
+        }
+
+
+# Singleton: iniciada pelo orquestrador, descarregada no shutdown
+fila_escrita = FilaEscrita()
@@ -0,0 +1,185 @@
+# src/storage/gorilla.py
+"""Compressão de séries no estilo Gorilla (Facebook, VLDB 2015)
+
+Timestamps (ms) em delta-of-delta com prefixos de tamanho variável e
+valores float64 por XOR com o anterior. Um chunk guarda o primeiro ponto
+cru e os demais em poucos bits: séries regulares e estáveis ficam em ~1-2
+bytes por ponto.
+"""
+import struct
+from array import array
+from typing import Tuple
+
+_EMPACOTAR_FLOAT = struct.Struct(">d")
+_EMPACOTAR_INT = struct.Struct(">Q")
+
+# Faixas de delta-of-delta: (prefixo, bits do prefixo, bits do valor)
+FAIXAS_DOD = (
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+)
+PREFIXO_DOD_GRANDE = (0b1111, 4, 64)
+
+
+def _float_para_bits(valor: float) -> int:
+    return _EMPACOTAR_INT.unpack(_EMPACOTAR_FLOAT.pack(valor))[0]
+
+
+def _bits_para_float(bits: int) -> float:
+    return _EMPACOTAR_FLOAT.unpack(_EMPACOTAR_INT.pack(bits))[0]
+
+
+class EscritorBits:
+    """Acumula bits em um inteiro e entrega bytes no final"""
+
+    __slots__ = ("_valor", "_tamanho")
+
+    def __init__(self):
+        self._valor = 0
+        self._tamanho = 0
+
+    def escrever(self, valor: int, bits: int):
+        self._valor = (self._valor << bits) | (valor & ((1 << bits) - 1))
+        self._tamanho += bits
+
+    def bytes(self) -> bytes:
+        # Completa o último byte com zeros à direita
+        sobra = -self._tamanho % 8
+        return (self._valor << sobra).to_bytes((self._tamanho + sobra) // 8, "big")
+
+
+class LeitorBits:
+    """Lê bits em sequência de um buffer produzido pelo EscritorBits"""
+
+    __slots__ = ("_valor", "_restantes")
+
+    def __init__(self, dados: bytes):
+        self._valor = int.from_bytes(dados, "big")
+        self._restantes = len(dados) * 8
+
+    def ler(self, bits: int) -> int:
+        self._restantes -= bits
+        if self._restantes < 0:
+            raise ValueError("Chunk truncado")
+        return (self._valor >> self._restantes) & ((1 << bits) - 1)
+
+    def ler_bit(self) -> int:
+        self._restantes -= 1
+        if self._restantes < 0:
+            raise ValueError("Chunk truncado")
+        return (self._valor >> self._restantes) & 1
+
+
+def _com_sinal(valor: int, bits: int) -> int:
+    """Interpreta os bits como complemento de dois"""
+    return valor - (1 << bits) if valor & (1 << (bits - 1)) else valor
+
+
+def codificar(timestamps: array, valores: array) -> bytes:
+    """Codifica pontos (timestamps em ms crescentes, valores float64) em um chunk"""
+    total = len(timestamps)
+    if total == 0:
+        return b""
+
+    bits = EscritorBits()
+    bits.escrever(timestamps[0], 64)
+    bits.escrever(_float_para_bits(valores[0]), 64)
+
+    delta_anterior = 0
+    ts_anterior = timestamps[0]
+    valor_anterior = _float_para_bits(valores[0])
+    zeros_esq_ant = zeros_dir_ant = -1
+
+    for i in range(1, total):
+        # Timestamp: delta-of-delta
+        delta = timestamps[i] - ts_anterior
+        dod = delta - delta_anterior
+        delta_anterior = delta
+        ts_anterior = timestamps[i]
+
+        if dod == 0:
+            bits.escrever(0, 1)
+        else:
+            for prefixo, bits_prefixo, bits_valor in FAIXAS_DOD:
+                limite = 1 << (bits_valor - 1)
+                if -limite <= dod < limite:
+                    bits.escrever(prefixo, bits_prefixo)
+                    bits.escrever(dod, bits_valor)
+                    break
+            else:
+                prefixo, bits_prefixo, bits_valor = PREFIXO_DOD_GRANDE
+                bits.escrever(prefixo, bits_prefixo)
+                bits.escrever(dod, bits_valor)
+
+        # Valor: XOR com o anterior
+        atual = _float_para_bits(valores[i])
+        xor = atual ^ valor_anterior
+        valor_anterior = atual
+
+        if xor == 0:
+            bits.escrever(0, 1)
+            continue
+
+        zeros_esq = min(64 - xor.bit_length(), 31)
+        zeros_dir = (xor & -xor).bit_length() - 1
+
+        if zeros_esq_ant >= 0 and zeros_esq >= zeros_esq_ant and zeros_dir >= zeros_dir_ant:
+            # Cabe na janela de bits significativos anterior
+            significativos = 64 - zeros_esq_ant - zeros_dir_ant
+            bits.escrever(0b10, 2)
+            bits.escrever(xor >> zeros_dir_ant, significativos)
+        else:
+            significativos = 64 - zeros_esq - zeros_dir
+            bits.escrever(0b11, 2)
+            bits.escrever(zeros_esq, 5)
+            bits.escrever(significativos - 1, 6)
+            bits.escrever(xor >> zeros_dir, significativos)
+            zeros_esq_ant, zeros_dir_ant = zeros_esq, zeros_dir
+
+    return bits.bytes()
+
+
+def decodificar(dados: bytes, total: int) -> Tuple[array, array]:
+    """Decodifica um chunk com `total` pontos"""
+    timestamps = array("q")
+    valores = array("d")
+    if total == 0:
+        return timestamps, valores
+
+    bits = LeitorBits(dados)
+    ts = _com_sinal(bits.ler(64), 64)
+    valor = bits.ler(64)
+    timestamps.append(ts)
+    valores.append(_bits_para_float(valor))
+
+    delta = 0
+    zeros_esq = zeros_dir = 0
+
+    for _ in range(total - 1):
+        # Timestamp
+        if bits.ler_bit() == 0:
+            dod = 0
+        else:
+            for _, bits_prefixo, bits_valor in FAIXAS_DOD:
+                if bits.ler_bit() == 0:
+                    dod = _com_sinal(bits.ler(bits_valor), bits_valor)
+                    break
+            else:
+                dod = _com_sinal(bits.ler(PREFIXO_DOD_GRANDE[2]), PREFIXO_DOD_GRANDE[2])
+        delta += dod
+        ts += delta
+        timestamps.append(ts)
+
+        # Valor
+        if bits.ler_bit() == 1:
+            if bits.ler_bit() == 1:
+                zeros_esq = bits.ler(5)
+                significativos = bits.ler(6) + 1
+                zeros_dir = 64 - zeros_esq - significativos
+            else:
+                significativos = 64 - zeros_esq - zeros_dir
+            valor ^= bits.ler(significativos) << zeros_dir
+        valores.append(_bits_para_float(valor))
+
+    return timestamps, valores
@@ -0,0 +1,236 @@
+# src/storage/particoes.py
+"""Partições diárias da tabela metrics
+
+As linhas brutas ficam em uma tabela por dia UTC (metrics_pAAAAMMDD) e
+`metrics` é uma view UNION ALL sobre elas: as leituras continuam iguais e
+o SQLite empurra o filtro de timestamp para o índice de cada partição.
+Expirar um dia é um DROP TABLE, sem DELETE linha a linha, sem reescrever
+a B-tree e sem segurar o lock de escrita por minutos.
+"""
+import asyncio
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
+
+from src.config import config
+from src.monitor.snapshot import COLUNAS_TIPADAS
+from src.storage import rollups
+from src.storage.database import banco
+from src.utils.logger import logger
+
+PREFIXO = "metrics_p"
+
+# Esquema de cada partição
+COLUNAS = (
+    ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    ("timestamp", "DATETIME DEFAULT CURRENT_TIMESTAMP"),
+    ("cpu", "REAL"),
+    ("memory", "REAL"),
+    ("disk", "REAL"),
+    ("details", "TEXT"),
+    ("sample_interval", "REAL"),
+    # Colunas tipadas (COLUNAS_TIPADAS do snapshot)
+    ("load_avg_1min", "REAL"),
+    ("load_avg_5min", "REAL"),
+    ("load_avg_15min", "REAL"),
+    ("processes_total", "INTEGER"),
+    ("connections_total", "INTEGER"),
+    ("hour_of_day", "INTEGER"),
+    ("day_of_week", "INTEGER"),
+)
+
+# Índice de cobertura: timestamp + colunas numéricas. As consultas por período
+# do preditor e da API leem só o índice, sem tocar no details de cada linha.
+COLUNAS_INDICE = ("timestamp", "cpu", "memory", "disk") + COLUNAS_TIPADAS
+
+# Como preencher as colunas tipadas em linhas antigas: primeiro o núcleo do
+# snapshot, depois o dict completo gravado antes dele. hour/day seguem o
+# datetime local do snapshot (weekday(): segunda = 0)
+_JSON = "CASE WHEN json_valid(details) THEN json_extract(details, '{}') END"
+EXTRACAO_LEGADA = {
+    "load_avg_1min": ("$.core.load_avg_1min", "$.cpu.load_avg[0]"),
+    "load_avg_5min": ("$.core.load_avg_5min", "$.cpu.load_avg[1]"),
+    "load_avg_15min": ("$.core.load_avg_15min", "$.cpu.load_avg[2]"),
+    "processes_total": ("$.core.processes_total", "$.processes.total"),
+    "connections_total": ("$.core.connections_total", "$.network.connections_count"),
+    "hour_of_day": ("$.core.hour_of_day",),
+    "day_of_week": ("$.core.day_of_week",),
+}
+_EXTRACAO_TIMESTAMP = {
+    "hour_of_day": "CAST(strftime('%H', timestamp, 'localtime') AS INTEGER)",
+    "day_of_week": "(CAST(strftime('%w', timestamp, 'localtime') AS INTEGER) + 6) % 7",
+}
+
+
+def nome_particao(dia: date) -> str:
+    return f"{PREFIXO}{dia:%Y%m%d}"
+
+
+def dia_da_particao(nome: str) -> date:
+    return datetime.strptime(nome[len(PREFIXO):], "%Y%m%d").date()
+
+
+def listar(conn: sqlite3.Connection) -> List[str]:
+    """Partições existentes, da mais antiga para a mais recente"""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+        (f"{PREFIXO}[0-9]*",)
+    ).fetchall()
+    return sorted(row[0] for row in rows)
+
+
+def _criar_tabela(conn: sqlite3.Connection, nome: str):
+    colunas = ", ".join(f"{coluna} {tipo}" for coluna, tipo in COLUNAS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {nome} ({colunas})")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{nome}_cobertura "
+                 f"ON {nome} ({', '.join(COLUNAS_INDICE)})")
+
+
+def recriar_visao(conn: sqlite3.Connection):
+    """Recria a view metrics sobre as partições atuais"""
+    particoes = listar(conn)
+    if not particoes:
+        # A view precisa de ao menos uma tabela
+        nome = nome_particao(datetime.now(timezone.utc).date())
+        _criar_tabela(conn, nome)
+        conn.execute(rollups.sql_trigger(nome))
+        particoes = [nome]
+
+    colunas = ", ".join(coluna for coluna, _ in COLUNAS)
+    uniao = "\nUNION ALL\n".join(f"SELECT {colunas} FROM {nome}" for nome in particoes)
+    conn.execute("DROP VIEW IF EXISTS metrics")
+    conn.execute(f"CREATE VIEW metrics AS {uniao}")
+
+
+def criar(conn: sqlite3.Connection, dia: date) -> str:
+    """Cria a partição do dia (tabela, índice, trigger de rollup) e atualiza a view"""
+    nome = nome_particao(dia)
+    existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,)
+    ).fetchone()
+    if not existia:
+        _criar_tabela(conn, nome)
+        conn.execute(rollups.sql_trigger(nome))
+        recriar_visao(conn)
+    return nome
+
+
+def migrar(conn: sqlite3.Connection):
+    """Migração: distribui a tabela metrics única em partições diárias"""
+    conn.execute("DROP TRIGGER IF EXISTS metrics_rollup")
+    conn.execute("ALTER TABLE metrics RENAME TO metrics_legado")
+
+    dias = conn.execute(
+        "SELECT DISTINCT date(timestamp) FROM metrics_legado WHERE timestamp IS NOT NULL"
+    ).fetchall()
+    legado = {row[1] for row in conn.execute("PRAGMA table_info(metrics_legado)")}
+    colunas = ", ".join(coluna for coluna, _ in COLUNAS if coluna != "id" and coluna in legado)
+
+    for (dia,) in dias:
+        if dia is None:
+            continue
+        nome = nome_particao(date.fromisoformat(dia))
+        _criar_tabela(conn, nome)
+        # Os rollups já têm esse histórico: o trigger só entra depois da cópia
+        conn.execute(f"""
+            INSERT INTO {nome} ({colunas})
+            SELECT {colunas} FROM metrics_legado
+            WHERE timestamp >= ? AND timestamp < date(?, '+1 day')
+            ORDER BY timestamp
+        """, (dia, dia))
+        conn.execute(rollups.sql_trigger(nome))
+
+    conn.execute("DROP TABLE metrics_legado")
+    recriar_visao(conn)
+
+
+def migrar_colunas_tipadas(conn: sqlite3.Connection):
+    """Migração: adiciona as colunas tipadas às partições e preenche o histórico"""
+    for nome in listar(conn):
+        existentes = {row[1] for row in conn.execute(f"PRAGMA table_info({nome})")}
+        for coluna, tipo in COLUNAS:
+            if coluna not in existentes:
+                conn.execute(f"ALTER TABLE {nome} ADD COLUMN {coluna} {tipo}")
+
+        atribuicoes = []
+        for coluna in COLUNAS_TIPADAS:
+            fontes = [_JSON.format(caminho) for caminho in EXTRACAO_LEGADA.get(coluna, ())]
+            if coluna in _EXTRACAO_TIMESTAMP:
+                fontes.append(_EXTRACAO_TIMESTAMP[coluna])
+            atribuicoes.append(f"{coluna} = COALESCE({coluna}, {', '.join(fontes)})")
+        faltando = " OR ".join(f"{coluna} IS NULL" for coluna in COLUNAS_TIPADAS)
+        conn.execute(f"UPDATE {nome} SET {', '.join(atribuicoes)} WHERE {faltando}")
+
+        conn.execute(f"DROP INDEX IF EXISTS idx_{nome}_timestamp")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{nome}_cobertura "
+                     f"ON {nome} ({', '.join(COLUNAS_INDICE)})")
+
+    recriar_visao(conn)
+
+
+def sql_insert(nome: str, colunas: Tuple[str, ...]) -> str:
+    return (f"INSERT INTO {nome} ({', '.join(colunas)}) "
+            f"VALUES ({', '.join('?' * len(colunas))})")
+
+
+def expirar(conn: sqlite3.Connection, hoje: date) -> List[str]:
+    """Remove partições além de METRICS_RETENTION_DAYS (DROP TABLE por dia)"""
+    limite = hoje - timedelta(days=config.METRICS_RETENTION_DAYS)
+    expiradas = [nome for nome in listar(conn) if dia_da_particao(nome) < limite]
+    if not expiradas:
+        return []
+
+    for nome in expiradas:
+        conn.execute(f"DROP TABLE {nome}")
+    recriar_visao(conn)
+    return expiradas
+
+
+class ParticoesMetrics:
+    """Roteia as escritas para a partição do dia e aplica a retenção
+
+    As partições conhecidas ficam em memória: criar a do dia custa uma
+    transação, uma vez por dia; as demais escritas só consultam o set.
+    """
+
+    def __init__(self):
+        self._conhecidas: Set[str] = set()
+        self._ultima_retencao = 0.0
+        self._lock = asyncio.Lock()
+
+    async def sql_insert(self, timestamp_utc: str, colunas: Tuple[str, ...]) -> str:
+        """INSERT para a partição do timestamp ('AAAA-MM-DD HH:MM:SS' UTC)"""
+        dia = date.fromisoformat(timestamp_utc[:10])
+        nome = nome_particao(dia)
+        if nome not in self._conhecidas:
+            async with self._lock:
+                if nome not in self._conhecidas:
+                    await banco.transacao(lambda conn: criar(conn, dia))
+                    self._conhecidas.add(nome)
+        return sql_insert(nome, colunas)
+
+    async def aplicar_retencao(self, forcar: bool = False) -> Dict[str, object]:
+        """Expira partições e buckets de rollup antigos (no máximo uma vez por hora)"""
+        if not forcar and time.time() - self._ultima_retencao < 3600:
+            return {}
+        self._ultima_retencao = time.time()
+
+        agora = datetime.now(timezone.utc)
+
+        def retencao(conn):
+            return {
+                "particoes": expirar(conn, agora.date()),
+                "rollups": rollups.aplicar_retencao(conn, agora)
+            }
+
+        resultado = await banco.transacao(retencao)
+        for nome in resultado["particoes"]:
+            self._conhecidas.discard(nome)
+        if resultado["particoes"]:
+            logger.info(f"🗑️ Partições de métricas expiradas: {', '.join(resultado['particoes'])}")
+        return resultado
+
+
+# Singleton
+particoes = ParticoesMetrics()
@@ -0,0 +1,188 @@
+# src/storage/rollups.py
+"""Agregados contínuos da tabela metrics em 1 minuto, 1 hora e 1 dia
+
+Cada resolução tem uma tabela metrics_<res> com uma linha por bucket
+(epoch UTC do início) e, por métrica, min/max/soma ponderada/último valor.
+Um trigger AFTER INSERT em cada partição diária de metrics atualiza os
+três níveis na mesma transação da linha bruta, então os agregados nunca
+ficam para trás.
+A média é ponderada pelo sample_interval de cada amostra: com amostragem
+adaptativa, uma amostra de 5s não pesa o mesmo que uma de 300s. Cada
+métrica tem seu próprio peso ({m}_weight), que só soma amostras em que ela
+não é NULL; `weight` é o tempo total coberto pelo bucket.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from src.config import config
+from src.storage.database import banco
+
+# Resoluções em segundos, da mais fina para a mais grossa
+RESOLUCOES = {"1m": 60, "1h": 3600, "1d": 86400}
+METRICAS = ("cpu", "memory", "disk")
+
+# Peso de linhas sem sample_interval (gravadas antes da amostragem adaptativa)
+PESO_PADRAO = 60
+
+
+def _tabela(resolucao: str) -> str:
+    return f"metrics_{resolucao}"
+
+
+def _sql_tabela(resolucao: str) -> str:
+    colunas = ",\n".join(
+        f"{m}_min REAL, {m}_max REAL, {m}_sum REAL, {m}_last REAL, "
+        f"{m}_weight REAL NOT NULL DEFAULT 0" for m in METRICAS
+    )
+    return f"""
+        CREATE TABLE IF NOT EXISTS {_tabela(resolucao)} (
+            bucket INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            last_ts INTEGER NOT NULL,
+            {colunas}
+        )
+    """
+
+
+def _sql_upsert(resolucao: str) -> str:
+    """UPSERT de uma linha NEW de metrics no bucket da resolução (corpo do trigger)"""
+    segundos = RESOLUCOES[resolucao]
+    ts = "CAST(strftime('%s', NEW.timestamp) AS INTEGER)"
+    peso = f"COALESCE(NEW.sample_interval, {PESO_PADRAO})"
+
+    colunas = ["bucket", "count", "weight", "last_ts"]
+    valores = [f"{ts} / {segundos} * {segundos}", "1", peso, ts]
+    atualizacoes = [
+        "count = count + 1",
+        "weight = weight + excluded.weight",
+        "last_ts = max(last_ts, excluded.last_ts)",
+    ]
+    for m in METRICAS:
+        colunas += [f"{m}_min", f"{m}_max", f"{m}_sum", f"{m}_last", f"{m}_weight"]
+        valores += [f"NEW.{m}", f"NEW.{m}", f"NEW.{m} * {peso}", f"NEW.{m}",
+                    f"CASE WHEN NEW.{m} IS NOT NULL THEN {peso} ELSE 0 END"]
+        # min()/max() escalares do SQLite devolvem NULL se um lado for NULL;
+        # a soma continua NULL enquanto a métrica só tiver NULLs no bucket
+        atualizacoes += [
+            f"{m}_min = min(COALESCE({m}_min, excluded.{m}_min), COALESCE(excluded.{m}_min, {m}_min))",
+            f"{m}_max = max(COALESCE({m}_max, excluded.{m}_max), COALESCE(excluded.{m}_max, {m}_max))",
+            f"{m}_sum = COALESCE({m}_sum + excluded.{m}_sum, {m}_sum, excluded.{m}_sum)",
+            f"{m}_last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.{m}_last ELSE {m}_last END",
+            f"{m}_weight = {m}_weight + excluded.{m}_weight",
+        ]
+
+    return f"""
+        INSERT INTO {_tabela(resolucao)} ({', '.join(colunas)})
+        VALUES ({', '.join(valores)})
+        ON CONFLICT(bucket) DO UPDATE SET {', '.join(atualizacoes)}
+    """
+
+
+def _sql_backfill(resolucao: str) -> str:
+    """Agrega as linhas brutas já existentes (usado uma vez, na migração)"""
+    segundos = RESOLUCOES[resolucao]
+    agregados = ", ".join(
+        f"min({m}), max({m}), sum({m} * peso), max(CASE WHEN ordem = 1 THEN {m} END), "
+        f"total(CASE WHEN {m} IS NOT NULL THEN peso END)"
+        for m in METRICAS
+    )
+    colunas = ", ".join(f"{m}_min, {m}_max, {m}_sum, {m}_last, {m}_weight" for m in METRICAS)
+    return f"""
+        WITH base AS (
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER) AS ts,
+                   COALESCE(sample_interval, {PESO_PADRAO}) AS peso,
+                   id, {', '.join(METRICAS)}
+            FROM metrics
+            WHERE timestamp IS NOT NULL
+        ),
+        ordenado AS (
+            SELECT *, ts / {segundos} * {segundos} AS bucket,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY ts / {segundos} ORDER BY ts DESC, id DESC
+                   ) AS ordem
+            FROM base
+        )
+        INSERT OR REPLACE INTO {_tabela(resolucao)} (bucket, count, weight, last_ts, {colunas})
+        SELECT bucket, count(*), sum(peso), max(ts), {agregados}
+        FROM ordenado
+        GROUP BY bucket
+    """
+
+
+def sql_trigger(tabela: str) -> str:
+    """Trigger que propaga cada INSERT em `tabela` para os três níveis"""
+    corpo = ";\n".join(_sql_upsert(resolucao) for resolucao in RESOLUCOES)
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_rollup AFTER INSERT ON {tabela}
+        BEGIN
+            {corpo};
+        END
+    """
+
+
+def criar_rollups(conn: sqlite3.Connection):
+    """Migração: tabelas, trigger incremental e backfill do histórico"""
+    for resolucao in RESOLUCOES:
+        conn.execute(_sql_tabela(resolucao))
+        conn.execute(_sql_backfill(resolucao))
+    conn.execute(sql_trigger("metrics"))
+
+
+def aplicar_retencao(conn: sqlite3.Connection, agora: datetime) -> Dict[str, int]:
+    """Apaga buckets além da retenção de cada resolução (ROLLUP_RETENTION_DAYS)
+
+    São tabelas pequenas com PK no bucket: o DELETE é um intervalo contíguo.
+    """
+    removidos = {}
+    for resolucao, dias in config.ROLLUP_RETENTION_DAYS.items():
+        if resolucao not in RESOLUCOES or not dias:
+            continue
+        limite = int((agora - timedelta(days=dias)).timestamp())
+        removidos[resolucao] = conn.execute(
+            f"DELETE FROM {_tabela(resolucao)} WHERE bucket < ?", (limite,)
+        ).rowcount
+    return removidos
+
+
+def escolher_resolucao(periodo_segundos: int, pontos: int) -> Optional[str]:
+    """Resolução mais grossa que ainda entrega `pontos` buckets no período
+
+    None quando nem a mais fina basta (período curto): use as linhas brutas.
+    """
+    for resolucao, segundos in reversed(RESOLUCOES.items()):
+        if periodo_segundos // segundos >= pontos:
+            return resolucao
+    return None
+
+
+async def consultar(resolucao: str, inicio: datetime,
+                    fim: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Buckets da resolução no intervalo, do mais recente para o mais antigo"""
+    if resolucao not in RESOLUCOES:
+        raise ValueError(f"Resolução inválida: {resolucao}")
+
+    estatisticas = ", ".join(
+        f"{m}_min, {m}_max, {m}_sum / NULLIF({m}_weight, 0) AS {m}_avg, {m}_last"
+        for m in METRICAS
+    )
+    fim_ts = int(fim.timestamp()) if fim else 2 ** 62
+    rows = await banco.consultar(f"""
+        SELECT datetime(bucket, 'unixepoch') AS timestamp, count, {estatisticas}
+        FROM {_tabela(resolucao)}
+        WHERE bucket >= ? AND bucket < ?
+        ORDER BY bucket DESC
+    """, (int(inicio.timestamp()) // RESOLUCOES[resolucao] * RESOLUCOES[resolucao], fim_ts))
+
+    pontos = []
+    for row in rows:
+        ponto = {"timestamp": row["timestamp"], "count": row["count"]}
+        for m in METRICAS:
+            # A média fica na chave simples (mesmo formato das linhas brutas)
+            ponto[m] = row[f"{m}_avg"]
+            ponto[f"{m}_min"] = row[f"{m}_min"]
+            ponto[f"{m}_max"] = row[f"{m}_max"]
+            ponto[f"{m}_last"] = row[f"{m}_last"]
+        pontos.append(ponto)
+    return pontos
@@ -0,0 +1,431 @@
+# src/storage/tsdb.py
+import json
+import os
+import struct
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from src.config import config
+from src.storage.gorilla import codificar, decodificar
+from src.utils.logger import logger
+
+# Cabeçalho de cada chunk no segmento: id da série, t_min, t_max, pontos, bytes
+CABECALHO_CHUNK = struct.Struct("<IqqII")
+PREFIXO_SEGMENTO = "chunks-"
+# Registro do log de head: id da série, timestamp (ms), valor
+REGISTRO_HEAD = struct.Struct("<Iqd")
+LOG_HEAD = "head.log"
+# Reescreve o log quando passa desse tanto de registros além dos heads atuais
+COMPACTAR_LOG_HEAD = 50000
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Serie:
+    """Série identificada por nome de métrica + labels"""
+
+    id: int
+    metrica: str
+    labels: Labels
+    # Pontos ainda não selados em chunk
+    head_ts: array = field(default_factory=lambda: array("q"))
+    head_valores: array = field(default_factory=lambda: array("d"))
+    # Chunks selados: (t_min, t_max, segmento, offset, bytes, pontos)
+    chunks: List[Tuple[int, int, str, int, int, int]] = field(default_factory=list)
+
+    @property
+    def chave(self) -> str:
+        return formatar_serie(self.metrica, self.labels)
+
+
+def formatar_serie(metrica: str, labels: Labels) -> str:
+    """Representação textual no estilo Prometheus: cpu_percent{host="x"}"""
+    if not labels:
+        return metrica
+    return metrica + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def normalizar_labels(labels: Optional[Dict[str, Any]]) -> Labels:
+    """Labels ordenadas e como texto (None é descartado)"""
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items() if v is not None))
+
+
+class ArmazemSeries:
+    """Banco de séries temporais embarcado, em arquivos
+
+    Layout em disco (TSDB_DIR):
+      series.json          índice id -> métrica + labels
+      chunks-AAAAMMDD.dat  segmento diário só de append, com chunks Gorilla
+      head.log             pontos ainda não selados, só de append
+
+    Cada série acumula pontos em memória (head) e sela um chunk ao atingir
+    TSDB_CHUNK_POINTS pontos ou TSDB_CHUNK_SECONDS de extensão. Todo ponto
+    aceito vai também para o head.log, reaplicado ao abrir: um processo
+    encerrado sem fechar() não perde os heads. Ao abrir, o índice de chunks
+    é reconstruído lendo só os cabeçalhos dos segmentos.
+    """
+
+    def __init__(self, diretorio: Optional[Path] = None,
+                 pontos_por_chunk: Optional[int] = None,
+                 duracao_chunk: Optional[float] = None):
+        self.diretorio = Path(diretorio or config.TSDB_DIR)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.pontos_por_chunk = pontos_por_chunk or config.TSDB_CHUNK_POINTS
+        self.duracao_chunk_ms = int((duracao_chunk or config.TSDB_CHUNK_SECONDS) * 1000)
+
+        self.series: Dict[int, Serie] = {}
+        self._por_chave: Dict[Tuple[str, Labels], int] = {}
+        # Índice invertido: métrica -> ids e (label, valor) -> ids
+        self._por_metrica: Dict[str, set] = {}
+        self._por_label: Dict[Tuple[str, str], set] = {}
+        # Segmento -> (descritor, t_max) para leitura com pread
+        self._segmentos: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.RLock()
+        self._log_head: Optional[int] = None
+        self._registros_log = 0
+
+        self._carregar_indice()
+        self._carregar_segmentos()
+        self._reaplicar_log_head()
+
+    # ============= ESCRITA =============
+
+    def inserir(self, metrica: str, valor: float, timestamp: Optional[float] = None,
+                labels: Optional[Dict[str, Any]] = None):
+        """Acrescenta um ponto (timestamp em segundos epoch; padrão: agora)"""
+        self.inserir_lote([(metrica, labels, valor)], timestamp)
+
+    def inserir_lote(self, pontos: Iterable[Tuple[str, Optional[Dict[str, Any]], float]],
+                     timestamp: Optional[float] = None):
+        """Acrescenta vários pontos (métrica, labels, valor) no mesmo instante"""
+        ts = int((timestamp if timestamp is not None else time.time()) * 1000)
+
+        with self._lock:
+            novas = False
+            registros = []
+            for metrica, labels, valor in pontos:
+                if valor is None or valor != valor:  # NaN = coletor sem valor
+                    continue
+
+                serie, criada = self._obter_serie(metrica, normalizar_labels(labels))
+                novas |= criada
+
+                # Fora de ordem: descarta (o head só aceita tempo crescente)
+                if serie.head_ts and ts <= serie.head_ts[-1]:
+                    continue
+                if not serie.head_ts and serie.chunks and ts <= serie.chunks[-1][1]:
+                    continue
+
+                serie.head_ts.append(ts)
+                serie.head_valores.append(float(valor))
+                registros.append(REGISTRO_HEAD.pack(serie.id, ts, float(valor)))
+
+                if (len(serie.head_ts) >= self.pontos_por_chunk
+                        or ts - serie.head_ts[0] >= self.duracao_chunk_ms):
+                    self._selar(serie)
+
+            # Índice antes do log: ao reaplicar, toda série do log já é conhecida
+            if novas:
+                self._salvar_indice()
+            if registros:
+                self._registrar_log_head(registros)
+
+    def flush(self):
+        """Sela os heads de todas as séries (no shutdown ou antes de backup)"""
+        with self._lock:
+            for serie in self.series.values():
+                if serie.head_ts:
+                    self._selar(serie)
+            # Heads vazios: o log não tem mais nada a reaplicar
+            self._reescrever_log_head()
+
+    # ============= LOG DE HEAD =============
+
+    def _registrar_log_head(self, registros: List[bytes]):
+        """Acrescenta os pontos ao head.log (um write por lote)"""
+        os.write(self._log_head, b"".join(registros))
+        self._registros_log += len(registros)
+
+        if self._registros_log > COMPACTAR_LOG_HEAD + sum(len(s.head_ts) for s in self.series.values()):
+            self._reescrever_log_head()
+
+    def _reescrever_log_head(self):
+        """Troca o log por um com só os heads atuais (temporário, fsync, rename)"""
+        caminho = self.diretorio / LOG_HEAD
+        temporario = caminho.with_suffix(".tmp")
+        total = 0
+        with open(temporario, "wb") as f:
+            for serie in self.series.values():
+                for ts, valor in zip(serie.head_ts, serie.head_valores):
+                    f.write(REGISTRO_HEAD.pack(serie.id, ts, valor))
+                    total += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+        if self._log_head is not None:
+            os.close(self._log_head)
+        self._log_head = os.open(caminho, os.O_WRONLY | os.O_APPEND)
+        self._registros_log = total
+
+    def _reaplicar_log_head(self):
+        """Recoloca nos heads os pontos do log que ainda não foram selados"""
+        caminho = self.diretorio / LOG_HEAD
+        dados = caminho.read_bytes() if caminho.exists() else b""
+        inteiros = len(dados) - len(dados) % REGISTRO_HEAD.size
+        if inteiros != len(dados):
+            logger.warning("⚠️ TSDB: registro incompleto no fim do head.log, descartado")
+
+        recuperados = 0
+        for serie_id, ts, valor in REGISTRO_HEAD.iter_unpack(dados[:inteiros]):
+            serie = self.series.get(serie_id)
+            if serie is None:
+                continue
+            # Já selado em chunk ou repetido no log
+            if serie.head_ts and ts <= serie.head_ts[-1]:
+                continue
+            if not serie.head_ts and serie.chunks and ts <= serie.chunks[-1][1]:
+                continue
+            serie.head_ts.append(ts)
+            serie.head_valores.append(valor)
+            recuperados += 1
+
+        if recuperados:
+            logger.info(f"🔁 TSDB: {recuperados} ponto(s) não selado(s) recuperado(s) do head.log")
+        self._reescrever_log_head()
+
+    def _obter_serie(self, metrica: str, labels: Labels) -> Tuple[Serie, bool]:
+        """Retorna a série, criando e indexando se for nova"""
+        chave = (metrica, labels)
+        serie_id = self._por_chave.get(chave)
+        if serie_id is not None:
+            return self.series[serie_id], False
+
+        serie_id = max(self.series, default=0) + 1
+        serie = Serie(serie_id, metrica, labels)
+        self._indexar(serie)
+        return serie, True
+
+    def _indexar(self, serie: Serie):
+        self.series[serie.id] = serie
+        self._por_chave[(serie.metrica, serie.labels)] = serie.id
+        self._por_metrica.setdefault(serie.metrica, set()).add(serie.id)
+        for par in serie.labels:
+            self._por_label.setdefault(par, set()).add(serie.id)
+
+    def _selar(self, serie: Serie):
+        """Comprime o head da série e acrescenta o chunk ao segmento do dia"""
+        dados = codificar(serie.head_ts, serie.head_valores)
+        t_min, t_max, total = serie.head_ts[0], serie.head_ts[-1], len(serie.head_ts)
+
+        segmento = self._nome_segmento(t_min)
+        caminho = self.diretorio / segmento
+        with open(caminho, "ab") as f:
+            offset = f.tell()
+            f.write(CABECALHO_CHUNK.pack(serie.id, t_min, t_max, total, len(dados)))
+            f.write(dados)
+
+        serie.chunks.append((t_min, t_max, segmento, offset + CABECALHO_CHUNK.size, len(dados), total))
+        fd, t_max_segmento = self._segmentos.get(segmento, (None, t_max))
+        if fd is None:
+            fd = os.open(caminho, os.O_RDONLY)
+        self._segmentos[segmento] = (fd, max(t_max_segmento, t_max))
+
+        serie.head_ts = array("q")
+        serie.head_valores = array("d")
+
+    @staticmethod
+    def _nome_segmento(ts_ms: int) -> str:
+        dia = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime("%Y%m%d")
+        return f"{PREFIXO_SEGMENTO}{dia}.dat"
+
+    # ============= LEITURA =============
+
+    def selecionar(self, metrica: Optional[str] = None,
+                   labels: Optional[Dict[str, Any]] = None) -> List[Serie]:
+        """Séries da métrica cujas labels contêm todas as labels pedidas"""
+        with self._lock:
+            candidatos = None
+            if metrica is not None:
+                candidatos = set(self._por_metrica.get(metrica, ()))
+            for par in normalizar_labels(labels):
+                ids = self._por_label.get(par, set())
+                candidatos = ids.copy() if candidatos is None else candidatos & ids
+
+            if candidatos is None:
+                candidatos = set(self.series)
+            return [self.series[i] for i in sorted(candidatos)]
+
+    def consultar(self, metrica: str, inicio: float, fim: float,
+                  labels: Optional[Dict[str, Any]] = None) -> Dict[str, List[Tuple[float, float]]]:
+        """Range scan: {série: [(timestamp_s, valor), ...]} em [inicio, fim]"""
+        inicio_ms, fim_ms = int(inicio * 1000), int(fim * 1000)
+        resultado = {}
+
+        for serie in self.selecionar(metrica, labels):
+            pontos = list(self._ler_intervalo(serie, inicio_ms, fim_ms))
+            if pontos:
+                resultado[serie.chave] = pontos
+
+        return resultado
+
+    def ultimo(self, metrica: str, labels: Optional[Dict[str, Any]] = None) -> Dict[str, Tuple[float, float]]:
+        """Último ponto de cada série selecionada"""
+        resultado = {}
+        with self._lock:
+            for serie in self.selecionar(metrica, labels):
+                if serie.head_ts:
+                    resultado[serie.chave] = (serie.head_ts[-1] / 1000, serie.head_valores[-1])
+                elif serie.chunks:
+                    ts, valores = self._ler_chunk(serie.chunks[-1])
+                    resultado[serie.chave] = (ts[-1] / 1000, valores[-1])
+        return resultado
+
+    def _ler_intervalo(self, serie: Serie, inicio_ms: int, fim_ms: int):
+        """Gera pontos da série no intervalo: chunks sobrepostos + head"""
+        with self._lock:
+            chunks = [c for c in serie.chunks if c[1] >= inicio_ms and c[0] <= fim_ms]
+            head = (array("q", serie.head_ts), array("d", serie.head_valores))
+
+        for chunk in chunks:
+            try:
+                timestamps, valores = self._ler_chunk(chunk)
+            except KeyError:
+                continue  # segmento removido pela retenção durante a leitura
+            for ts, valor in zip(timestamps, valores):
+                if inicio_ms <= ts <= fim_ms:
+                    yield ts / 1000, valor
+
+        for ts, valor in zip(*head):
+            if inicio_ms <= ts <= fim_ms:
+                yield ts / 1000, valor
+
+    def _ler_chunk(self, chunk: Tuple[int, int, str, int, int, int]) -> Tuple[array, array]:
+        _, _, segmento, offset, tamanho, total = chunk
+        # pread sob o lock: a retenção fecha o descritor de segmentos expirados
+        # (e o número do fd poderia ser reaproveitado por outro arquivo)
+        with self._lock:
+            dados = os.pread(self._segmentos[segmento][0], tamanho, offset)
+        return decodificar(dados, total)
+
+    # ============= RETENÇÃO E ESTATÍSTICAS =============
+
+    def aplicar_retencao(self, dias: Optional[int] = None) -> int:
+        """Apaga segmentos inteiros mais antigos que a retenção; retorna quantos"""
+        dias = dias or config.TSDB_RETENTION_DAYS
+        limite_ms = int((time.time() - dias * 86400) * 1000)
+        removidos = 0
+
+        with self._lock:
+            for segmento, (fd, t_max) in list(self._segmentos.items()):
+                if t_max >= limite_ms:
+                    continue
+
+                os.close(fd)
+                del self._segmentos[segmento]
+                (self.diretorio / segmento).unlink(missing_ok=True)
+                for serie in self.series.values():
+                    serie.chunks = [c for c in serie.chunks if c[2] != segmento]
+                removidos += 1
+
+        if removidos:
+            logger.info(f"🧹 TSDB: {removidos} segmento(s) removido(s) pela retenção de {dias} dias")
+        return removidos
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Tamanho em disco e contagem de séries/chunks/pontos"""
+        with self._lock:
+            chunks = sum(len(s.chunks) for s in self.series.values())
+            pontos = sum(c[5] for s in self.series.values() for c in s.chunks)
+            pontos_head = sum(len(s.head_ts) for s in self.series.values())
+            tamanho = sum(
+                (self.diretorio / segmento).stat().st_size for segmento in self._segmentos
+            )
+
+        return {
+            "series": len(self.series),
+            "segmentos": len(self._segmentos),
+            "chunks": chunks,
+            "pontos": pontos,
+            "pontos_em_memoria": pontos_head,
+            "bytes_em_disco": tamanho,
+            "bytes_por_ponto": round(tamanho / pontos, 2) if pontos else None
+        }
+
+    # ============= PERSISTÊNCIA DO ÍNDICE =============
+
+    def _carregar_indice(self):
+        caminho = self.diretorio / "series.json"
+        if not caminho.exists():
+            return
+
+        try:
+            with open(caminho) as f:
+                for item in json.load(f):
+                    labels = tuple(tuple(par) for par in item["labels"])
+                    self._indexar(Serie(item["id"], item["metrica"], labels))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Índice da TSDB corrompido ({e}); séries antigas ignoradas")
+
+    def _salvar_indice(self):
+        """Grava o índice de séries de forma atômica"""
+        caminho = self.diretorio / "series.json"
+        temporario = caminho.with_suffix(".tmp")
+        with open(temporario, "w") as f:
+            json.dump([
+                {"id": s.id, "metrica": s.metrica, "labels": s.labels}
+                for s in self.series.values()
+            ], f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+    def _carregar_segmentos(self):
+        """Reconstrói o índice de chunks lendo só os cabeçalhos"""
+        for caminho in sorted(self.diretorio.glob(f"{PREFIXO_SEGMENTO}*.dat")):
+            segmento = caminho.name
+            tamanho_arquivo = caminho.stat().st_size
+            fd = os.open(caminho, os.O_RDONLY)
+            offset = 0
+            t_max_segmento = 0
+
+            while offset + CABECALHO_CHUNK.size <= tamanho_arquivo:
+                serie_id, t_min, t_max, total, tamanho = CABECALHO_CHUNK.unpack(
+                    os.pread(fd, CABECALHO_CHUNK.size, offset)
+                )
+                inicio_dados = offset + CABECALHO_CHUNK.size
+                if inicio_dados + tamanho > tamanho_arquivo:
+                    # Escrita interrompida: corta a cauda para os próximos appends
+                    logger.warning(f"⚠️ TSDB: chunk truncado em {segmento}@{offset}, descartado")
+                    os.truncate(caminho, offset)
+                    break
+
+                serie = self.series.get(serie_id)
+                if serie is not None:
+                    serie.chunks.append((t_min, t_max, segmento, inicio_dados, tamanho, total))
+                t_max_segmento = max(t_max_segmento, t_max)
+                offset = inicio_dados + tamanho
+
+            self._segmentos[segmento] = (fd, t_max_segmento)
+
+        for serie in self.series.values():
+            serie.chunks.sort()
+
+    def fechar(self):
+        """Sela os heads e fecha os segmentos e o log"""
+        with self._lock:
+            self.flush()
+            for fd, _ in self._segmentos.values():
+                os.close(fd)
+            self._segmentos.clear()
+            if self._log_head is not None:
+                os.close(self._log_head)
+                self._log_head = None
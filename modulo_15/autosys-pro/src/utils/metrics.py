@@ -1,11 +1,20 @@
 # src/utils/metrics.py
 from prometheus_client import Counter, Gauge, Histogram, Summary, generate_latest, CollectorRegistry
 from prometheus_client.multiprocess import MultiProcessCollector
-import psutil
+from collections import deque
+from contextlib import contextmanager
 from functools import wraps
+import asyncio
+import os
+import resource
+import sys
 import time
-from typing import Callable, Any
+from typing import Callable, Any, Dict, Deque, Optional, Tuple
 import threading
+import tracemalloc
+
+from src.config import config
+from src.utils.logger import logger
 
 
 class MetricsCollector:
@@ -104,6 +113,111 @@ class MetricsCollector:
             registry=self.registry
         )
 
+        # Auto-instrumentação: quanto o próprio AutoSys gasta por componente
+        self.self_duration = Histogram(
+            'autosys_self_duration_seconds',
+            'Wall time spent by AutoSys components',
+            ['component'],
+            buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+            registry=self.registry
+        )
+
+        self.self_cpu = Histogram(
+            'autosys_self_cpu_seconds',
+            'Thread CPU time spent by AutoSys components',
+            ['component'],
+            buckets=[0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1],
+            registry=self.registry
+        )
+
+        # sys.getallocatedblocks() é do processo inteiro (todas as threads),
+        # então não dá para atribuir a um componente: vai como gauge global
+        self.self_allocated_blocks = Gauge(
+            'autosys_allocated_blocks',
+            'Python memory blocks currently allocated by the AutoSys process',
+            registry=self.registry
+        )
+
+        # Alocações por componente (só com SELF_TRACE_ALLOCATIONS): o
+        # tracemalloc conta o processo inteiro, então trechos concorrentes
+        # (coletores no thread pool, awaits do event loop) entram na conta
+        # um do outro; o pico é desde o início da medição mais recente
+        self.self_allocated_bytes = Histogram(
+            'autosys_self_allocated_bytes',
+            'Net bytes allocated (and still alive) during one run of an AutoSys component',
+            ['component'],
+            buckets=[0, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216],
+            registry=self.registry
+        )
+
+        self.self_peak_bytes = Histogram(
+            'autosys_self_peak_bytes',
+            'Peak traced memory above the start of one run of an AutoSys component',
+            ['component'],
+            buckets=[1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864],
+            registry=self.registry
+        )
+
+        # Fila de escrita do SQLite (write-behind com group commit)
+        self.db_queue_depth = Gauge(
+            'autosys_db_write_queue_depth',
+            'Rows waiting in the SQLite write-behind queue',
+            registry=self.registry
+        )
+
+        self.db_flush_duration = Histogram(
+            'autosys_db_flush_seconds',
+            'Duration of one SQLite group commit',
+            buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+            registry=self.registry
+        )
+
+        self.db_flush_rows = Histogram(
+            'autosys_db_flush_rows',
+            'Rows per SQLite group commit',
+            buckets=[1, 10, 50, 100, 250, 500, 1000, 2500, 5000],
+            registry=self.registry
+        )
+
+        self.db_rows_written = Counter(
+            'autosys_db_rows_written_total',
+            'Rows handled by the SQLite write-behind queue',
+            ['status'],
+            registry=self.registry
+        )
+
+        # Treinamentos de ML no processo separado
+        self.ml_training_progress = Gauge(
+            'autosys_ml_training_progress',
+            'Progress (0-1) of the running training job',
+            ['job'],
+            registry=self.registry
+        )
+
+        self.ml_training_runs = Counter(
+            'autosys_ml_training_runs_total',
+            'Finished training jobs',
+            ['job', 'status'],
+            registry=self.registry
+        )
+
+        # Janela recente por componente para percentis em /api/v1/self
+        self._self_samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._self_alloc_samples: Dict[str, Deque[Tuple[int, int]]] = {}
+        self._self_lock = threading.Lock()
+        self._self_window = 1024
+        self._start_time = time.time()
+        self._start_cpu = time.process_time()
+
+        # Amostrador de CPU do gauge periódico, injetado pelo monitor
+        # (utils não depende de src.monitor); sem ele o gauge fica parado
+        self._cpu_sampler: Optional[Callable[[], float]] = None
+
+        self.trace_allocations = config.SELF_TRACE_ALLOCATIONS
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(config.SELF_TRACE_FRAMES)
+            logger.info("🔬 tracemalloc ativo: alocações por componente em /api/v1/self")
+
         # Inicia coleta periódica
         self._start_periodic_collection()
 
@@ -111,10 +225,17 @@ class MetricsCollector:
         """Inicia coleta periódica de métricas do sistema"""
 
         def collect():
+            try:
+                import psutil
+            except ImportError:
+                logger.warning("⚠️ psutil ausente: métricas periódicas do sistema desativadas")
+                return
+
             while True:
                 try:
-                    # CPU
-                    self.cpu_usage.set(psutil.cpu_percent(interval=1))
+                    # CPU (delta próprio, sem encurtar a janela do ciclo de coleta)
+                    if self._cpu_sampler is not None:
+                        self.cpu_usage.set(self._cpu_sampler())
 
                     # Memória
                     self.memory_usage.set(psutil.virtual_memory().percent)
@@ -133,10 +254,15 @@ class MetricsCollector:
 
                 except Exception as e:
                     logger.error(f"Erro na coleta de métricas: {e}")
+                    time.sleep(15)
 
         thread = threading.Thread(target=collect, daemon=True)
         thread.start()
 
+    def set_cpu_sampler(self, sampler: Callable[[], float]):
+        """Define a função que devolve o % de CPU do gauge periódico"""
+        self._cpu_sampler = sampler
+
     def instrument(self, func: Callable) -> Callable:
         """Decorator para instrumentar funções"""
 
@@ -168,10 +294,136 @@ class MetricsCollector:
 
         return wrapper
 
+    def observe_self(self, component: str, duration: float, cpu: float):
+        """Registra uma execução de um componente do próprio AutoSys"""
+        self.self_duration.labels(component=component).observe(duration)
+        self.self_cpu.labels(component=component).observe(cpu)
+        self.self_allocated_blocks.set(sys.getallocatedblocks())
+
+        with self._self_lock:
+            samples = self._self_samples.get(component)
+            if samples is None:
+                samples = self._self_samples[component] = deque(maxlen=self._self_window)
+            samples.append((duration, cpu))
+
+    def observe_allocations(self, component: str, allocated: int, peak: int):
+        """Registra as alocações de uma execução de um componente (tracemalloc)"""
+        self.self_allocated_bytes.labels(component=component).observe(max(allocated, 0))
+        self.self_peak_bytes.labels(component=component).observe(peak)
+
+        with self._self_lock:
+            samples = self._self_alloc_samples.get(component)
+            if samples is None:
+                samples = self._self_alloc_samples[component] = deque(maxlen=self._self_window)
+            samples.append((allocated, peak))
+
+    @contextmanager
+    def timed(self, component: str):
+        """Mede parede e CPU da thread de um trecho (e alocações, se ativo)
+
+        Em corrotinas, a CPU inclui o que mais rodou no event loop durante
+        os awaits; serve como ordem de grandeza. O mesmo vale para as
+        alocações, que o tracemalloc só conhece por processo.
+        """
+        tracing = self.trace_allocations and tracemalloc.is_tracing()
+        if tracing:
+            start_mem, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.observe_self(
+                component,
+                time.perf_counter() - start,
+                time.thread_time() - start_cpu
+            )
+            if tracing:
+                end_mem, peak = tracemalloc.get_traced_memory()
+                self.observe_allocations(component, end_mem - start_mem,
+                                         max(peak - start_mem, 0))
+
+    def instrument_self(self, component: str) -> Callable:
+        """Decorator de auto-instrumentação (funções síncronas ou async)"""
+
+        def decorator(func: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timed(component):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timed(component):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def self_overhead(self) -> Dict[str, Any]:
+        """Percentis recentes por componente e consumo total do processo"""
+        with self._self_lock:
+            snapshot = {name: list(samples) for name, samples in self._self_samples.items()}
+            allocations = {name: list(samples) for name, samples in self._self_alloc_samples.items()}
+
+        components = {}
+        for name, samples in sorted(snapshot.items()):
+            durations = sorted(s[0] for s in samples)
+            cpus = sorted(s[1] for s in samples)
+            components[name] = {
+                "samples": len(samples),
+                "duration_ms": {p: round(_percentile(durations, q) * 1000, 3)
+                                for p, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+                "cpu_ms": {p: round(_percentile(cpus, q) * 1000, 3)
+                           for p, q in (("p50", 50), ("p99", 99))}
+            }
+            if allocations.get(name):
+                allocated = sorted(s[0] for s in allocations[name])
+                peaks = sorted(s[1] for s in allocations[name])
+                components[name]["allocated_kb"] = {
+                    p: round(_percentile(allocated, q) / 1024, 1) for p, q in (("p50", 50), ("p99", 99))
+                }
+                components[name]["peak_kb"] = {
+                    p: round(_percentile(peaks, q) / 1024, 1) for p, q in (("p50", 50), ("max", 100))
+                }
+
+        uptime = time.time() - self._start_time
+        cpu_window = time.process_time() - self._start_cpu
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_total = usage.ru_utime + usage.ru_stime
+
+        return {
+            "process": {
+                "pid": os.getpid(),
+                "uptime_s": round(uptime, 1),
+                "cpu_seconds": round(cpu_total, 3),
+                # Média desde a criação do coletor (não inclui o import inicial)
+                "cpu_percent": round(cpu_window / uptime * 100, 3) if uptime > 0 else 0.0,
+                "max_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss em KiB no Linux
+                "allocated_blocks": sys.getallocatedblocks(),
+                "threads": threading.active_count(),
+                "tracing_allocations": self.trace_allocations
+            },
+            "components": components
+        }
+
     def get_metrics(self) -> bytes:
         """Retorna métricas no formato Prometheus"""
         return generate_latest(self.registry)
 
 
+def _percentile(sorted_values: list, q: float):
+    """Percentil por vizinho mais próximo de uma lista já ordenada"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
 # Singleton
 metrics = MetricsCollector()
\ No newline at end of file
@@ -0,0 +1,317 @@
+# src/utils/treinamento.py
+"""Treinamento de modelos fora do event loop
+
+Cada job roda em um processo novo de um ProcessPoolExecutor (spawn, uma
+tarefa por processo): o fit do sklearn não segura o GIL do orquestrador,
+a memória volta ao sistema quando o processo termina e o RLIMIT_AS do
+worker limita o quanto um treino pode alocar.
+O worker reporta progresso por uma fila e checa o pedido de cancelamento
+a cada passo; se não parar dentro de ML_TRAIN_CANCEL_GRACE, é morto.
+Modelos são publicados com publicar() (temporário, fsync, rename) e o
+processo principal só os recarrega depois que o job termina.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+
+from src.config import config
+from src.exceptions import TrainingCancelledError
+from src.utils.logger import logger
+from src.utils.metrics import metrics
+
+try:
+    import resource
+except ImportError:  # fora do Unix: sem limite de memória
+    resource = None
+
+# ============= LADO DO WORKER =============
+
+_fila_progresso = None
+_evento_cancelar = None
+
+
+def _inicializar_worker(fila, cancelar, pid, limite_memoria_mb: int, nice: int):
+    global _fila_progresso, _evento_cancelar
+    _fila_progresso, _evento_cancelar = fila, cancelar
+    pid.value = os.getpid()
+
+    if nice:
+        with suppress(OSError):
+            os.nice(nice)
+    if limite_memoria_mb and resource is not None:
+        limite = limite_memoria_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+class ProgressoTreino:
+    """Passado à função de treino: reporta o avanço e interrompe se cancelado"""
+
+    def __init__(self, job: str):
+        self.job = job
+
+    @property
+    def cancelado(self) -> bool:
+        return _evento_cancelar is not None and _evento_cancelar.is_set()
+
+    def __call__(self, fracao: float, etapa: Optional[str] = None):
+        """Registra o progresso (0 a 1); levanta TrainingCancelledError se pedido"""
+        if _fila_progresso is not None:
+            with suppress(queue.Full):
+                _fila_progresso.put_nowait((self.job, float(fracao), etapa))
+        if self.cancelado:
+            raise TrainingCancelledError(f"Treino {self.job} cancelado")
+
+
+def _executar_job(job: str, funcao: Callable, args: tuple) -> Any:
+    try:
+        return funcao(ProgressoTreino(job), *args)
+    finally:
+        # Esvazia o buffer da fila antes do resultado: o orquestrador drena
+        # o progresso ao ver o job concluído e não perde as últimas etapas
+        if _fila_progresso is not None:
+            _fila_progresso.close()
+            _fila_progresso.join_thread()
+
+
+def publicar(caminho: Union[str, Path], escrever: Callable[[BinaryIO], Any]):
+    """Grava `caminho` atomicamente: temporário no mesmo diretório, fsync, rename
+
+    Quem lê vê o arquivo antigo ou o novo inteiro, nunca um pela metade,
+    inclusive após uma queda no meio da gravação.
+    """
+    caminho = Path(caminho)
+    fd, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=f".{caminho.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            escrever(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(temporario)
+        raise
+
+    # fsync do diretório para o rename também ser durável
+    with suppress(OSError):
+        dir_fd = os.open(caminho.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+# ============= LADO DO ORQUESTRADOR =============
+
+class GerenciadorTreinos:
+    """Executa um job de treino por vez em um processo separado"""
+
+    def __init__(self, limite_memoria_mb: Optional[int] = None,
+                 tempo_maximo: Optional[float] = None):
+        self.limite_memoria_mb = (config.ML_TRAIN_MAX_MEMORY_MB
+                                  if limite_memoria_mb is None else limite_memoria_mb)
+        self.tempo_maximo = config.ML_TRAIN_TIMEOUT if tempo_maximo is None else tempo_maximo
+
+        # Fila, evento e pid compartilhados com o worker: criados com o pool
+        # (e recriados com ele se um processo for morto no meio de um put)
+        self._contexto = multiprocessing.get_context("spawn")
+        self._fila = None
+        self._cancelar = None
+        self._pid = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+        self._atual: Optional[str] = None
+        self._cancelado_em: Optional[float] = None
+        self._motivo_cancelamento: Optional[str] = None
+        # Estado do último job de cada nome (para a API)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._fila = self._contexto.Queue(maxsize=1000)
+            self._cancelar = self._contexto.Event()
+            self._pid = self._contexto.Value("i", 0)
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=self._contexto,
+                max_tasks_per_child=1,
+                initializer=_inicializar_worker,
+                initargs=(self._fila, self._cancelar, self._pid,
+                          self.limite_memoria_mb, config.ML_TRAIN_NICE)
+            )
+        return self._executor
+
+    def _descartar_executor(self):
+        # Só chamado sem worker vivo (ocioso, morto ou pool quebrado); com
+        # wait=False a thread de gerência do pool corre contra o shutdown
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._fila.close()
+            self._fila = self._cancelar = self._pid = None
+
+    async def executar(self, job: str, funcao: Callable, *args) -> Dict[str, Any]:
+        """Roda funcao(progresso, *args) no processo de treino e devolve o resultado
+
+        `funcao` precisa ser importável no nível do módulo (spawn). Falhas,
+        cancelamento e tempo esgotado viram {"status": ...}.
+        """
+        estado = self.jobs.get(job)
+        if estado and estado["status"] in ("queued", "running"):
+            return {"status": "already_running", "job": job}
+
+        estado = {"status": "queued", "progresso": 0.0, "etapa": None,
+                  "inicio": None, "fim": None, "erro": None}
+        self.jobs[job] = estado
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if estado["status"] == "cancelled":
+                return {"status": "cancelled", "job": job}
+            return await self._rodar(job, estado, funcao, args)
+
+    async def _rodar(self, job: str, estado: Dict[str, Any],
+                     funcao: Callable, args: tuple) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        executor = self._obter_executor()
+        self._cancelar.clear()
+        self._drenar_progresso()
+        self._atual, self._cancelado_em, self._motivo_cancelamento = job, None, None
+        estado.update(status="running", inicio=datetime.now().isoformat())
+        inicio = loop.time()
+        logger.info(f"🧠 Treino {job} iniciado em processo separado")
+
+        futuro = loop.run_in_executor(executor, _executar_job, job, funcao, args)
+        try:
+            while True:
+                concluidos, _ = await asyncio.wait({futuro}, timeout=0.5)
+                self._drenar_progresso()
+                if concluidos:
+                    break
+
+                if self.tempo_maximo and self._cancelado_em is None \
+                        and loop.time() - inicio > self.tempo_maximo:
+                    logger.warning(f"⏱️ Treino {job} passou de {self.tempo_maximo}s, cancelando")
+                    self.cancelar(job, motivo="timeout")
+                if self._cancelado_em is not None \
+                        and time.monotonic() - self._cancelado_em > config.ML_TRAIN_CANCEL_GRACE:
+                    self._matar_worker()
+
+            resultado = futuro.result()
+            status = "success" if not (isinstance(resultado, dict) and "status" in resultado) \
+                else resultado["status"]
+            estado.update(status=status, progresso=1.0 if status == "success" else estado["progresso"])
+            return resultado
+
+        except (TrainingCancelledError, BrokenProcessPool) as e:
+            if self._cancelado_em is None:
+                # Processo morreu sozinho (OOM killer, sinal externo)
+                self._descartar_executor()
+                estado.update(status="error", erro=f"processo de treino encerrado: {e}")
+                logger.error(f"❌ Treino {job}: processo encerrado inesperadamente")
+                return {"status": "error", "error": estado["erro"]}
+
+            if isinstance(e, BrokenProcessPool):
+                self._descartar_executor()
+            status = self._motivo_cancelamento or "cancelled"
+            estado.update(status=status)
+            logger.warning(f"🛑 Treino {job} interrompido ({status})")
+            return {"status": status, "job": job}
+
+        except MemoryError:
+            limite = f"{self.limite_memoria_mb}MB"
+            estado.update(status="error", erro=f"memória insuficiente (limite {limite})")
+            logger.error(f"❌ Treino {job} excedeu o limite de memória ({limite})")
+            return {"status": "error", "error": estado["erro"]}
+
+        except asyncio.CancelledError:
+            # Shutdown do orquestrador: o processo não deve sobreviver a ele
+            self.cancelar(job, motivo="cancelled")
+            self._matar_worker()
+            estado.update(status="cancelled")
+            raise
+
+        except Exception as e:
+            estado.update(status="error", erro=str(e))
+            logger.error(f"❌ Erro no treino {job}: {e}")
+            return {"status": "error", "error": str(e)}
+
+        finally:
+            estado["fim"] = datetime.now().isoformat()
+            estado["duracao_s"] = round(loop.time() - inicio, 1)
+            metrics.ml_training_progress.labels(job=job).set(estado["progresso"])
+            metrics.ml_training_runs.labels(job=job, status=estado["status"]).inc()
+            self._atual = None
+
+    def _drenar_progresso(self):
+        """Aplica as mensagens de progresso pendentes (sem bloquear)"""
+        while self._fila is not None:
+            try:
+                job, fracao, etapa = self._fila.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                return
+            estado = self.jobs.get(job)
+            if job != self._atual or estado is None:
+                continue
+            estado["progresso"] = round(fracao, 4)
+            if etapa and etapa != estado["etapa"]:
+                estado["etapa"] = etapa
+                logger.info(f"🧠 Treino {job}: {etapa} ({fracao:.0%})")
+            metrics.ml_training_progress.labels(job=job).set(fracao)
+
+    def cancelar(self, job: str, motivo: str = "cancelled") -> bool:
+        """Pede o cancelamento de um job na fila ou em execução"""
+        estado = self.jobs.get(job)
+        if estado is None or estado["status"] not in ("queued", "running"):
+            return False
+
+        if estado["status"] == "queued":
+            estado["status"] = "cancelled"
+            return True
+
+        if self._cancelado_em is None:
+            self._cancelado_em = time.monotonic()
+            self._motivo_cancelamento = motivo
+            self._cancelar.set()
+            logger.info(f"🛑 Cancelamento do treino {job} solicitado")
+        return True
+
+    def _matar_worker(self):
+        """Encerra o processo de treino que não atendeu ao cancelamento"""
+        pid = self._pid.value if self._pid is not None else 0
+        if pid:
+            with suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+                logger.warning(f"🔪 Processo de treino {pid} encerrado")
+            self._pid.value = 0
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "atual": self._atual,
+            "limite_memoria_mb": self.limite_memoria_mb,
+            "tempo_maximo_s": self.tempo_maximo,
+            "jobs": self.jobs
+        }
+
+    def fechar(self):
+        """Cancela o job em andamento e encerra o pool (síncrono, para o shutdown)"""
+        if self._atual is not None and self._cancelar is not None:
+            self._cancelar.set()
+            self._matar_worker()
+        self._descartar_executor()
+
+
+# Singleton
+treinos = GerenciadorTreinos()
@@ -5,7 +5,6 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-import sqlite3
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -13,7 +12,26 @@ from typing import Optional, Dict, Any, List
 import asyncio
 
 from src.config import config
+from src.storage.database import banco
+from src.storage.fila import fila_escrita
+from src.storage.rollups import RESOLUCOES, escolher_resolucao, consultar as consultar_rollup
+from src.utils.treinamento import treinos
 from src.utils.logger import logger
+from src.utils.metrics import metrics as metricas_proprias
+
+# Períodos aceitos em /api/v1/metrics e /api/v1/series, em segundos
+PERIODOS = {"1h": 3600, "24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400}
+
+
+def _registrar_treino(job: str, tarefa: asyncio.Task):
+    """Loga o desfecho de um retreino disparado pela API"""
+    if tarefa.cancelled():
+        logger.warning(f"🛑 Retreino {job} cancelado")
+    elif tarefa.exception() is not None:
+        logger.error(f"❌ Retreino {job} falhou: {tarefa.exception()}")
+    else:
+        status = treinos.jobs.get(job, {}).get("status", "desconhecido")
+        logger.info(f"🧠 Retreino {job} concluído ({status})")
 
 
 def criar_app(orchestrator=None):
@@ -44,6 +62,10 @@ def criar_app(orchestrator=None):
     app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
     templates = Jinja2Templates(directory=str(templates_path))
 
+    # Retreinos disparados pela API: a referência fica aqui até a task acabar
+    # (o event loop só guarda referência fraca) e o resultado é logado
+    app.state.treinos_agendados = set()
+
     # Middleware para injetar orchestrator
     @app.middleware("http")
     async def add_orchestrator(request: Request, call_next):
@@ -138,25 +160,38 @@ def criar_app(orchestrator=None):
     async def get_metrics(
             request: Request,
             period: str = "1h",
-            limit: int = 100
+            limit: int = 100,
+            resolution: str = "auto"
     ):
-        """Retorna métricas históricas"""
-        conn = sqlite3.connect(config.DB_PATH)
-
-        # Define período
-        if period == "1h":
-            where = "timestamp > datetime('now', '-1 hour')"
-        elif period == "24h":
-            where = "timestamp > datetime('now', '-1 day')"
-        elif period == "7d":
-            where = "timestamp > datetime('now', '-7 days')"
-        elif period == "30d":
-            where = "timestamp > datetime('now', '-30 days')"
-        else:
-            where = "1=1"
-
-        cursor = conn.cursor()
-        cursor.execute(f"""
+        """Retorna métricas históricas
+
+        Com resolution=auto usa o agregado mais grosso (1m/1h/1d) que ainda
+        entrega `limit` pontos no período, cobrindo o período inteiro; períodos
+        curtos demais para os agregados leem as linhas brutas.
+        """
+        segundos = PERIODOS.get(period)
+
+        if resolution == "auto":
+            resolution = escolher_resolucao(segundos, limit) if segundos else "raw"
+            resolution = resolution or "raw"
+        elif resolution != "raw" and resolution not in RESOLUCOES:
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"Invalid resolution: {resolution}"}
+            )
+
+        if resolution != "raw":
+            inicio = datetime.now() - timedelta(seconds=segundos or RESOLUCOES[resolution] * limit)
+            pontos = await consultar_rollup(resolution, inicio)
+            return {
+                "period": period,
+                "resolution": resolution,
+                "total": len(pontos),
+                "metrics": pontos
+            }
+
+        where = f"timestamp > datetime('now', '-{segundos} seconds')" if segundos else "1=1"
+        rows = await banco.consultar(f"""
             SELECT timestamp, cpu, memory, disk
             FROM metrics
             WHERE {where}
@@ -164,11 +199,9 @@ def criar_app(orchestrator=None):
             LIMIT ?
         """, (limit,))
 
-        rows = cursor.fetchall()
-        conn.close()
-
         return {
             "period": period,
+            "resolution": "raw",
             "total": len(rows),
             "metrics": [
                 {
@@ -188,8 +221,6 @@ def criar_app(orchestrator=None):
             success_only: bool = False
     ):
         """Retorna histórico de backups"""
-        conn = sqlite3.connect(config.DB_PATH)
-
         query = """
                 SELECT id, timestamp, tamanho_mb, duracao, tipo, sucesso, erro
                 FROM backups \
@@ -200,28 +231,21 @@ def criar_app(orchestrator=None):
 
         query += " ORDER BY timestamp DESC LIMIT ?"
 
-        df = pd.read_sql_query(query, conn, params=(limit,))
-        conn.close()
+        rows = await banco.consultar(query, (limit,))
 
         return {
-            "total": len(df),
-            "backups": df.to_dict(orient="records")
+            "total": len(rows),
+            "backups": [dict(row) for row in rows]
         }
 
     @app.get("/api/v1/backups/{backup_id}")
     async def get_backup_details(request: Request, backup_id: str):
         """Retorna detalhes de um backup específico"""
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-                       SELECT id, timestamp, path, tamanho_mb, duracao, tipo, targets, sucesso, erro
-                       FROM backups
-                       WHERE id = ?
-                       """, (backup_id,))
-
-        row = cursor.fetchone()
-        conn.close()
+        row = await banco.consultar_um("""
+                                       SELECT id, timestamp, path, tamanho_mb, duracao, tipo, targets, sucesso, erro
+                                       FROM backups
+                                       WHERE id = ?
+                                       """, (backup_id,))
 
         if not row:
             return JSONResponse(
@@ -275,8 +299,6 @@ def criar_app(orchestrator=None):
             severidade: Optional[str] = None
     ):
         """Retorna histórico de alertas"""
-        conn = sqlite3.connect(config.DB_PATH)
-
         query = """
                 SELECT id, timestamp, tipo, severidade, mensagem, detalhes
                 FROM alerts \
@@ -291,12 +313,11 @@ def criar_app(orchestrator=None):
         query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
 
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+        rows = await banco.consultar(query, params)
 
         return {
-            "total": len(df),
-            "alertas": df.to_dict(orient="records")
+            "total": len(rows),
+            "alertas": [dict(row) for row in rows]
         }
 
     @app.get("/api/v1/alertas/estatisticas")
@@ -325,8 +346,9 @@ def criar_app(orchestrator=None):
 
         # Coleta métricas atuais
         if orch.sistema_monitor:
-            metrics = await orch.sistema_monitor.coletar_tudo()
-            predicao = await orch.preditor_falhas.prever_falha(metrics)
+            snapshot, _ = await orch.sistema_monitor.coletar_snapshot()
+            # Amostra avulsa: não entra nas médias móveis do ciclo
+            predicao = await orch.preditor_falhas.prever_falha(snapshot, registrar=False)
             return predicao
 
         return {"error": "Cannot collect metrics"}
@@ -350,6 +372,86 @@ def criar_app(orchestrator=None):
             "frequencia": frequencia
         }
 
+    @app.get("/api/v1/ml/treinos")
+    async def get_treinos():
+        """Estado dos treinos: job atual, progresso e resultado do último de cada modelo"""
+        return treinos.estado()
+
+    @app.post("/api/v1/ml/treinos/{job}")
+    async def iniciar_treino(request: Request, job: str):
+        """Dispara o retreino de um modelo em segundo plano"""
+        orch = request.state.orchestrator
+        modelos = {
+            "preditor_falhas": lambda: orch.preditor_falhas.retreinar(),
+            "otimizador_backup": lambda: orch.otimizador_backup.retreinar()
+        }
+
+        if not orch or job not in modelos:
+            return JSONResponse(status_code=404, content={"error": f"Unknown training job: {job}"})
+
+        agendados = app.state.treinos_agendados
+        estado = treinos.jobs.get(job)
+        if (estado and estado["status"] in ("queued", "running")) \
+                or any(t.get_name() == f"treino:{job}" for t in agendados):
+            return JSONResponse(status_code=409, content={"status": "already_running", "job": job})
+
+        tarefa = asyncio.create_task(modelos[job](), name=f"treino:{job}")
+        agendados.add(tarefa)
+        tarefa.add_done_callback(agendados.discard)
+        tarefa.add_done_callback(lambda t: _registrar_treino(job, t))
+        return JSONResponse(status_code=202, content={"status": "scheduled", "job": job})
+
+    @app.post("/api/v1/ml/treinos/{job}/cancelar")
+    async def cancelar_treino(job: str):
+        """Cancela um treino na fila ou em execução"""
+        if not treinos.cancelar(job):
+            return JSONResponse(status_code=404, content={"error": f"No running training job: {job}"})
+        return {"status": "cancelling", "job": job}
+
+    @app.get("/api/v1/series")
+    async def get_series(
+            request: Request,
+            metric: str,
+            period: str = "1h",
+            labels: Optional[str] = None
+    ):
+        """Range scan na TSDB; labels no formato chave=valor,chave=valor"""
+        orch = request.state.orchestrator
+        if not orch or not getattr(orch, "tsdb", None):
+            return JSONResponse(status_code=503, content={"error": "TSDB desativada"})
+
+        fim = datetime.now().timestamp()
+        inicio = fim - PERIODOS.get(period, 3600)
+        filtro = dict(par.split("=", 1) for par in labels.split(",") if "=" in par) if labels else None
+
+        loop = asyncio.get_running_loop()
+        series = await loop.run_in_executor(None, orch.tsdb.consultar, metric, inicio, fim, filtro)
+
+        return {
+            "metric": metric,
+            "period": period,
+            "series": {
+                chave: [{"timestamp": ts, "valor": valor} for ts, valor in pontos]
+                for chave, pontos in series.items()
+            }
+        }
+
+    @app.get("/api/v1/series/estatisticas")
+    async def get_series_estatisticas(request: Request):
+        """Tamanho e contagens da TSDB"""
+        orch = request.state.orchestrator
+        if not orch or not getattr(orch, "tsdb", None):
+            return JSONResponse(status_code=503, content={"error": "TSDB desativada"})
+        return orch.tsdb.estatisticas()
+
+    @app.get("/api/v1/self")
+    async def get_self():
+        """Overhead do próprio agente: percentis por componente, consumo do processo e fila de escrita"""
+        return {
+            **metricas_proprias.self_overhead(),
+            "fila_escrita": fila_escrita.estatisticas()
+        }
+
     @app.get("/api/v1/health")
     async def health_check():
         """Health check da API"""
@@ -0,0 +1,65 @@
+# tests/test_api.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.utils.treinamento import treinos
+from src.web.app import criar_app
+
+
+@pytest.fixture
+def retreinos(monkeypatch):
+    """Orquestrador falso: retreinar só espera e conta as chamadas"""
+    monkeypatch.setattr(treinos, "jobs", {})
+    chamadas = []
+
+    async def retreinar():
+        chamadas.append("preditor_falhas")
+        await asyncio.sleep(0.2)
+
+    orch = SimpleNamespace(
+        preditor_falhas=SimpleNamespace(retreinar=retreinar),
+        otimizador_backup=SimpleNamespace(retreinar=retreinar)
+    )
+    app = criar_app(orch)
+    with TestClient(app) as cliente:
+        yield cliente, app, chamadas
+
+
+# ============= TREINOS =============
+
+def test_treino_agendado_guarda_a_task_ate_terminar(retreinos):
+    cliente, app, chamadas = retreinos
+
+    resposta = cliente.post("/api/v1/ml/treinos/preditor_falhas")
+    assert resposta.status_code == 202
+    assert [t.get_name() for t in app.state.treinos_agendados] == ["treino:preditor_falhas"]
+
+    # Ainda agendado: um segundo pedido não dispara outro retreino
+    assert cliente.post("/api/v1/ml/treinos/preditor_falhas").status_code == 409
+
+    async def esperar(tarefa):
+        await asyncio.wait_for(tarefa, 5)
+
+    cliente.portal.call(esperar, next(iter(app.state.treinos_agendados)))
+    assert app.state.treinos_agendados == set()
+    assert chamadas == ["preditor_falhas"]
+
+
+@pytest.mark.parametrize("status, esperado", [
+    ("queued", 409), ("running", 409), ("success", 202), ("error", 202)
+])
+def test_treino_em_andamento_responde_409(retreinos, status, esperado):
+    cliente, _, _ = retreinos
+    treinos.jobs["preditor_falhas"] = {"status": status}
+
+    resposta = cliente.post("/api/v1/ml/treinos/preditor_falhas")
+    assert resposta.status_code == esperado
+
+
+def test_treino_desconhecido_responde_404(retreinos):
+    cliente, _, chamadas = retreinos
+    assert cliente.post("/api/v1/ml/treinos/inexistente").status_code == 404
+    assert chamadas == []
@@ -0,0 +1,534 @@
+# tests/test_monitor.py
+import asyncio
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import psutil
+import pytest
+from aiohttp import web
+
+from src.config import config
+from src.monitor.cgroups import ColetorCgroups
+from src.monitor.coleta import ContextoColeta, MotorColeta
+from src.monitor.cpu import AmostradorCPU
+from src.monitor.processos import RastreadorProcessos
+from src.monitor.rede import CONTADORES_REDE, LIMITE_32_BITS, TaxasInterfaces
+from src.monitor.servicos import ColetorSondas, MotorSondas
+from src.monitor.sistema import SistemaMonitor
+from src.monitor.snapshot import CAMPOS_NUCLEO, MetricSnapshot
+from src.utils.metrics import metrics
+
+
+# ============= SERVIDORES LOCAIS =============
+
+def porta_livre() -> int:
+    """Porta sem ninguém escutando (conexões são recusadas)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def servidor_tcp(ssl_context=None, responder: bool = True):
+    """Servidor TCP local; com responder=False aceita e nunca fala nada"""
+    async def tratar(reader, writer):
+        if responder:
+            writer.close()
+        else:
+            await asyncio.sleep(3600)
+
+    servidor = await asyncio.start_server(tratar, "127.0.0.1", 0, ssl=ssl_context)
+    return servidor, servidor.sockets[0].getsockname()[1]
+
+
+async def servidor_http(status: int = 200, atraso: float = 0.0):
+    """Servidor aiohttp local que responde GET / com o status pedido"""
+    async def raiz(request):
+        await asyncio.sleep(atraso)
+        return web.Response(status=status)
+
+    app = web.Application()
+    app.router.add_get("/", raiz)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+@pytest.fixture
+def certificado(tmp_path):
+    """Gera um certificado autoassinado para localhost com validade em dias"""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl não disponível")
+
+    def gerar(dias: int):
+        cert, chave = tmp_path / f"cert{dias}.pem", tmp_path / f"chave{dias}.pem"
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+             "-keyout", str(chave), "-out", str(cert), "-days", str(dias),
+             "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost"],
+            check=True, capture_output=True
+        )
+        servidor = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        servidor.load_cert_chain(cert, chave)
+        cliente = ssl.create_default_context(cafile=str(cert))
+        return servidor, cliente
+
+    return gerar
+
+
+async def executar_sonda(sonda, ssl_context=None):
+    """Roda uma única sonda até o fim e devolve o resultado"""
+    motor = MotorSondas([{"nome": "alvo", **sonda}], ssl_context=ssl_context)
+    try:
+        await motor.executar_pendentes()
+        await motor.aguardar()
+        return motor.sondas["alvo"].resultado
+    finally:
+        await motor.fechar()
+
+
+# ============= SONDAS =============
+
+def test_sonda_tcp_ok():
+    async def cenario():
+        servidor, porta = await servidor_tcp()
+        async with servidor:
+            return await executar_sonda({"tipo": "tcp", "alvo": f"127.0.0.1:{porta}"})
+
+    resultado = asyncio.run(cenario())
+    assert resultado["ok"] is True
+    assert resultado["latencia_ms"] >= 0
+
+
+def test_sonda_tcp_recusada():
+    resultado = asyncio.run(executar_sonda(
+        {"tipo": "tcp", "alvo": f"127.0.0.1:{porta_livre()}"}
+    ))
+    assert resultado["ok"] is False
+    assert "erro" in resultado
+
+
+def test_sonda_tls_timeout_no_handshake():
+    async def cenario():
+        servidor, porta = await servidor_tcp(responder=False)
+        async with servidor:
+            return await executar_sonda(
+                {"tipo": "tls", "alvo": f"localhost:{porta}", "timeout": 0.2}
+            )
+
+    resultado = asyncio.run(cenario())
+    assert resultado == {**resultado, "ok": False, "erro": "timeout (0.2s)"}
+
+
+def test_sonda_tls_ok(certificado):
+    servidor_ssl, cliente_ssl = certificado(365)
+
+    async def cenario():
+        servidor, porta = await servidor_tcp(ssl_context=servidor_ssl)
+        async with servidor:
+            return await executar_sonda(
+                {"tipo": "tls", "alvo": f"localhost:{porta}"}, ssl_context=cliente_ssl
+            )
+
+    resultado = asyncio.run(cenario())
+    assert resultado["ok"] is True
+    assert resultado["dias_para_expirar"] > config.PROBES_CERT_WARN_DAYS
+
+
+def test_sonda_tls_certificado_expirando(certificado):
+    servidor_ssl, cliente_ssl = certificado(3)
+
+    async def cenario():
+        servidor, porta = await servidor_tcp(ssl_context=servidor_ssl)
+        async with servidor:
+            return await executar_sonda(
+                {"tipo": "tls", "alvo": f"localhost:{porta}"}, ssl_context=cliente_ssl
+            )
+
+    resultado = asyncio.run(cenario())
+    assert resultado["ok"] is False
+    assert resultado["dias_para_expirar"] < config.PROBES_CERT_WARN_DAYS
+    assert resultado["erro"].startswith("certificado expira em")
+
+
+def test_sonda_http_ok():
+    async def cenario():
+        runner, porta = await servidor_http(200)
+        try:
+            return await executar_sonda({"tipo": "http", "alvo": f"http://127.0.0.1:{porta}/"})
+        finally:
+            await runner.cleanup()
+
+    resultado = asyncio.run(cenario())
+    assert resultado["ok"] is True
+    assert resultado["status"] == 200
+
+
+def test_sonda_http_status_divergente():
+    async def cenario():
+        runner, porta = await servidor_http(503)
+        try:
+            return await executar_sonda({
+                "tipo": "http", "alvo": f"http://127.0.0.1:{porta}/",
+                "status_esperado": 200
+            })
+        finally:
+            await runner.cleanup()
+
+    resultado = asyncio.run(cenario())
+    assert resultado["ok"] is False
+    assert resultado["status"] == 503
+    assert resultado["erro"] == "HTTP 503"
+
+
+def test_sonda_http_timeout():
+    async def cenario():
+        runner, porta = await servidor_http(200, atraso=2)
+        try:
+            return await executar_sonda({
+                "tipo": "http", "alvo": f"http://127.0.0.1:{porta}/", "timeout": 0.2
+            })
+        finally:
+            await runner.cleanup()
+
+    resultado = asyncio.run(cenario())
+    assert resultado["ok"] is False
+    assert resultado["erro"] == "timeout (0.2s)"
+
+
+# ============= ALERTAS E SHUTDOWN =============
+
+def test_sonda_com_falha_gera_servico_parado():
+    async def cenario():
+        resultado = await executar_sonda(
+            {"tipo": "tcp", "alvo": f"127.0.0.1:{porta_livre()}"}
+        )
+        monitor = SistemaMonitor.__new__(SistemaMonitor)
+        return await monitor.verificar_alertas({"probes": {"alvo": resultado}})
+
+    alertas = asyncio.run(cenario())
+    assert [a["tipo"] for a in alertas] == ["servico_parado"]
+    assert alertas[0]["severidade"] == "alta"
+    assert alertas[0]["detalhes"]["servico"] == "alvo"
+    assert alertas[0]["detalhes"]["ok"] is False
+
+
+def test_fechar_monitor_aguarda_coletor_de_sondas():
+    async def cenario():
+        runner, porta = await servidor_http(200)
+        try:
+            coletor = ColetorSondas(ContextoColeta())
+            coletor.motor = MotorSondas(
+                [{"nome": "alvo", "tipo": "http", "alvo": f"http://127.0.0.1:{porta}/"}]
+            )
+            await coletor.coletar()
+            await coletor.motor.aguardar()
+            sessao = coletor.motor._sessao
+
+            monitor = SistemaMonitor.__new__(SistemaMonitor)
+            monitor.coletores, monitor.procfs = [coletor], None
+            monitor.motor = MotorColeta(max_workers=1)
+            await monitor.fechar()
+            return sessao.closed
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(cenario()) is True
+
+
+# ============= MOTOR DE COLETA =============
+
+def test_coletor_travado_nao_ocupa_mais_workers():
+    liberar = threading.Event()
+    chamadas = []
+
+    def travado():
+        chamadas.append(time.monotonic())
+        liberar.wait(5)
+        return {"ok": True}
+
+    async def cenario():
+        motor = MotorColeta(max_workers=2, timeout=0.1)
+        motor.registrar("travado", travado)
+        motor.registrar("rapido", lambda: {"valor": 1})
+        try:
+            ciclos = [await motor.executar() for _ in range(3)]
+        finally:
+            liberar.set()
+        await asyncio.sleep(0.05)
+        ciclos.append(await motor.executar())
+        motor.fechar()
+        return ciclos
+
+    ciclos = asyncio.run(cenario())
+    assert len(chamadas) == 2  # despachado de novo só depois de terminar
+    assert [c["erros"].get("travado") for c in ciclos] == ["timeout"] * 3 + [None]
+    assert all(c["resultados"]["rapido"] == {"valor": 1} for c in ciclos)
+    assert ciclos[-1]["resultados"]["travado"] == {"ok": True}
+
+
+def test_snapshot_do_ciclo_igual_ao_de_coletar_tudo():
+    processo = {"pid": 42, "name": "postgres", "cpu_percent": 87.5,
+                "memory_percent": 3.2, "io_bytes_s": 1024.0, "status": "running"}
+    resultados = {
+        "cpu": {"percent": 55.0, "per_core": [50.0, 60.0], "load_avg": [1.0, 2.0, 3.0]},
+        "memory": {"percent": 40.0, "swap": {"percent": 1.5}},
+        "processes": {"total": 120, "zombie": 0, "top_cpu": [processo], "top_memory": [],
+                      "top_io": [processo]},
+        "services": {"nginx": "active", "cron": "failed"},
+        "probes": {"api": {"ok": False, "tipo": "http"}},
+    }
+
+    async def cenario():
+        monitor = SistemaMonitor.__new__(SistemaMonitor)
+        monitor.hostname, monitor.procfs = "host-a", None
+        monitor.motor = MotorColeta(max_workers=2)
+        for nome, resultado in resultados.items():
+            monitor.motor.registrar(nome, lambda r=resultado: r)
+        try:
+            return await monitor.coletar_snapshot(), await monitor.coletar_tudo()
+        finally:
+            monitor.motor.fechar()
+
+    (snapshot, vistos), metrics = asyncio.run(cenario())
+    assert vistos == resultados
+
+    # Mesmo núcleo pelos dois caminhos (exceto relógio e duração da coleta)
+    do_dict = MetricSnapshot.from_metrics(metrics)
+    campos = [c for c in CAMPOS_NUCLEO if c not in ("timestamp", "coleta_ms")]
+    assert [snapshot.get(c, -1.0) for c in campos] == [do_dict.get(c, -1.0) for c in campos]
+    assert snapshot["cpu_percent"] == 55.0 and snapshot["load_avg_15min"] == 3.0
+    assert snapshot["disk_percent"] != snapshot["disk_percent"]  # coletor ausente: NaN
+    assert snapshot["coleta_ms"] >= 0
+
+    # Seção variável guarda por núcleo, top-K e serviços, e sobrevive ao details
+    gravado = MetricSnapshot.from_json(snapshot.to_json())
+    sem_uptime = lambda extras: {k: v for k, v in extras.items() if k != "uptime"}
+    assert sem_uptime(gravado.extras) == sem_uptime(do_dict.extras)
+    assert gravado.extras["per_core"] == [50.0, 60.0]
+    assert gravado.extras["top_processos"] == {"top_cpu": [[42, "postgres", 87.5]],
+                                               "top_io": [[42, "postgres", 1024.0]]}
+    assert gravado.extras["servicos"] == {"nginx": "active", "cron": "failed"}
+    assert gravado.extras["sondas_falhando"] == ["api"]
+
+
+# ============= AUTO-INSTRUMENTAÇÃO =============
+
+def test_alocacoes_por_componente_com_tracemalloc(monkeypatch):
+    monkeypatch.setattr(metrics, "trace_allocations", True)
+    tracemalloc.start()
+    try:
+        with metrics.timed("teste.retido"):
+            retido = bytearray(2 * 1024 * 1024)
+        with metrics.timed("teste.temporario"):
+            bytearray(4 * 1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+    componentes = metrics.self_overhead()["components"]
+    assert componentes["teste.retido"]["allocated_kb"]["p50"] >= 2048
+    assert componentes["teste.temporario"]["allocated_kb"]["p50"] < 1024
+    assert componentes["teste.temporario"]["peak_kb"]["max"] >= 4096
+    del retido
+
+
+def test_alocacoes_desligadas_por_padrao():
+    with metrics.timed("teste.sem_trace"):
+        bytearray(1024)
+    assert "allocated_kb" not in metrics.self_overhead()["components"]["teste.sem_trace"]
+
+
+# ============= PROCESSOS =============
+
+@pytest.fixture
+def processo_filho():
+    filho = subprocess.Popen(["sleep", "30"])
+    yield filho.pid
+    filho.kill()
+    filho.wait()
+
+
+def test_processo_conhecido_atualiza_sem_criar_handle(processo_filho, monkeypatch):
+    rastreador = RastreadorProcessos(top_k=3)
+    rastreador._adicionar(processo_filho)
+    chave = rastreador.chaves[processo_filho]
+    handle = rastreador.handles[chave]
+
+    # is_running() criaria um Process novo (mais uma leitura do stat) por ciclo
+    criados = []
+    original = psutil.Process
+    monkeypatch.setattr(psutil, "Process", lambda *a: criados.append(a) or original(*a))
+    rastreador._atualizar_processo(processo_filho, 1.0)
+
+    assert criados == []
+    assert rastreador.handles[chave] is handle
+    assert rastreador.info[chave]["status"] in (psutil.STATUS_SLEEPING, psutil.STATUS_RUNNING)
+
+
+def test_pid_reaproveitado_recria_a_entrada(processo_filho):
+    rastreador = RastreadorProcessos(top_k=3)
+    rastreador._adicionar(processo_filho)
+    chave = rastreador.chaves[processo_filho]
+    antigo = rastreador.handles[chave]
+    rastreador._io_anterior[chave] = 10 ** 12
+
+    # Outro processo com o mesmo pid: o starttime do stat não bate mais
+    rastreador._inicio[chave] = -1
+    rastreador._atualizar_processo(processo_filho, 1.0)
+
+    novo = rastreador.chaves[processo_filho]
+    assert rastreador.handles[novo] is not antigo
+    assert rastreador._inicio[novo] != -1
+    assert rastreador._io_anterior.get(novo) is None  # delta de IO recomeça
+
+
+# ============= CPU =============
+
+def contadores_cpu(ocupado: int, ocioso: int):
+    """/proc/stat de uma CPU: só user e idle, em ticks"""
+    return {"cpu": (ocupado, 0, 0, ocioso, 0, 0, 0, 0),
+            "cpu0": (ocupado, 0, 0, ocioso, 0, 0, 0, 0)}
+
+
+def test_amostrador_cpu_mantem_delta_por_consumidor():
+    amostrador = AmostradorCPU(janela_minima=0)
+    amostrador.atualizar(contadores_cpu(0, 0), "coleta")
+    amostrador.atualizar(contadores_cpu(0, 0), "prometheus")
+
+    # 100% ocupado por 900 ticks, depois ocioso por 100
+    assert amostrador.atualizar(contadores_cpu(900, 0), "prometheus")["percent"] == 100.0
+    assert amostrador.atualizar(contadores_cpu(900, 100), "prometheus")["percent"] == 0.0
+
+    # O ciclo de coleta vê a janela inteira desde a sua amostra anterior
+    amostra = amostrador.atualizar(contadores_cpu(900, 100), "coleta")
+    assert amostra["percent"] == 90.0
+    assert amostra["per_core"] == [90.0]
+
+
+def test_amostrador_cpu_respeita_janela_minima_com_procfs():
+    amostrador = AmostradorCPU(janela_minima=60)
+    primeira = amostrador.atualizar(contadores_cpu(0, 0))
+
+    # Dentro da janela: mesma amostra, sem avançar os contadores anteriores
+    assert amostrador.atualizar(contadores_cpu(50, 50)) is primeira
+    assert amostrador.atualizar(contadores_cpu(60, 50)) is primeira
+    assert amostrador._anterior["coleta"] == contadores_cpu(0, 0)
+
+
+# ============= REDE =============
+
+def contadores_rede(bytes_recv: int):
+    return {"eth0": {campo: 0 for campo in CONTADORES_REDE} | {"bytes_recv": bytes_recv}}
+
+
+def test_taxas_contador_32_bits_dando_a_volta():
+    taxas = TaxasInterfaces()
+    taxas.calcular(contadores_rede(LIMITE_32_BITS - 1000), agora=0, velocidades={"eth0": 1000})
+    resultado = taxas.calcular(contadores_rede(500), agora=10, velocidades={"eth0": 1000})
+
+    assert resultado["eth0"]["bytes_recv_s"] == 150.0  # (1000 + 500) bytes em 10s
+
+
+def test_taxas_reset_de_contador_64_bits_abaixo_de_4gib():
+    taxas = TaxasInterfaces()
+    # Sem velocidade conhecida (interface virtual) não dá para provar a volta
+    taxas.calcular(contadores_rede(3 * 2 ** 30), agora=0)
+    resultado = taxas.calcular(contadores_rede(2000), agora=10)
+    assert resultado["eth0"]["bytes_recv_s"] == 200.0
+
+    # Link de 100 Mbit/s não passa ~1 GiB em 10s: é reset, não volta
+    taxas.calcular(contadores_rede(3 * 2 ** 30), agora=20, velocidades={"eth0": 100})
+    resultado = taxas.calcular(contadores_rede(2000), agora=30, velocidades={"eth0": 100})
+    assert resultado["eth0"]["bytes_recv_s"] == 200.0
+
+
+def test_taxas_contador_ja_acima_de_32_bits_nunca_da_a_volta():
+    taxas = TaxasInterfaces()
+    taxas.calcular(contadores_rede(LIMITE_32_BITS + 10), agora=0, velocidades={"eth0": 10000})
+    taxas.calcular(contadores_rede(LIMITE_32_BITS + 20), agora=10, velocidades={"eth0": 10000})
+    # Driver recarregado: zerou e ficou logo abaixo de 2^32 depois de muito tempo
+    taxas.calcular(contadores_rede(LIMITE_32_BITS - 100), agora=20, velocidades={"eth0": 10000})
+    resultado = taxas.calcular(contadores_rede(100), agora=30, velocidades={"eth0": 10000})
+    assert resultado["eth0"]["bytes_recv_s"] == 10.0
+
+
+def test_coletor_com_falha_tenta_de_novo_no_proximo_ciclo():
+    chamadas = []
+
+    def instavel():
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            raise OSError("falhou")
+        return {"valor": len(chamadas)}
+
+    async def cenario():
+        motor = MotorColeta(max_workers=1)
+        motor.registrar("instavel", instavel, intervalo=3600)
+        try:
+            return [await motor.executar() for _ in range(3)]
+        finally:
+            motor.fechar()
+
+    falha, sucesso, em_cache = asyncio.run(cenario())
+    assert falha["erros"] == {"instavel": "falhou"}
+    assert falha["resultados"]["instavel"] == {}
+    assert falha["idades_s"]["instavel"] is None
+
+    # Falhou sem nunca ter coletado: não espera o intervalo de 1h
+    assert sucesso["erros"] == {} and sucesso["resultados"]["instavel"] == {"valor": 2}
+    assert em_cache["latencias_ms"] == {} and len(chamadas) == 2
+
+
+# ============= CGROUPS =============
+
+def criar_cgroup(raiz, relativo: str, usage_usec: int = 1000, memoria: int = 4096):
+    caminho = raiz / relativo
+    caminho.mkdir(parents=True, exist_ok=True)
+    (caminho / "cpu.stat").write_text(f"usage_usec {usage_usec}\nthrottled_usec 0\n")
+    (caminho / "memory.current").write_text(f"{memoria}\n")
+    return caminho
+
+
+def test_cgroups_uma_serie_por_container(tmp_path):
+    id1, id2 = "a" * 64, "b" * 64
+    (tmp_path / "cgroup.controllers").write_text("cpu memory io pids\n")
+    criar_cgroup(tmp_path, "system.slice")
+    criar_cgroup(tmp_path, f"system.slice/docker-{id1}.scope")
+    criar_cgroup(tmp_path, f"system.slice/docker-{id1}.scope/init.scope")
+    criar_cgroup(tmp_path, f"system.slice/docker-{id1}.scope/aninhado/filho")
+    criar_cgroup(tmp_path, "kubepods.slice/kubepods-burstable.slice/"
+                           f"kubepods-burstable-pod1234.slice/cri-containerd-{id2}.scope/sub")
+    criar_cgroup(tmp_path, "user.slice/user-1000.slice")
+
+    resultado = ColetorCgroups(raiz=str(tmp_path)).coletar()
+    por_container = Counter(s["labels"]["container_id"] for s in resultado["series"])
+
+    assert por_container[id1[:12]] == 1 and por_container[id2[:12]] == 1
+    assert {s["labels"]["cgroup"] for s in resultado["series"] if s["labels"]["container_id"]} == {
+        f"/system.slice/docker-{id1}.scope",
+        f"/kubepods.slice/kubepods-burstable.slice/kubepods-burstable-pod1234.slice/"
+        f"cri-containerd-{id2}.scope",
+    }
+
+
+def test_cgroups_container_novo_sem_mtime_do_pai(tmp_path):
+    (tmp_path / "cgroup.controllers").write_text("cpu memory io pids\n")
+    slice_ = criar_cgroup(tmp_path, "system.slice")
+    coletor = ColetorCgroups(raiz=str(tmp_path), intervalo_revarredura=3600)
+    assert coletor.coletar()["total"] == 1
+
+    # kernfs não atualiza o mtime do pai: o container novo não muda o stat
+    stat = os.stat(slice_)
+    criar_cgroup(tmp_path, f"system.slice/docker-{'c' * 64}.scope")
+    os.utime(slice_, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    series = coletor.coletar()["series"]
+    assert [s["labels"]["container_id"] for s in series if s["labels"]["container_id"]] == ["c" * 12]
@@ -0,0 +1,221 @@
+# tests/test_preditor.py
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import config
+from src.monitor.features import (
+    FEATURES, FEATURES_BASE, JANELA_MEDIA, EstadoFeatures, derivar_lote
+)
+from src.monitor.inferencia import VERSAO, ModeloCompacto
+from src.monitor.preditor import PreditorFalhas, rotular_falhas
+
+
+def amostras(total: int, semente: int = 7, fracao_nan: float = 0.1) -> pd.DataFrame:
+    """Linhas de FEATURES_BASE em ordem temporal, algumas com valor ausente"""
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        'cpu_percent': rng.uniform(0, 100, total),
+        'memory_percent': rng.uniform(20, 95, total),
+        'disk_percent': rng.uniform(40, 60, total),
+        'load_avg_1min': rng.exponential(1.0, total),
+        'load_avg_5min': rng.exponential(1.0, total),
+        'load_avg_15min': rng.exponential(1.0, total),
+        'processes_total': rng.integers(100, 400, total).astype(float),
+        'connections_total': rng.integers(0, 200, total).astype(float),
+        'hour_of_day': rng.integers(0, 24, total).astype(float),
+        'day_of_week': rng.integers(0, 7, total).astype(float),
+    })[FEATURES_BASE]
+
+    ausentes = rng.random(total) < fracao_nan
+    colunas = rng.integers(0, len(FEATURES_BASE), total)
+    for linha in np.flatnonzero(ausentes):
+        df.iat[linha, colunas[linha]] = np.nan
+    return df
+
+
+# ============= FEATURES: LOTE x FLUXO =============
+
+def test_fluxo_igual_ao_lote_com_volta_completa_da_janela():
+    df = amostras(3 * JANELA_MEDIA + 17)
+    assert df.isna().any(axis=1).sum() > 0
+
+    # Treino: linhas incompletas saem antes das médias móveis
+    lote = derivar_lote(df.dropna()).to_numpy(dtype=np.float64)
+
+    estado = EstadoFeatures()
+    fluxo = []
+    for linha in df.to_numpy(dtype=np.float64):
+        vetor = estado.atualizar(list(linha))
+        if not np.isnan(linha).any():
+            fluxo.append(vetor)
+
+    assert estado.amostras == JANELA_MEDIA
+    assert np.allclose(np.array(fluxo), lote, rtol=0, atol=1e-9)
+
+
+def test_linha_incompleta_nao_entra_na_janela():
+    df = amostras(JANELA_MEDIA + 5, fracao_nan=0)
+    linhas = df.to_numpy(dtype=np.float64)
+    incompleta = linhas[0].copy()
+    incompleta[FEATURES_BASE.index('cpu_percent')] = np.nan
+
+    estado = EstadoFeatures()
+    for linha in linhas[:-1]:
+        estado.atualizar(list(linha))
+    antes = (estado.cpu.media(), estado.memoria.media())
+
+    vetor = estado.atualizar(list(incompleta))
+    assert (estado.cpu.media(), estado.memoria.media()) == antes
+    assert vetor[FEATURES_BASE.index('cpu_percent')] == 0.0
+    assert vetor[FEATURES.index('cpu_ma_60')] == antes[0]
+    assert not any(math.isnan(v) for v in vetor)
+
+    # A próxima amostra completa continua batendo com o lote
+    ultimo = estado.atualizar(list(linhas[-1]))
+    esperado = derivar_lote(df).to_numpy(dtype=np.float64)[-1]
+    assert np.allclose(ultimo, esperado, rtol=0, atol=1e-9)
+
+
+def test_vetor_igual_a_atualizar_sem_registrar():
+    df = amostras(2 * JANELA_MEDIA + 3, semente=11)
+    estado = EstadoFeatures()
+
+    for linha in df.to_numpy(dtype=np.float64):
+        linha = list(linha)
+        amostras_antes = estado.amostras
+        consulta = estado.vetor(linha)
+        assert estado.amostras == amostras_antes
+        assert np.allclose(consulta, estado.atualizar(linha), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("dia, fim_de_semana", [(4, 0.0), (5, 1.0), (6, 1.0), (0, 0.0)])
+def test_fim_de_semana_igual_no_lote_e_no_fluxo(dia, fim_de_semana):
+    df = amostras(1, fracao_nan=0)
+    df['day_of_week'] = float(dia)
+    lote = derivar_lote(df).to_numpy(dtype=np.float64)[0]
+    fluxo = EstadoFeatures().atualizar(list(df.to_numpy(dtype=np.float64)[0]))
+
+    assert fluxo[FEATURES.index('is_weekend')] == lote[FEATURES.index('is_weekend')] == fim_de_semana
+
+
+# ============= ARTEFATO NUMPY x SKLEARN =============
+
+@pytest.fixture(scope="module")
+def modelo_sklearn():
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(3)
+    X = rng.normal(50, 20, (600, len(FEATURES)))
+    y = ((X[:, 0] > 70) | (X[:, 1] + rng.normal(0, 10, 600) > 80)).astype(int)
+
+    scaler = StandardScaler().fit(X)
+    modelo = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0)
+    modelo.fit(scaler.transform(X), y)
+    return modelo, scaler, rng.normal(50, 25, (200, len(FEATURES)))
+
+
+def test_artefato_igual_ao_sklearn_apos_salvar_e_carregar(modelo_sklearn, tmp_path):
+    modelo, scaler, X = modelo_sklearn
+    esperado = modelo.predict_proba(scaler.transform(X))[:, 1]
+
+    caminho = tmp_path / "modelo.npz"
+    ModeloCompacto.de_sklearn(modelo, scaler, FEATURES).salvar(caminho)
+    compacto = ModeloCompacto.carregar(caminho)
+
+    assert compacto.colunas == FEATURES
+    assert np.allclose(compacto.predict_proba(X), esperado, rtol=0, atol=1e-9)
+    assert np.allclose([compacto.predict(linha) for linha in X], esperado, rtol=0, atol=1e-9)
+    assert compacto.top_features(2) == dict(sorted(
+        zip(FEATURES, modelo.feature_importances_), key=lambda x: x[1], reverse=True
+    )[:2])
+
+
+def test_artefato_com_colunas_diferentes_e_rejeitado(modelo_sklearn, tmp_path):
+    modelo, scaler, _ = modelo_sklearn
+    colunas = list(reversed(FEATURES))
+    caminho = tmp_path / "modelo.npz"
+    ModeloCompacto.de_sklearn(modelo, scaler, colunas).salvar(caminho)
+
+    preditor = PreditorFalhas.__new__(PreditorFalhas)
+    preditor.is_trained = False
+    with pytest.raises(ValueError, match="Colunas do artefato"):
+        preditor._usar_modelo(ModeloCompacto.carregar(caminho))
+    assert preditor.is_trained is False
+
+
+def test_artefato_de_versao_desconhecida_e_rejeitado(modelo_sklearn, tmp_path):
+    modelo, scaler, _ = modelo_sklearn
+    compacto = ModeloCompacto.de_sklearn(modelo, scaler, FEATURES)
+    caminho = tmp_path / "modelo.npz"
+    np.savez(caminho, versao=VERSAO + 1,
+             **{campo: np.asarray(getattr(compacto, campo)) for campo in ModeloCompacto.CAMPOS})
+
+    with pytest.raises(ValueError, match="Versão"):
+        ModeloCompacto.carregar(caminho)
+
+
+# ============= RÓTULOS DE FALHA =============
+
+def rotular_por_linha(timestamps, cpu, limiar, duracao_minima, horizonte):
+    """Referência ingênua: percorre a janela à frente de cada amostra"""
+    total = len(timestamps)
+    rotulos = [math.nan] * total
+    for i in range(total):
+        if timestamps[i] + horizonte > timestamps[-1]:
+            continue  # janela ainda não observada por inteiro
+        quente = 0.0
+        for j in range(i, total):
+            if timestamps[j] >= timestamps[i] + horizonte:
+                break
+            if j + 1 < total:
+                duracao = timestamps[j + 1] - timestamps[j]
+            else:
+                duracao = float(np.median(np.diff(timestamps)))
+            if cpu[j] > limiar:
+                quente += min(duracao, config.MONITOR_INTERVAL_SLOW)
+        rotulos[i] = float(quente >= duracao_minima)
+    return np.array(rotulos)
+
+
+@pytest.mark.parametrize("semente", [1, 2, 3])
+def test_rotulos_iguais_a_janela_por_linha(semente):
+    rng = np.random.default_rng(semente)
+    lento = config.MONITOR_INTERVAL_SLOW
+    # Intervalos irregulares, incluindo lacunas bem maiores que o intervalo lento
+    passos = rng.choice([1, 7, 30, lento, 3 * lento, 40 * lento], size=400,
+                        p=[0.2, 0.3, 0.3, 0.1, 0.07, 0.03])
+    timestamps = 1_700_000_000 + np.cumsum(passos).astype(np.int64)
+    cpu = np.where(rng.random(400) < 0.3, 99.0, rng.uniform(0, 80, 400))
+    parametros = dict(limiar=95.0, duracao_minima=2 * lento, horizonte=20 * lento)
+
+    rotulos = rotular_falhas(timestamps, cpu, **parametros)
+    esperado = rotular_por_linha(timestamps, cpu, **parametros)
+
+    assert np.array_equal(rotulos, esperado, equal_nan=True)
+    assert 0 < np.nansum(rotulos) < np.count_nonzero(~np.isnan(rotulos))
+    # Cauda sem janela completa fica NaN, o resto é 0/1
+    observadas = timestamps + parametros["horizonte"] <= timestamps[-1]
+    assert np.isnan(rotulos[~observadas]).all() and not np.isnan(rotulos[observadas]).any()
+
+
+def test_lacuna_de_coleta_nao_conta_como_cpu_alta():
+    lento = config.MONITOR_INTERVAL_SLOW
+    # Uma amostra quente seguida de uma lacuna de 10 intervalos lentos
+    timestamps = np.array([0, 10 * lento, 10 * lento + 1, 10 * lento + 2, 100 * lento])
+    cpu = np.array([99.0, 10.0, 10.0, 10.0, 10.0])
+
+    rotulos = rotular_falhas(timestamps, cpu, limiar=95, duracao_minima=lento + 1,
+                             horizonte=50 * lento)
+    assert rotulos[0] == 0.0  # só `lento` segundos quentes, não 10 * lento
+    rotulos = rotular_falhas(timestamps, cpu, limiar=95, duracao_minima=lento,
+                             horizonte=50 * lento)
+    assert rotulos[0] == 1.0
+    assert np.isnan(rotulos[-1])
+
+
+def test_rotulos_vazios():
+    assert rotular_falhas(np.array([], dtype=np.int64), np.array([])).size == 0
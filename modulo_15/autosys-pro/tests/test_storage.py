@@ -0,0 +1,188 @@
+# tests/test_storage.py
+import asyncio
+import os
+import struct
+from array import array
+
+import pytest
+
+from src.storage.database import BancoDados
+from src.storage.fila import FilaEscrita
+from src.storage.gorilla import codificar, decodificar
+from src.storage.tsdb import LOG_HEAD, REGISTRO_HEAD, ArmazemSeries
+
+SQL_ALERTA = "INSERT INTO alerts (id, timestamp, tipo) VALUES (?, ?, ?)"
+SQL_BACKUP = "INSERT INTO backups (id, timestamp, sucesso) VALUES (?, ?, ?)"
+
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = BancoDados(tmp_path / "autosys.db", leitores=1)
+    banco.abrir()
+    yield banco
+    banco.fechar()
+
+
+# ============= FILA DE ESCRITA =============
+
+def test_fila_isola_linha_invalida_do_lote(banco):
+    # Alerta "a1" repetido viola a PRIMARY KEY e derruba o lote inteiro
+    linhas = [(SQL_ALERTA, (f"a{i}", "2026-01-01", "cpu_alta")) for i in range(5)]
+    linhas.insert(3, (SQL_ALERTA, ("a1", "2026-01-01", "duplicado")))
+    linhas += [(SQL_BACKUP, (f"b{i}", "2026-01-01", 1)) for i in range(3)]
+
+    async def cenario():
+        fila = FilaEscrita(banco, capacidade=100, tamanho_lote=len(linhas), intervalo=0.05)
+        fila.iniciar()
+        for sql, params in linhas:
+            await fila.enfileirar(sql, params)
+        while fila.linhas_gravadas + fila.linhas_perdidas < len(linhas):
+            await asyncio.sleep(0.01)
+        fila.fechar()
+        return fila
+
+    fila = asyncio.run(cenario())
+
+    alertas = {r["id"]: r["tipo"] for r in banco.ler("SELECT id, tipo FROM alerts")}
+    assert alertas == {f"a{i}": "cpu_alta" for i in range(5)}
+    assert {r["id"] for r in banco.ler("SELECT id FROM backups")} == {"b0", "b1", "b2"}
+    assert fila.linhas_gravadas == len(linhas) - 1
+    assert fila.linhas_perdidas == 1
+
+
+def test_fechar_isola_linha_invalida_dos_pendentes(banco):
+    fila = FilaEscrita(banco)
+    fila._lote = [(SQL_ALERTA, ("x", "2026-01-01", "a")),
+                  (SQL_ALERTA, ("x", "2026-01-01", "b")),
+                  (SQL_BACKUP, ("b", "2026-01-01", 1))]
+    fila.fechar()
+
+    assert [r["id"] for r in banco.ler("SELECT id FROM alerts")] == ["x"]
+    assert [r["id"] for r in banco.ler("SELECT id FROM backups")] == ["b"]
+    assert fila.linhas_perdidas == 1
+
+
+# ============= GORILLA =============
+
+def _bits(valores):
+    """Valores como bits crus: NaN e -0.0 também precisam voltar idênticos"""
+    return [struct.pack(">d", v) for v in valores]
+
+
+def _ida_e_volta(timestamps, valores):
+    ts, vals = array("q", timestamps), array("d", valores)
+    ts_lido, vals_lido = decodificar(codificar(ts, vals), len(ts))
+    assert list(ts_lido) == list(ts)
+    assert _bits(vals_lido) == _bits(vals)
+
+
+@pytest.mark.parametrize("valores", [
+    [float("nan"), 1.0, float("nan"), float("nan")],
+    [float("inf"), float("-inf"), 0.0, float("inf")],
+    [0.0, -0.0, 0.0, -0.0],
+    [5e-324, 2.2250738585072e-308, -5e-324, 1e-310, 0.0],
+    [1.0, 1.0 + 2 ** -52, -1e308, 1e308, 42.0, 42.0],
+])
+def test_gorilla_valores_especiais(valores):
+    _ida_e_volta([1_700_000_000_000 + i * 1000 for i in range(len(valores))], valores)
+
+
+def test_gorilla_um_ponto():
+    _ida_e_volta([1_700_000_000_000], [float("nan")])
+    _ida_e_volta([-5], [-0.0])
+
+
+def test_gorilla_delta_of_delta_em_todas_as_faixas():
+    # Bordas de cada faixa (7, 9, 12 bits e 64 bits), positivas e negativas
+    dods = [0, 63, -64, 64, -65, 255, -256, 256, -257, 2047, -2048, 2048, -2049,
+            10 ** 12, -(10 ** 12), 2 ** 40, -(2 ** 40) + 3]
+    timestamps, delta, ts = [0], 1000, 0
+    for dod in dods:
+        delta += dod
+        ts += delta
+        timestamps.append(ts)
+    _ida_e_volta(timestamps, [float(i) for i in range(len(timestamps))])
+
+
+def test_gorilla_deltas_muito_grandes():
+    _ida_e_volta([-(2 ** 62), 0, 2 ** 62, 2 ** 62 + 1], [1.0, 2.0, 3.0, 4.0])
+
+
+# ============= TSDB =============
+
+def _abandonar(armazem: ArmazemSeries):
+    """Simula um processo morto: fecha os descritores sem selar os heads"""
+    for fd, _ in armazem._segmentos.values():
+        os.close(fd)
+    os.close(armazem._log_head)
+
+
+def _pontos(armazem, inicio=0, fim=10 ** 10):
+    return armazem.consultar("cpu", inicio, fim, {"host": "a"}).get('cpu{host="a"}', [])
+
+
+def test_tsdb_reabre_com_pontos_nao_selados(tmp_path):
+    armazem = ArmazemSeries(tmp_path, pontos_por_chunk=10, duracao_chunk=10 ** 6)
+    for i in range(25):
+        armazem.inserir("cpu", float(i), timestamp=1000 + i, labels={"host": "a"})
+    esperado = _pontos(armazem)
+    _abandonar(armazem)
+
+    reaberto = ArmazemSeries(tmp_path, pontos_por_chunk=10, duracao_chunk=10 ** 6)
+    try:
+        assert _pontos(reaberto) == esperado == [(1000.0 + i, float(i)) for i in range(25)]
+        assert len(reaberto.series[1].chunks) == 2
+        assert len(reaberto.series[1].head_ts) == 5
+    finally:
+        reaberto.fechar()
+
+    # Depois do fechar() tudo está selado e o log fica vazio
+    assert (tmp_path / LOG_HEAD).stat().st_size == 0
+    fechado = ArmazemSeries(tmp_path, pontos_por_chunk=10, duracao_chunk=10 ** 6)
+    try:
+        assert _pontos(fechado) == esperado
+    finally:
+        fechado.fechar()
+
+
+def test_tsdb_ignora_registro_rasgado_no_fim_do_log(tmp_path):
+    armazem = ArmazemSeries(tmp_path, pontos_por_chunk=100)
+    for i in range(5):
+        armazem.inserir("cpu", float(i), timestamp=1000 + i, labels={"host": "a"})
+    serie_id = armazem.series[1].id
+    _abandonar(armazem)
+
+    # Queda no meio do write: só parte do próximo registro chegou ao disco
+    with open(tmp_path / LOG_HEAD, "ab") as f:
+        f.write(REGISTRO_HEAD.pack(serie_id, 1_005_000, 5.0)[:7])
+
+    reaberto = ArmazemSeries(tmp_path, pontos_por_chunk=100)
+    try:
+        assert _pontos(reaberto) == [(1000.0 + i, float(i)) for i in range(5)]
+        # O log foi reescrito sem o resto rasgado: novos pontos seguem alinhados
+        assert (tmp_path / LOG_HEAD).stat().st_size == 5 * REGISTRO_HEAD.size
+        reaberto.inserir("cpu", 5.0, timestamp=1005, labels={"host": "a"})
+        _abandonar(reaberto)
+
+        reaberto = ArmazemSeries(tmp_path, pontos_por_chunk=100)
+        assert _pontos(reaberto) == [(1000.0 + i, float(i)) for i in range(6)]
+    finally:
+        reaberto.fechar()
+
+
+def test_tsdb_range_scan_entre_chunks_e_head(tmp_path):
+    armazem = ArmazemSeries(tmp_path, pontos_por_chunk=10, duracao_chunk=10 ** 6)
+    try:
+        for i in range(25):
+            armazem.inserir("cpu", i * 1.5, timestamp=1000 + i, labels={"host": "a"})
+            armazem.inserir("cpu", -1.0, timestamp=1000 + i, labels={"host": "b"})
+        serie = armazem.series[1]
+        assert len(serie.chunks) == 2 and len(serie.head_ts) == 5
+
+        # Do meio do primeiro chunk até o meio do head
+        pontos = _pontos(armazem, 1005, 1022)
+        assert pontos == [(1000.0 + i, i * 1.5) for i in range(5, 23)]
+        assert _pontos(armazem, 2000, 3000) == []
+        assert set(armazem.consultar("cpu", 1005, 1006)) == {'cpu{host="a"}', 'cpu{host="b"}'}
+    finally:
+        armazem.fechar()
@@ -0,0 +1,167 @@
+# tests/test_treinamento.py
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from src.config import config
+from src.utils.treinamento import GerenciadorTreinos, publicar
+
+
+# ============= FUNÇÕES DE TREINO (no nível do módulo: o worker usa spawn) =============
+
+def treino_rapido(progresso, valor):
+    progresso(0.5, "meio")
+    return valor
+
+
+def treino_lento(progresso):
+    for passo in range(1000):
+        progresso(passo / 1000, "passos")
+        time.sleep(0.01)
+    return "terminou"
+
+
+def treino_teimoso(progresso):
+    progresso(0.1, "sem checar cancelamento")
+    time.sleep(30)
+    return "terminou"
+
+
+def treino_que_morre(progresso):
+    progresso(0.1)
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def gerenciador(**kwargs) -> GerenciadorTreinos:
+    kwargs.setdefault("limite_memoria_mb", 0)
+    return GerenciadorTreinos(**kwargs)
+
+
+async def esperar_status(treinos: GerenciadorTreinos, job: str, status: str, limite: float = 30):
+    fim = time.monotonic() + limite
+    while treinos.jobs.get(job, {}).get("status") != status or treinos.jobs[job]["progresso"] == 0:
+        assert time.monotonic() < fim, f"{job} não chegou a {status}"
+        await asyncio.sleep(0.05)
+
+
+# ============= GERENCIADOR DE TREINOS =============
+
+def test_treino_com_sucesso_reporta_progresso():
+    treinos = gerenciador()
+    try:
+        resultado = asyncio.run(treinos.executar("job", treino_rapido, 42))
+    finally:
+        treinos.fechar()
+
+    assert resultado == 42
+    estado = treinos.jobs["job"]
+    assert estado["status"] == "success" and estado["progresso"] == 1.0
+    assert estado["etapa"] == "meio"
+
+
+def test_cancelar_treino_em_execucao_e_na_fila():
+    treinos = gerenciador()
+
+    async def cenario():
+        rodando = asyncio.create_task(treinos.executar("lento", treino_lento))
+        await esperar_status(treinos, "lento", "running")
+
+        repetido = await treinos.executar("lento", treino_lento)
+        na_fila = asyncio.create_task(treinos.executar("outro", treino_rapido, 1))
+        await asyncio.sleep(0)
+        assert treinos.jobs["outro"]["status"] == "queued"
+
+        assert treinos.cancelar("outro") and treinos.cancelar("lento")
+        return repetido, await rodando, await na_fila
+
+    try:
+        repetido, rodando, na_fila = asyncio.run(cenario())
+    finally:
+        treinos.fechar()
+
+    assert repetido == {"status": "already_running", "job": "lento"}
+    assert rodando == {"status": "cancelled", "job": "lento"}
+    assert na_fila == {"status": "cancelled", "job": "outro"}
+    assert 0 < treinos.jobs["lento"]["progresso"] < 1
+    assert not treinos.cancelar("lento")  # já terminou
+
+
+def test_treino_passando_do_tempo_maximo_e_cancelado():
+    treinos = gerenciador(tempo_maximo=1)
+    try:
+        resultado = asyncio.run(treinos.executar("lento", treino_lento))
+    finally:
+        treinos.fechar()
+
+    assert resultado == {"status": "timeout", "job": "lento"}
+    assert treinos.jobs["lento"]["status"] == "timeout"
+
+
+def test_worker_que_ignora_cancelamento_e_morto(monkeypatch):
+    monkeypatch.setattr(config, "ML_TRAIN_CANCEL_GRACE", 0.5)
+    treinos = gerenciador()
+
+    async def cenario():
+        rodando = asyncio.create_task(treinos.executar("teimoso", treino_teimoso))
+        await esperar_status(treinos, "teimoso", "running")
+        inicio = time.monotonic()
+        treinos.cancelar("teimoso")
+        resultado = await rodando
+        return resultado, time.monotonic() - inicio, await treinos.executar("depois", treino_rapido, 7)
+
+    try:
+        resultado, duracao, depois = asyncio.run(cenario())
+    finally:
+        treinos.fechar()
+
+    assert resultado == {"status": "cancelled", "job": "teimoso"}
+    assert duracao < 10
+    assert depois == 7  # pool recriado
+
+
+def test_processo_morto_vira_erro_e_pool_e_recriado():
+    treinos = gerenciador()
+
+    async def cenario():
+        return (await treinos.executar("morre", treino_que_morre),
+                await treinos.executar("depois", treino_rapido, 3))
+
+    try:
+        morto, depois = asyncio.run(cenario())
+    finally:
+        treinos.fechar()
+
+    assert morto["status"] == "error"
+    assert "processo de treino encerrado" in treinos.jobs["morre"]["erro"]
+    assert depois == 3
+    assert treinos.jobs["depois"]["status"] == "success"
+
+
+# ============= PUBLICAÇÃO ATÔMICA =============
+
+def test_publicar_substitui_o_arquivo_inteiro(tmp_path):
+    caminho = tmp_path / "modelo.bin"
+    caminho.write_bytes(b"antigo")
+
+    publicar(caminho, lambda f: f.write(b"novo"))
+
+    assert caminho.read_bytes() == b"novo"
+    assert os.listdir(tmp_path) == ["modelo.bin"]
+
+
+def test_publicar_com_falha_mantem_o_antigo(tmp_path):
+    caminho = tmp_path / "modelo.bin"
+    caminho.write_bytes(b"antigo")
+
+    def escrever_pela_metade(f):
+        f.write(b"no")
+        raise OSError("disco cheio")
+
+    with pytest.raises(OSError, match="disco cheio"):
+        publicar(caminho, escrever_pela_metade)
+
+    assert caminho.read_bytes() == b"antigo"
+    assert os.listdir(tmp_path) == ["modelo.bin"]  # sem temporário esquecido